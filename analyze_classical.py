@@ -0,0 +1,337 @@
+"""Analyze a classical DAG run from its HTCondor job event logs.
+
+Streams every node's job event log (see 'DAGBuilder.write_submit_file'),
+parses the submit/execute/evict/terminate events, and outputs the run's
+metrics along with a columnar (NPZ) table of every execution attempt.
+
+Each DAG node is a job of TASKS_PER_JOB tasks (read from the DAG file's VARS),
+so the throughputs are counted in tasks, like the EWMS analyzer's.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import pickle
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+import result_store
+import run_metrics
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+CACHE_FNAME = ".analyze_classical.cache.pkl"
+OUTPUT_FNAME = "classical_analysis.npz"
+
+DEFAULT_GLOB = "*.log"
+# these are DAGMan's own logs, which duplicate/omit node events
+DAGMAN_OWN_LOG_SUFFIXES = (".dagman.log", ".nodes.log", ".dagman.out")
+
+# event codes -- see https://htcondor.readthedocs.io/en/latest/codes-other-values/job-event-log-codes.html
+SUBMIT = "000"
+EXECUTE = "001"
+EVICTED = "004"
+TERMINATED = "005"
+SHADOW_EXCEPTION = "007"
+ABORTED = "009"
+HELD = "012"
+RELEASED = "013"
+ATTEMPT_ENDING_EVENTS = {EVICTED, TERMINATED, SHADOW_EXCEPTION, ABORTED, HELD}
+
+EVENT_HEADER_RE = re.compile(
+    r"^(\d{3}) \((\d+)\.(\d+)\.\d+\) "
+    r"(\d{4}-\d\d-\d\d[ T][\d:.]+(?:Z|[+-]\d\d:?\d\d)?|\d\d/\d\d \d\d:\d\d:\d\d) "
+    r"(.*)$"
+)
+DAG_NODE_RE = re.compile(r"DAG Node: (\S+)")
+RETURN_VALUE_RE = re.compile(r"\(return value (-?\d+)\)")
+SLOT_NAME_RE = re.compile(r"SlotName: (\S+)")
+HOST_RE = re.compile(r"host: <([^:>?]+)")
+# per-node log name: $(LOG_FNAME_NOEXT).$(DAG_NODE_NAME).$(clusterid).log
+NODE_FROM_FNAME_RE = re.compile(r"\.([^.]+)\.\d+\.log$")
+# in the DAG's VARS lines (see 'DAGBuilder.write_dag_file')
+TASKS_PER_JOB_RE = re.compile(r'\bTASKS_PER_JOB="(\d+)"')
+
+
+def parse_timestamp(stamp: str, year: int) -> float:
+    """Parse an event timestamp (ISO or legacy 'MM/DD HH:MM:SS') to epoch seconds."""
+    if "/" in stamp:  # legacy format has no year
+        return datetime.strptime(f"{year}/{stamp}", "%Y/%m/%d %H:%M:%S").timestamp()
+    return datetime.fromisoformat(stamp).timestamp()
+
+
+def iter_events(fpath: Path):
+    """Yield (code, job, timestamp-str, header-text, body-lines) for each event."""
+    header = None
+    body: list[str] = []
+    with open(fpath, errors="replace") as f:
+        for line in f:
+            if line.startswith("..."):
+                if header:
+                    yield (*header, body)
+                header, body = None, []
+            elif header is None:
+                if m := EVENT_HEADER_RE.match(line):
+                    header = (m[1], f"{m[2]}.{m[3]}", m[4], m[5])
+            else:
+                body.append(line)
+    # NOTE: a trailing, unterminated event (log still being written) is skipped
+
+
+def get_tasks_per_job(run_dir: Path) -> int | None:
+    """Get the DAG's TASKS_PER_JOB from its first VARS line (in a DAG file or a
+    splice, maybe gzipped) -- None if there's none.
+    """
+    for fpath in sorted([*run_dir.glob("*.dag"), *run_dir.glob("*.dag.gz")]):
+        with (gzip.open if fpath.suffix == ".gz" else open)(fpath, "rt") as f:
+            for line in f:
+                if line.startswith("VARS ") and (m := TASKS_PER_JOB_RE.search(line)):
+                    return int(m[1])
+    return None
+
+
+def parse_log_file(fpath: Path, year: int) -> list[dict[str, Any]]:
+    """Parse one job event log into a list of per-job records.
+
+    A log may hold one job (per-node logs) or many (a shared DAG-level log).
+    """
+    jobs: dict[str, dict[str, Any]] = {}
+    fname_node = m[1] if (m := NODE_FROM_FNAME_RE.search(fpath.name)) else None
+
+    for code, job_id, stamp, text, body in iter_events(fpath):
+        ts = parse_timestamp(stamp, year)
+        job = jobs.setdefault(
+            job_id,
+            {
+                "job": job_id,
+                "node": fname_node or job_id,
+                "submit": np.nan,
+                "attempts": [],  # (worker, queued, start, end, ok)
+                "n_evictions": 0,
+                "_open": None,  # (worker, queued, start)
+                "_queued": np.nan,
+            },
+        )
+
+        if code == SUBMIT:
+            job["submit"] = job["_queued"] = ts
+            for line in body:
+                if m := DAG_NODE_RE.search(line):
+                    job["node"] = m[1]
+        elif code == EXECUTE:
+            worker = m[1] if (m := HOST_RE.search(text)) else "unknown"
+            for line in body:
+                if m := SLOT_NAME_RE.search(line):
+                    worker = m[1]
+            job["_open"] = (worker, job["_queued"], ts)
+        elif code == RELEASED:
+            job["_queued"] = ts
+        elif code in ATTEMPT_ENDING_EVENTS:
+            ok = False
+            if code == TERMINATED:
+                for line in body:
+                    if m := RETURN_VALUE_RE.search(line):
+                        ok = m[1] == "0"
+            elif code == EVICTED:
+                job["n_evictions"] += 1
+            if job["_open"]:
+                job["attempts"].append((*job["_open"], ts, ok))
+                job["_open"] = None
+            job["_queued"] = ts
+
+    for job in jobs.values():
+        if job["_open"]:  # still executing
+            job["attempts"].append((*job["_open"], np.nan, False))
+        del job["_open"], job["_queued"]
+    return list(jobs.values())
+
+
+def _parse_log_file_for_pool(args: tuple[Path, int]) -> list[dict[str, Any]]:
+    return parse_log_file(*args)
+
+
+def parse_run_dir(
+    run_dir: Path,
+    glob: str,
+    year: int,
+    n_procs: int,
+    use_cache: bool = True,
+) -> list[dict[str, Any]]:
+    """Parse all the job event logs in the run dir, reusing cached parses of unchanged files."""
+    cache_fpath = run_dir / CACHE_FNAME
+    cache: dict[str, tuple[int, int, list[dict[str, Any]]]] = {}
+    if use_cache and cache_fpath.exists():
+        with open(cache_fpath, "rb") as f:
+            cache = pickle.load(f)
+
+    # figure which files are new/changed
+    to_parse = []
+    fresh_cache = {}
+    with os.scandir(run_dir) as it:
+        for entry in it:
+            if not Path(entry.name).match(glob) or not entry.is_file():
+                continue
+            if glob == DEFAULT_GLOB and entry.name.endswith(DAGMAN_OWN_LOG_SUFFIXES):
+                continue
+            st = entry.stat()
+            cached = cache.get(entry.name)
+            if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+                fresh_cache[entry.name] = cached
+            else:
+                to_parse.append((entry.name, st.st_size, st.st_mtime_ns))
+    LOGGER.info(
+        f"found {len(fresh_cache) + len(to_parse)} logs "
+        f"({len(fresh_cache)} cached, {len(to_parse)} to parse)"
+    )
+
+    # parse in parallel
+    with ProcessPoolExecutor(max_workers=n_procs) as pool:
+        results = pool.map(
+            _parse_log_file_for_pool,
+            [(run_dir / name, year) for name, _, _ in to_parse],
+            chunksize=256,
+        )
+        for (name, size, mtime_ns), jobs in zip(to_parse, results):
+            fresh_cache[name] = (size, mtime_ns, jobs)
+
+    if use_cache:
+        tmp = cache_fpath.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(fresh_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_fpath)
+
+    return [job for _, _, jobs in fresh_cache.values() for job in jobs]
+
+
+def analyze(jobs: list[dict[str, Any]], tasks_per_job: int = 1) -> tuple[
+    run_metrics.Attempts,
+    run_metrics.RunMetrics,
+    dict[str, Any],
+]:
+    """Reduce the per-job records to the attempts table, metrics, and classical-only extras.
+
+    Each node counts as 'tasks_per_job' tasks in the throughputs.
+    """
+    attempts = run_metrics.Attempts.from_rows(
+        [(job["node"], *att) for job in jobs for att in job["attempts"]]
+    )
+    submits = np.sort([job["submit"] for job in jobs if not np.isnan(job["submit"])])
+    metrics = run_metrics.compute_metrics(
+        "classical",
+        attempts,
+        t_first=float(submits[0]) if submits.size else None,
+        tasks_per_unit=tasks_per_job,
+    )
+
+    clusters_per_node: dict[str, int] = defaultdict(int)
+    for job in jobs:
+        clusters_per_node[job["node"]] += 1
+    submit_span = float(submits[-1] - submits[0]) if submits.size > 1 else 0.0
+    extras = {
+        "n_jobs": len(jobs),
+        "n_dag_retries": sum(n - 1 for n in clusters_per_node.values()),
+        "n_evictions": sum(job["n_evictions"] for job in jobs),
+        "submit_span": submit_span,
+        "submit_rate": len(submits) / submit_span if submit_span else None,
+    }
+    return attempts, metrics, extras
+
+
+def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="Analyze a classical DAG run from its HTCondor job event logs."
+    )
+    parser.add_argument(
+        "run_dir",
+        type=Path,
+        help="the classical DAG's directory (where its job event logs are written)",
+    )
+    parser.add_argument(
+        "--glob",
+        default=DEFAULT_GLOB,
+        help="filename pattern of the job event logs",
+    )
+    parser.add_argument(
+        "--tasks-per-job",
+        type=int,
+        default=None,
+        help="tasks per DAG node, for the throughputs in tasks "
+        "(default: TASKS_PER_JOB from the DAG file's VARS)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help=f"output NPZ file (default: <run_dir>/{OUTPUT_FNAME})",
+    )
+    parser.add_argument(
+        "--year",
+        type=int,
+        default=datetime.now().year,
+        help="year for legacy (year-less) event timestamps",
+    )
+    parser.add_argument(
+        "--n-procs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of log-parsing processes",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="re-parse every log, ignoring (and not writing) the cache",
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=None,
+        help="also add the results to this result store (see result_store.py)",
+    )
+    args = parser.parse_args()
+
+    jobs = parse_run_dir(
+        args.run_dir,
+        args.glob,
+        args.year,
+        args.n_procs,
+        use_cache=not args.no_cache,
+    )
+    if not jobs:
+        raise RuntimeError(f"no job events found in {args.run_dir}")
+    tasks_per_job = args.tasks_per_job or get_tasks_per_job(args.run_dir)
+    if tasks_per_job is None:
+        LOGGER.warning("no TASKS_PER_JOB found in the DAG file -- counting 1 per node")
+        tasks_per_job = 1
+    attempts, metrics, extras = analyze(jobs, tasks_per_job)
+
+    output = args.output or (args.run_dir / OUTPUT_FNAME)
+    run_metrics.save_npz(
+        output,
+        attempts,
+        metrics,
+        extra_metrics_json=np.asarray(json.dumps(extras)),
+    )
+    print(metrics.to_json())
+    print(json.dumps(extras, indent=4))
+    LOGGER.info(f"wrote {output}")
+
+    if args.store:
+        runs_dir = args.run_dir.resolve().parent
+        pair = result_store.find_pair(runs_dir, classical=args.run_dir.resolve().name)
+        with result_store.ResultStore(args.store) as store:
+            store.add(runs_dir, pair, result_store.CLASSICAL, output)
+
+
+if __name__ == "__main__":
+    main()
+    LOGGER.info("Done.")
@@ -0,0 +1,460 @@
+"""Analyze an EWMS run from its workers' (pilots') transferred stdout/stderr.
+
+Scans every worker's log in parallel, extracts per-task start/finish and
+output-message timestamps from the pilot's log lines, and outputs the run's
+metrics with the same schema as 'analyze_classical.py' (see 'run_metrics').
+
+Each task attempt is keyed by its event id(s) -- logged by the task as
+'[EVENT] id=<n>' lines, else parsed from the pilot's "Got a task" line -- so
+a redelivered event's attempts count as retries, like a DAG node's.
+
+With '--job-logs', the pilots' HTCondor job event logs are parsed too, for
+the pilots' HTChirp task counters (see the README's runtime table): the end
+time is then the last time a pilot's success counter went up.
+"""
+
+import argparse
+import json
+import logging
+import os
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+import analyze_classical
+import event_envelope
+import result_store
+import run_metrics
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+CACHE_FNAME = ".analyze_ewms.cache.pkl"
+CACHE_VERSION = 2  # bump when the parse changes
+OUTPUT_FNAME = "ewms_analysis.npz"
+
+# the pilot logs to stderr, which is transferred back per worker
+# (see 'do_transfer_worker_stdouterr' in 'EWMSRequestBuilder.write_request_json')
+DEFAULT_GLOB = "**/*.err"
+
+# pilot log lines look like:
+#   2024-05-01 12:34:56.789 [    INFO] ewms_pilot.pilot[123] Got a task to process (#1): ...
+LINE_TIMESTAMP_RE = re.compile(
+    r"^(?:\x1b\[[\d;]*m)*(\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d(?:[.,]\d+)?)"
+)
+TASK_START_RE = re.compile(r"Got a task to process \(#(\d+)\)")
+TASK_RETURN_CODE_RE = re.compile(r"task return code: (-?\d+)")
+TASK_TIMEOUT_MARKER = "[Timeout-Error]"
+OUTPUT_SENDING_RE = re.compile(r"TASK FINISHED -- attempting to send output-event")
+OUTPUT_SENT_RE = re.compile(r"Now, attempting to ack input-event message")
+# the input message, at the end of the "Got a task" line
+TASK_MESSAGE_RE = re.compile(r"Got a task to process \(#\d+\): (.*)$")
+# logged by the task for each of its events (see 'task.main')
+TASK_EVENT_ID_RE = re.compile(r"\[EVENT\] id=(\d+)")
+
+# the pilots' task counters, set w/ HTChirp -- in their job event logs as job
+# ad information (028) events' attribute lines (or in a generic/ulog event)
+CHIRP_SUCCESS_RE = re.compile(r"HTChirpEWMSPilotTasksSuccess\s*=\s*(\d+)")
+CHIRP_FAILED_RE = re.compile(r"HTChirpEWMSPilotTasksFailed\s*=\s*(\d+)")
+
+
+def parse_timestamp(stamp: str, utc_offset_hours: float) -> float:
+    """Parse a log-line timestamp (in the worker's local time) to epoch seconds."""
+    tz = timezone(timedelta(hours=utc_offset_hours))
+    return (
+        datetime.fromisoformat(stamp.replace(",", ".")).replace(tzinfo=tz).timestamp()
+    )
+
+
+def parse_event_ids(message: str) -> list[str]:
+    """Get the event ids in an input message (several, if batched)."""
+    ids = []
+    for part in message.strip().split(event_envelope.BATCH_SEP):
+        part = part.strip()
+        try:
+            if event_envelope.is_envelope(part):
+                ids.append(str(event_envelope.decode(part).seq))
+            else:
+                ids.append(str(int(part)))
+        except ValueError:
+            continue
+    return ids
+
+
+def parse_worker_file(
+    fpath: Path,
+    worker_id: str,
+    utc_offset_hours: float,
+    event_id_re: str | None,
+) -> dict[str, Any]:
+    """Parse one worker's log into its task attempts & output-message times.
+
+    The pilot runs one task at a time (n_cores=1), so task ends are matched to
+    task starts in order. A task is a unit per event (its ids: from
+    'event_id_re', else those the task logged, else those in the input
+    message), or, if it has no ids, a unit of its own ('<worker>#<n>').
+    """
+    id_re = re.compile(event_id_re) if event_id_re else None
+    attempts = []  # (unit, worker, queued, start, end, ok)
+    open_tasks: list[tuple[list[str], float, list[str]]] = []  # (units, start, logged)
+    output_times = []
+    first_ts = last_ts = np.nan
+    is_sending = False
+
+    with open(fpath, errors="replace") as f:
+        for line in f:
+            if not (m := LINE_TIMESTAMP_RE.match(line)):
+                continue
+            ts = parse_timestamp(m[1], utc_offset_hours)
+            if np.isnan(first_ts):
+                first_ts = ts
+            last_ts = ts
+
+            if m := TASK_START_RE.search(line):
+                if id_re:
+                    units = [m_id[1]] if (m_id := id_re.search(line)) else []
+                elif m_msg := TASK_MESSAGE_RE.search(line):
+                    units = parse_event_ids(m_msg[1])
+                else:
+                    units = []
+                open_tasks.append((units or [f"{worker_id}#{m[1]}"], ts, []))
+            elif not id_re and (m := TASK_EVENT_ID_RE.search(line)) and open_tasks:
+                open_tasks[-1][2].append(m[1])
+            elif (m := TASK_RETURN_CODE_RE.search(line)) or TASK_TIMEOUT_MARKER in line:
+                if open_tasks:
+                    units, start, logged = open_tasks.pop(0)
+                    ok = bool(m) and m[1] == "0"
+                    for unit in logged or units:
+                        attempts.append((unit, worker_id, np.nan, start, ts, ok))
+            elif OUTPUT_SENDING_RE.search(line):
+                is_sending = True
+            elif is_sending and OUTPUT_SENT_RE.search(line):
+                output_times.append(ts)
+                is_sending = False
+
+    # still running at end of log
+    for units, start, logged in open_tasks:
+        for unit in logged or units:
+            attempts.append((unit, worker_id, np.nan, start, np.nan, False))
+
+    return {
+        "worker": worker_id,
+        "attempts": attempts,
+        "output_times": output_times,
+        "first_ts": first_ts,
+        "last_ts": last_ts,
+    }
+
+
+def _parse_worker_file_for_pool(args: tuple) -> dict[str, Any]:
+    return parse_worker_file(*args)
+
+
+def parse_workers_dir(
+    workers_dir: Path,
+    glob: str,
+    utc_offset_hours: float,
+    event_id_re: str | None,
+    n_procs: int,
+    use_cache: bool = True,
+) -> list[dict[str, Any]]:
+    """Parse every worker log in the directory, in parallel, reusing cached parses
+    of unchanged files (parsed w/ the same options).
+    """
+    cache_fpath = workers_dir / CACHE_FNAME
+    options = (CACHE_VERSION, utc_offset_hours, event_id_re)
+    cache: dict[str, tuple[int, int, dict[str, Any]]] = {}
+    if use_cache and cache_fpath.exists():
+        with open(cache_fpath, "rb") as f:
+            cached_options, cache = pickle.load(f)
+        if cached_options != options:
+            cache = {}
+
+    # figure which files are new/changed
+    to_parse = []
+    fresh_cache = {}
+    for p in sorted(workers_dir.glob(glob)):
+        if not p.is_file():
+            continue
+        name = str(p.relative_to(workers_dir))
+        st = p.stat()
+        cached = cache.get(name)
+        if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+            fresh_cache[name] = cached
+        else:
+            to_parse.append((name, st.st_size, st.st_mtime_ns))
+    LOGGER.info(
+        f"found {len(fresh_cache) + len(to_parse)} worker logs "
+        f"({len(fresh_cache)} cached, {len(to_parse)} to parse)"
+    )
+
+    # parse in parallel
+    with ProcessPoolExecutor(max_workers=n_procs) as pool:
+        results = pool.map(
+            _parse_worker_file_for_pool,
+            [
+                (
+                    workers_dir / name,
+                    str(Path(name).with_suffix("")),
+                    utc_offset_hours,
+                    event_id_re,
+                )
+                for name, _, _ in to_parse
+            ],
+            chunksize=16,
+        )
+        for (name, size, mtime_ns), worker in zip(to_parse, results):
+            fresh_cache[name] = (size, mtime_ns, worker)
+
+    if use_cache:
+        tmp = cache_fpath.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((options, fresh_cache), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_fpath)
+
+    return [fresh_cache[name][2] for name in sorted(fresh_cache)]
+
+
+def parse_pilot_job_log(fpath: Path, year: int) -> dict[str, Any]:
+    """Parse one pilot job event log (one or many pilots) for the pilots' HTChirp
+    task counters -- each success-counter increase is that many successful
+    tasks (outputs sent) by then.
+    """
+    success_times: list[float] = []
+    n_success: dict[str, int] = {}  # by job
+    n_failed: dict[str, int] = {}
+    for _, job_id, stamp, text, body in analyze_classical.iter_events(fpath):
+        for line in [text, *body]:
+            if m := CHIRP_SUCCESS_RE.search(line):
+                n = int(m[1])
+                if n > n_success.get(job_id, 0):
+                    ts = analyze_classical.parse_timestamp(stamp, year)
+                    success_times += [ts] * (n - n_success.get(job_id, 0))
+                    n_success[job_id] = n
+            if m := CHIRP_FAILED_RE.search(line):
+                n_failed[job_id] = max(n_failed.get(job_id, 0), int(m[1]))
+    return {
+        "success_times": success_times,
+        "n_success": sum(n_success.values()),
+        "n_failed": sum(n_failed.values()),
+        "n_pilots": len(n_success.keys() | n_failed.keys()),
+    }
+
+
+def parse_pilot_job_logs(job_logs_dir: Path, glob: str, year: int) -> dict[str, Any]:
+    """Parse every pilot job event log in the directory (see 'parse_pilot_job_log')."""
+    chirp: dict[str, Any] = {
+        "success_times": [],
+        "n_success": 0,
+        "n_failed": 0,
+        "n_pilots": 0,
+    }
+    fpaths = sorted(p for p in job_logs_dir.glob(glob) if p.is_file())
+    for fpath in fpaths:
+        for k, v in parse_pilot_job_log(fpath, year).items():
+            chirp[k] += v
+    LOGGER.info(f"found {len(fpaths)} pilot job logs ({chirp['n_pilots']} w/ HTChirp)")
+    return chirp
+
+
+def analyze(
+    workers: list[dict[str, Any]],
+    request_time: float | None,
+    activated_time: float | None = None,
+    chirp: dict[str, Any] | None = None,
+) -> tuple[run_metrics.Attempts, run_metrics.RunMetrics, dict[str, Any]]:
+    """Reduce the per-worker records to the attempts table, metrics, and EWMS-only extras.
+
+    With the queues' 'activated_time', the activation latency (request until
+    activated) is reported on its own, along with the makespan after it.
+
+    With the pilots' HTChirp counters ('chirp', see 'parse_pilot_job_logs'),
+    the end time is their last success -- else, the last output-message sent.
+    """
+    attempts = run_metrics.Attempts.from_rows(
+        [att for w in workers for att in w["attempts"]]
+    )
+    output_times = np.sort([t for w in workers for t in w["output_times"]])
+    chirp_times = np.sort(chirp["success_times"]) if chirp else np.empty(0)
+
+    # README: EWMS runtime is from the request time until the last output-message sent
+    if chirp_times.size:
+        t_last, end_source = float(chirp_times[-1]), "chirp"
+    elif output_times.size:
+        t_last, end_source = float(output_times[-1]), "pilot_log"
+    else:
+        t_last, end_source = None, "last_task_end"
+    metrics = run_metrics.compute_metrics(
+        "ewms",
+        attempts,
+        t_first=request_time,
+        t_last=t_last,
+    )
+
+    # pilot startup: first log line until first task start, per worker
+    startups = []
+    for w in workers:
+        if starts := [att[3] for att in w["attempts"]]:
+            startups.append(min(starts) - w["first_ts"])
+    extras = {
+        "n_output_messages": int(output_times.size),
+        "first_output_time": float(output_times[0]) if output_times.size else None,
+        "last_output_time": float(output_times[-1]) if output_times.size else None,
+        "n_workers_without_tasks": sum(1 for w in workers if not w["attempts"]),
+        "pilot_startup_p50": float(np.median(startups)) if startups else None,
+        "pilot_startup_max": float(np.max(startups)) if startups else None,
+        "activation_latency": (
+            activated_time - request_time
+            if activated_time is not None and request_time is not None
+            else None
+        ),
+        "makespan_after_activation": (
+            metrics.t_last - activated_time if activated_time is not None else None
+        ),
+        "end_time_source": end_source,
+        "chirp_n_success": chirp["n_success"] if chirp else None,
+        "chirp_n_failed": chirp["n_failed"] if chirp else None,
+        "chirp_last_success_time": (
+            float(chirp_times[-1]) if chirp_times.size else None
+        ),
+    }
+    return attempts, metrics, extras
+
+
+def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="Analyze an EWMS run from its workers' transferred stdout/stderr."
+    )
+    parser.add_argument(
+        "workers_dir",
+        type=Path,
+        help="the directory containing the workers' transferred stdout/stderr files",
+    )
+    parser.add_argument(
+        "--glob",
+        default=DEFAULT_GLOB,
+        help="filename pattern (relative to workers_dir) of the worker logs",
+    )
+    parser.add_argument(
+        "--request-time",
+        type=float,
+        default=None,
+        help="the workflow's request time (epoch seconds, from the EWMS DB) "
+        "-- default: the first task start",
+    )
+    parser.add_argument(
+        "--activation-record",
+        type=Path,
+        default=None,
+        help="the JSON file from 'ewms_external.py --activation-record' "
+        "-- reports the queue-activation latency separately "
+        "(and supplies the request time, if --request-time isn't given)",
+    )
+    parser.add_argument(
+        "--utc-offset-hours",
+        type=float,
+        default=0.0,
+        help="the UTC offset of the workers' log timestamps",
+    )
+    parser.add_argument(
+        "--event-id-regex",
+        default=None,
+        help="regex (w/ one group) to extract the event id from the pilot's "
+        "'Got a task' line -- default: the ids the task logged, else the ids "
+        "in the input message",
+    )
+    parser.add_argument(
+        "--job-logs",
+        type=Path,
+        default=None,
+        help="the directory of the pilots' HTCondor job event logs -- for the "
+        "end time from their HTChirp task counters",
+    )
+    parser.add_argument(
+        "--job-logs-glob",
+        default=analyze_classical.DEFAULT_GLOB,
+        help="filename pattern (relative to --job-logs) of the pilots' job event logs",
+    )
+    parser.add_argument(
+        "--year",
+        type=int,
+        default=datetime.now().year,
+        help="year for legacy (year-less) job event timestamps",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help=f"output NPZ file (default: <workers_dir>/{OUTPUT_FNAME})",
+    )
+    parser.add_argument(
+        "--n-procs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of log-parsing processes",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="re-parse every log, ignoring (and not writing) the cache",
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=None,
+        help="also add the results to this result store (see result_store.py) "
+        "-- the workers_dir must be the pair's own dir, '<runs_dir>/pair_<pair_id>'",
+    )
+    args = parser.parse_args()
+
+    workers = parse_workers_dir(
+        args.workers_dir,
+        args.glob,
+        args.utc_offset_hours,
+        args.event_id_regex,
+        args.n_procs,
+        use_cache=not args.no_cache,
+    )
+    if not any(w["attempts"] for w in workers):
+        raise RuntimeError(f"no tasks found in {args.workers_dir}")
+    request_time, activated_time = args.request_time, None
+    if args.activation_record:
+        with open(args.activation_record) as f:
+            activation = json.load(f)
+        activated_time = activation["t_activated"]
+        if request_time is None:
+            request_time = activation["request_time"]
+    chirp = (
+        parse_pilot_job_logs(args.job_logs, args.job_logs_glob, args.year)
+        if args.job_logs
+        else None
+    )
+    attempts, metrics, extras = analyze(workers, request_time, activated_time, chirp)
+
+    output = args.output or (args.workers_dir / OUTPUT_FNAME)
+    run_metrics.save_npz(
+        output,
+        attempts,
+        metrics,
+        extra_metrics_json=np.asarray(json.dumps(extras)),
+    )
+    print(metrics.to_json())
+    print(json.dumps(extras, indent=4))
+    LOGGER.info(f"wrote {output}")
+
+    if args.store:
+        runs_dir, pair_id = result_store.parse_pair_dir(args.workers_dir)
+        pair = result_store.find_pair(runs_dir, pair_id=pair_id)
+        with result_store.ResultStore(args.store) as store:
+            store.add(runs_dir, pair, result_store.EWMS, output)
+
+
+if __name__ == "__main__":
+    main()
+    LOGGER.info("Done.")
@@ -1,37 +1,212 @@
 """A classical condor job that runs simulated tasks sequentially."""
 
+import contextlib
 import os
+import re
 import subprocess
 import sys
+import time
 from pathlib import Path
 
+# TASK_LAUNCH_MODE values
+SUBPROCESS = "subprocess"  # a new python process per task (like an ewms task)
+INPROCESS = "inprocess"  # import task.py once, call 'task.main()' in a loop
+
+# CLASSICAL_LOG_MODE values (see 'DAGBuilder.write_submit_file')
+VERBOSE = "verbose"  # the job's & its tasks' full output
+COMPACT = "compact"  # one '[TASK]' line per task (& the DAG shares one event log)
+COMPACT_FAILURES = "compact-failures"  # ...& only a failed job's stdout/err are kept
+# compact-failures: the job's own stdout & stderr (see 'transfer_output_remaps')
+OWN_OUTPUT_FNAMES = ("job.out", "job.err")
+# compact-failures: the '[TASK]' lines -- kept & transferred back, even on success
+TASKS_FNAME = "tasks.log"
+
+TRUTHY = ("1", "true", "t", "yes", "y")
+
+
+class TaskFailed(Exception):
+    """Raised when a task fails."""
+
+
+def get_first_task_index(n_tasks: int) -> int | None:
+    """Get the index of this job's first task -- for seeded runs (see 'task.py').
+
+    The DAG's nodes are numbered from 1 ('J0001', or 'S1+J0001' when spliced),
+    each w/ 'n_tasks' tasks, so the indexes line up w/ EWMS's event ids (from 0).
+    """
+    if not (m := re.search(r"(\d+)$", os.getenv("DAG_NODE_NAME", ""))):
+        return None
+    return (int(m[1]) - 1) * n_tasks
+
+
+def redirect_output() -> None:
+    """Send this process's (& its tasks') stdout/err to our own files -- condor
+    transfers them back, unless they're deleted (see 'discard_output()').
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for fd, fname in zip((1, 2), OWN_OUTPUT_FNAMES):
+        f = os.open(fname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(f, fd)
+        os.close(f)
+
+
+def discard_output() -> None:
+    """Delete our own stdout/err files -- so a successful job leaves none."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for fname in OWN_OUTPUT_FNAMES:
+        Path(fname).unlink(missing_ok=True)
+
+
+def load_checkpoint(fpath: Path) -> set[int]:
+    """Get the tasks (0-based, within the job) completed by previous attempts."""
+    if not fpath.exists():
+        return set()
+    return {int(line) for line in fpath.read_text().split()}
+
+
+def run_task_subprocess(timing_file: Path, task_index: int | None) -> float | None:
+    """Run one task in a subprocess -- returns its work duration, if reported."""
+    timing_file.unlink(missing_ok=True)
+    index_env = {} if task_index is None else {"TASK_INDEX": str(task_index)}
+    try:
+        subprocess.run(
+            "python /app/task.py".split(),  # no args
+            env={
+                **os.environ,
+                "TASK_RUNTIME": os.environ["TASK_RUNTIME"],
+                "FAIL_PROB": os.environ["FAIL_PROB"],
+                "DO_TASK_RUNTIME_POISSON": os.environ["DO_TASK_RUNTIME_POISSON"],
+                "WORKER_SPEED_FACTOR": os.environ["WORKER_SPEED_FACTOR"],
+                "TASK_TIMING_FILE": str(timing_file),
+                **index_env,
+            },
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        raise TaskFailed(f"exited with {e.returncode}") from e
+    try:
+        return float(timing_file.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def run_task_inprocess(task_module, task_kwargs: dict) -> float:
+    """Run one task in this process -- returns its work duration."""
+    try:
+        return task_module.main(**task_kwargs)
+    except SystemExit as e:  # the task's simulated failure
+        if e.code:
+            raise TaskFailed(f"exited with {e.code}") from e
+        raise TaskFailed("exited early") from e
+    except Exception as e:
+        raise TaskFailed(repr(e)) from e
+
 
 def main():
-    """Sequentially spawn tasks in subprocesses."""
+    """Sequentially run tasks, each in a subprocess (default) or in this process.
+
+    With CLASSICAL_CHECKPOINT, each completed task is appended to the node's
+    checkpoint file ('CKPT_FNAME', transferred back on exit/evict), and the
+    tasks already in it are skipped -- so a retried node resumes where it failed.
+
+    With a compact CLASSICAL_LOG_MODE, each task is one '[TASK]' line (its
+    tasks only log warnings), and w/ 'compact-failures', a successful job's
+    stdout/err are discarded -- its '[TASK]' lines go to their own file
+    ('TASKS_FNAME') instead, which is always kept.
+    """
     n_tasks = int(os.environ["TASKS_PER_JOB"])
+    mode = os.getenv("TASK_LAUNCH_MODE", SUBPROCESS).lower()
+
+    log_mode = os.getenv("CLASSICAL_LOG_MODE", VERBOSE).lower()
+    if log_mode not in (VERBOSE, COMPACT, COMPACT_FAILURES):
+        raise ValueError(f"unknown CLASSICAL_LOG_MODE: {log_mode}")
+    # (closed on any exit, incl. a failed task's)
+    with contextlib.ExitStack() as stack:
+        task_records = sys.stdout
+        if log_mode == COMPACT_FAILURES:
+            redirect_output()
+            # line-buffered, so it's complete if the job's evicted/killed
+            task_records = stack.enter_context(open(TASKS_FNAME, "w", buffering=1))
+        if log_mode != VERBOSE:
+            os.environ["TASK_LOG_LEVEL"] = "WARNING"  # (before 'import task', too)
+
+        common_dir = os.path.abspath("./commondir")
+        Path(common_dir).mkdir(exist_ok=True)
+        timing_file = Path(common_dir) / "task-timing.txt"
+        first_index = get_first_task_index(n_tasks)
+
+        checkpoint = None
+        completed: set[int] = set()
+        if os.getenv("CLASSICAL_CHECKPOINT", "false").lower() in TRUTHY:
+            checkpoint = Path(os.environ["CKPT_FNAME"])
+            completed = load_checkpoint(checkpoint)
+            checkpoint.touch()  # so it's transferred back, even if no task completes
+            print(f"[CHECKPOINT] {len(completed)}/{n_tasks} tasks already completed")
+
+        if mode == INPROCESS:
+            t0 = time.monotonic()
+            import task  # once, for all tasks
+
+            task_kwargs = task.get_main_kwargs_from_env()
+            print(f"[TIMING] task module import: {time.monotonic() - t0:.3f}s")
+        elif mode != SUBPROCESS:
+            raise ValueError(f"unknown TASK_LAUNCH_MODE: {mode}")
+
+        total_overhead = 0.0
+        for i in range(n_tasks):
+            if i in completed:
+                continue
+            if log_mode == VERBOSE:
+                print(f"\n--- Launching task {i + 1}/{n_tasks} ({mode}) ---")
+            start = time.time()
+            t0 = time.monotonic()
+            task_index = None if first_index is None else first_index + i
+            try:
+                if mode == INPROCESS:
+                    work = run_task_inprocess(
+                        task, {**task_kwargs, "task_index": task_index}
+                    )
+                else:
+                    work = run_task_subprocess(timing_file, task_index)
+            except TaskFailed as e:
+                print(f"[FAIL] Task {i + 1} {e}", file=sys.stderr)
+                sys.exit(1)
+            wall = time.monotonic() - t0
+            if checkpoint:
+                with open(checkpoint, "a") as f:
+                    f.write(f"{i}\n")
+
+            # per-task launcher overhead: everything that isn't the simulated work
+            if log_mode != VERBOSE:
+                print(
+                    f"[TASK] n={i + 1} index={task_index} start={start:.3f} "
+                    f"wall={wall:.3f} work={'nan' if work is None else f'{work:.3f}'}",
+                    file=task_records,
+                )
+                if work is not None:
+                    total_overhead += wall - work
+            elif work is None:
+                print(f"[TIMING] task {i + 1}: wall={wall:.3f}s")
+            else:
+                total_overhead += wall - work
+                print(
+                    f"[TIMING] task {i + 1}: wall={wall:.3f}s "
+                    f"work={work:.3f}s overhead={wall - work:.3f}s"
+                )
 
-    common_dir = os.path.abspath("./commondir")
-    Path(common_dir).mkdir(exist_ok=True)
-
-    for i in range(n_tasks):
-        print(f"\n--- Launching task {i + 1}/{n_tasks} ---")
-        try:
-            subprocess.run(
-                "python /app/task.py".split(),  # no args
-                env={
-                    **os.environ,
-                    "TASK_RUNTIME": os.environ["TASK_RUNTIME"],
-                    "FAIL_PROB": os.environ["FAIL_PROB"],
-                    "DO_TASK_RUNTIME_POISSON": os.environ["DO_TASK_RUNTIME_POISSON"],
-                    "WORKER_SPEED_FACTOR": os.environ["WORKER_SPEED_FACTOR"],
-                },
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"[FAIL] Task {i + 1} exited with {e.returncode}", file=sys.stderr)
-            sys.exit(1)
-
-    print(f"\n[SUMMARY] All {n_tasks} tasks succeeded.")
+        n_run = n_tasks - len(completed)
+        print(
+            f"\n[SUMMARY] All {n_tasks} tasks succeeded "
+            f"({len(completed)} in previous attempts)."
+        )
+        print(
+            f"[SUMMARY] launcher overhead ({mode}): total={total_overhead:.3f}s "
+            f"mean={total_overhead / max(n_run, 1):.3f}s/task"
+        )
+        if log_mode == COMPACT_FAILURES:
+            discard_output()
 
 
 if __name__ == "__main__":
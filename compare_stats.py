@@ -0,0 +1,279 @@
+"""Compare EWMS vs. classical across repeated runs, w/ bootstrap confidence intervals.
+
+A single side-by-side run on a shared pool is noisy -- so, this groups the
+stored pairs (see 'result_store.py') by their test vars, across 'runs_*' dirs
+& campaigns (each pair is a repetition), and bootstraps (resampling the
+pairs, vectorized) a confidence interval for each statistic:
+
+- makespan_ratio: EWMS/classical ratio of the mean makespans
+- throughput_{classical,ewms}: mean successful tasks per second
+- queue_wait_p99_{classical,ewms}: mean 99th-percentile queue wait (the tail latency)
+
+It also recommends how many more repetitions would narrow each interval to
+'--precision' (its half-width as a fraction of the estimate), assuming the
+half-width shrinks w/ 1/sqrt(n):
+
+    python compare_stats.py results.sqlite --by TASK_RUNTIME --plot-dir plots/
+"""
+
+import argparse
+import json
+import logging
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from result_store import ResultStore, _sort_key
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_N_BOOT = 10_000
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_PRECISION = 0.05
+
+# test vars that differ between repetitions (not configurations)
+REPETITION_VARS = ("RUN_SEED",)
+
+# statistic name -> (classical metric values, EWMS metric values) per bootstrap
+# sample (rows) -> the statistic per sample
+Statistic = Callable[[np.ndarray, np.ndarray], np.ndarray]
+STATISTICS: dict[str, tuple[str, Statistic]] = {
+    "makespan_ratio": ("makespan", lambda c, e: e.mean(axis=-1) / c.mean(axis=-1)),
+    "throughput_classical": ("throughput", lambda c, e: c.mean(axis=-1)),
+    "throughput_ewms": ("throughput", lambda c, e: e.mean(axis=-1)),
+    "queue_wait_p99_classical": ("queue_wait_p99", lambda c, e: c.mean(axis=-1)),
+    "queue_wait_p99_ewms": ("queue_wait_p99", lambda c, e: e.mean(axis=-1)),
+}
+
+
+@dataclass
+class Estimate:
+    """A statistic's estimate & bootstrap confidence interval over a group's pairs."""
+
+    group: dict[str, Any]  # the test vars' values
+    statistic: str
+    n: int  # repetitions (pairs)
+    estimate: float
+    ci_low: float
+    ci_high: float
+    more_reps: int | None  # to reach the target precision (None if can't tell)
+
+    @property
+    def rel_half_width(self) -> float:
+        """The CI's half-width as a fraction of the estimate."""
+        if not self.estimate:
+            return math.nan
+        return (self.ci_high - self.ci_low) / 2 / abs(self.estimate)
+
+
+def bootstrap(
+    classical: np.ndarray,
+    ewms: np.ndarray,
+    statistic: Statistic,
+    n_boot: int,
+    confidence: float,
+    rng: np.random.Generator,
+) -> tuple[float, float, float]:
+    """Get the statistic's estimate & percentile-bootstrap CI, resampling the pairs
+    (so each pair's classical & EWMS values stay together).
+    """
+    estimate = float(statistic(classical, ewms))
+    if len(classical) < 2:
+        return estimate, math.nan, math.nan
+    idx = rng.integers(0, len(classical), size=(n_boot, len(classical)))
+    samples = statistic(classical[idx], ewms[idx])  # all resamples at once
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(samples, [alpha, 1 - alpha])
+    return estimate, float(low), float(high)
+
+
+def more_reps_needed(n: int, rel_half_width: float, precision: float) -> int | None:
+    """Estimate the repetitions still needed for the CI's relative half-width to
+    reach 'precision' (assuming it shrinks w/ 1/sqrt(n)).
+    """
+    if n < 2 or math.isnan(rel_half_width):
+        return None
+    if rel_half_width <= precision:
+        return 0
+    return math.ceil(n * (rel_half_width / precision) ** 2) - n
+
+
+def group_pairs(
+    store: ResultStore,
+    by: list[str] | None,
+) -> dict[str, tuple[dict[str, Any], list[tuple[dict, dict]]]]:
+    """Group the stored pairs' (classical, EWMS) metrics by the 'by' test vars (or
+    by all of them, except the 'REPETITION_VARS') -- keyed by the group's values as JSON.
+    """
+    groups: dict[str, tuple[dict[str, Any], list[tuple[dict, dict]]]] = {}
+    for _, _, test_vars, classical, ewms in store.iter_pairs():
+        if by:
+            group = {k: test_vars.get(k) for k in by}
+        else:
+            group = {k: v for k, v in test_vars.items() if k not in REPETITION_VARS}
+        key = json.dumps(group, sort_keys=True)
+        groups.setdefault(key, (group, []))[1].append((classical, ewms))
+    return groups
+
+
+def compare(
+    store: ResultStore,
+    by: list[str] | None,
+    n_boot: int = DEFAULT_N_BOOT,
+    confidence: float = DEFAULT_CONFIDENCE,
+    precision: float = DEFAULT_PRECISION,
+    seed: int | None = None,
+) -> list[Estimate]:
+    """Estimate every statistic for every group."""
+    rng = np.random.default_rng(seed)
+    estimates = []
+    for group, pairs in group_pairs(store, by).values():
+        for name, (metric, statistic) in STATISTICS.items():
+            values = np.array(
+                [(c.get(metric), e.get(metric)) for c, e in pairs], dtype=np.float64
+            )  # (NaN metrics are stored as nulls -> NaN)
+            values = values[~np.isnan(values).any(axis=1)]
+            if not len(values):
+                continue
+            estimate, low, high = bootstrap(
+                values[:, 0], values[:, 1], statistic, n_boot, confidence, rng
+            )
+            est = Estimate(group, name, len(values), estimate, low, high, None)
+            est.more_reps = more_reps_needed(est.n, est.rel_half_width, precision)
+            estimates.append(est)
+    return estimates
+
+
+def format_table(estimates: list[Estimate]) -> str:
+    """Format the estimates as a compact text table."""
+    rows = [("group", "statistic", "n", "estimate", "CI", "±%", "more reps")]
+    for est in estimates:
+        rows.append(
+            (
+                " ".join(f"{k}={v}" for k, v in est.group.items()),
+                est.statistic,
+                str(est.n),
+                f"{est.estimate:.4g}",
+                f"[{est.ci_low:.4g}, {est.ci_high:.4g}]",
+                f"{100 * est.rel_half_width:.1f}",
+                "?" if est.more_reps is None else str(est.more_reps),
+            )
+        )
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in rows
+    )
+
+
+def plot_scaling(estimates: list[Estimate], by: list[str], plot_dir: Path) -> None:
+    """Plot each statistic vs. the first 'by' test var (a line per combination of
+    the others), w/ the CIs as error bars.
+    """
+    import matplotlib  # optional dependency
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plot_dir.mkdir(parents=True, exist_ok=True)
+    x_var, others = by[0], by[1:]
+    for name in STATISTICS:
+        lines: dict[str, list[Estimate]] = {}
+        for est in estimates:
+            if est.statistic == name:
+                label = " ".join(f"{k}={est.group[k]}" for k in others) or name
+                lines.setdefault(label, []).append(est)
+        if not lines:
+            continue
+
+        fig, ax = plt.subplots()
+        for label, ests in lines.items():
+            ests.sort(key=lambda e: _sort_key((e.group[x_var], None)))
+            x = [e.group[x_var] for e in ests]
+            y = np.array([e.estimate for e in ests])
+            yerr = np.abs(np.array([[e.ci_low, e.ci_high] for e in ests]).T - y)
+            ax.errorbar(x, y, yerr=yerr, marker="o", capsize=3, label=label)
+        if name == "makespan_ratio":
+            ax.axhline(1, color="gray", linestyle="--", linewidth=1)
+        ax.set_xlabel(x_var)
+        ax.set_ylabel(name)
+        if len(lines) > 1:
+            ax.legend()
+        fig.savefig(plot_dir / f"{name}.png", bbox_inches="tight")
+        plt.close(fig)
+        LOGGER.info(f"wrote {plot_dir / f'{name}.png'}")
+
+
+def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="Compare EWMS vs. classical across repeated runs, "
+        "w/ bootstrap confidence intervals.",
+    )
+    parser.add_argument("db", type=Path, help="the result store's SQLite file")
+    parser.add_argument(
+        "--by",
+        nargs="+",
+        default=None,
+        help="group the pairs by these TestVars fields (default: all but RUN_SEED) "
+        "-- the first is the x-axis of the plots",
+    )
+    parser.add_argument(
+        "--n-boot",
+        type=int,
+        default=DEFAULT_N_BOOT,
+        help="bootstrap resamples",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=DEFAULT_CONFIDENCE,
+        help="the CIs' confidence level",
+    )
+    parser.add_argument(
+        "--precision",
+        type=float,
+        default=DEFAULT_PRECISION,
+        help="the target CI half-width, as a fraction of the estimate "
+        "-- for the recommended repetitions",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="the bootstrap's seed")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="also write the estimates to this JSON file",
+    )
+    parser.add_argument(
+        "--plot-dir",
+        type=Path,
+        default=None,
+        help="write the scaling-curve plots here (requires --by & matplotlib)",
+    )
+    args = parser.parse_args()
+    if args.plot_dir and not args.by:
+        parser.error("--plot-dir requires --by")
+
+    with ResultStore(args.db) as store:
+        estimates = compare(
+            store, args.by, args.n_boot, args.confidence, args.precision, args.seed
+        )
+    if not estimates:
+        LOGGER.warning("no pairs w/ both systems stored")
+        return
+
+    print(format_table(estimates))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([asdict(e) for e in estimates], f, indent=4)
+        LOGGER.info(f"wrote {args.output}")
+    if args.plot_dir:
+        plot_scaling(estimates, args.by, args.plot_dir)
+
+
+if __name__ == "__main__":
+    main()
+    LOGGER.info("Done.")
@@ -0,0 +1,90 @@
+"""A compact event envelope for end-to-end latency tracing.
+
+An enveloped event is a short '|'-delimited string (no JSON, so it stays cheap
+for the pilot), first written by the publisher, then extended by the task:
+
+    e1|<seq>|<send_ts>|<run_id>                                   (publisher)
+    e1|<seq>|<send_ts>|<run_id>|<start_ts>|<end_ts>|<worker>[|...] (task output)
+
+where the task's further fields are 'key=value' (e.g. 'startup_s=0.412').
+
+Several envelopes may be batched in one message, joined by ','.
+
+This module is stdlib-only, since it is also imported by the task.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+
+VERSION_TAG = "e1"
+SEP = "|"
+BATCH_SEP = ","
+_FORBIDDEN = (SEP, BATCH_SEP)
+
+
+@dataclass
+class Envelope:
+    """A decoded envelope."""
+
+    seq: int
+    send_ts: float
+    run_id: str
+    task_start_ts: float = math.nan
+    task_end_ts: float = math.nan
+    worker: str = ""
+    extra: list[str] = field(default_factory=list)  # any further task-added fields
+
+    def extra_float(self, key: str) -> float:
+        """Get a 'key=value' extra field as a float (NaN if missing)."""
+        for x in self.extra:
+            k, _, v = x.partition("=")
+            if k == key:
+                return float(v)
+        return math.nan
+
+
+def _clean(value: str) -> str:
+    for c in _FORBIDDEN:
+        value = value.replace(c, "_")
+    return value
+
+
+def is_envelope(part: str) -> bool:
+    """Is this (one part of a) message body an envelope?"""
+    return part.startswith(VERSION_TAG + SEP)
+
+
+def encode(seq: int, run_id: str, send_ts: float | None = None) -> str:
+    """Make the publisher's envelope for event 'seq'."""
+    if send_ts is None:
+        send_ts = time.time()
+    return SEP.join([VERSION_TAG, str(seq), f"{send_ts:.6f}", _clean(run_id)])
+
+
+def append_task_fields(
+    part: str,
+    start_ts: float,
+    end_ts: float,
+    worker: str,
+    *extra: str,
+) -> str:
+    """Extend an envelope with the task's timestamps and worker identity."""
+    return SEP.join(
+        [part, f"{start_ts:.6f}", f"{end_ts:.6f}", _clean(worker)]
+        + [_clean(x) for x in extra]
+    )
+
+
+def decode(part: str) -> Envelope:
+    """Decode one envelope -- raises 'ValueError' if it is not one."""
+    if not is_envelope(part):
+        raise ValueError(f"not an envelope: {part!r}")
+    fields_ = part.strip().split(SEP)
+    env = Envelope(seq=int(fields_[1]), send_ts=float(fields_[2]), run_id=fields_[3])
+    if len(fields_) >= 7:
+        env.task_start_ts = float(fields_[4])
+        env.task_end_ts = float(fields_[5])
+        env.worker = fields_[6]
+        env.extra = fields_[7:]
+    return env
@@ -0,0 +1,92 @@
+"""Append-only binary records of per-event timestamps.
+
+Each record is fixed-width -- an (event id, epoch timestamp) pair, or a full
+trace from an 'event_envelope' -- so files can be appended to in batches while
+a run is going, and read back as a numpy array.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+RECORD_DTYPE = np.dtype([("event_id", "<i8"), ("ts", "<f8")])
+TRACE_DTYPE = np.dtype(
+    [
+        ("event_id", "<i8"),
+        ("send_ts", "<f8"),
+        ("task_start_ts", "<f8"),
+        ("task_end_ts", "<f8"),
+        ("recv_ts", "<f8"),
+        ("worker", "S64"),
+        ("task_startup_s", "<f8"),
+    ]
+)
+DEFAULT_BATCH_SIZE = 10_000
+
+
+class RecordWriter:
+    """Buffer records in memory and append them to the file in batches."""
+
+    def __init__(
+        self,
+        fpath: Path,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        dtype: np.dtype = RECORD_DTYPE,
+    ) -> None:
+        self.fpath = fpath
+        self.batch_size = batch_size
+        self._buf = np.empty(batch_size, dtype=dtype)
+        self._n = 0
+        self.n_written = 0
+
+    def add(self, *values: object) -> None:
+        """Add a record (values ordered like the dtype's fields), appending to
+        the file when the batch is full.
+        """
+        self._buf[self._n] = values
+        self._n += 1
+        if self._n == self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append all buffered records to the file."""
+        if not self._n:
+            return
+        with open(self.fpath, "ab") as f:
+            self._buf[: self._n].tofile(f)
+        self.n_written += self._n
+        self._n = 0
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
+
+def read_records(*fpaths: Path, dtype: np.dtype = RECORD_DTYPE) -> np.ndarray:
+    """Read & concatenate the records from the file(s)."""
+    arrays = [np.fromfile(p, dtype=dtype) for p in fpaths if p.exists()]
+    return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+
+def index_by_event_id(records: np.ndarray) -> np.ndarray:
+    """Make a dense lookup array of timestamps indexed by event id (NaN if missing).
+
+    For duplicate event ids (e.g. re-delivered messages), the earliest is kept.
+    """
+    valid = records[records["event_id"] >= 0]
+    n = int(valid["event_id"].max()) + 1 if valid.size else 0
+    lookup = np.full(n, np.inf)
+    np.minimum.at(lookup, valid["event_id"], valid["ts"])
+    lookup[np.isinf(lookup)] = np.nan
+    return lookup
+
+
+def join_latencies(send_records: np.ndarray, recv_records: np.ndarray) -> np.ndarray:
+    """Get the send-to-receive latency for each received event that was sent."""
+    sent = index_by_event_id(send_records)
+    ids = recv_records["event_id"]
+    mask = (ids >= 0) & (ids < sent.size)
+    lat = recv_records["ts"][mask] - sent[ids[mask]]
+    return lat[~np.isnan(lat)]
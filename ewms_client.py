@@ -0,0 +1,185 @@
+"""Shared EWMS client helpers -- connecting (endpoint & auth) and queues.
+
+By default, the scripts connect to EWMS-dev with the saved device-grant
+refresh token. To point them elsewhere (e.g. the local stand-in, see
+'local_ewms.py'), use the CLI args from 'add_connection_args()' or the
+equivalent env vars.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from mqclient.queue import Queue
+from rest_tools.client import ClientCredentialsAuth, RestClient, SavedDeviceGrantAuth
+
+import local_mq
+
+DEFAULT_EWMS_URL = "https://ewms-dev.icecube.aq"
+DEFAULT_TOKEN_URL = "https://keycloak.icecube.wisc.edu/auth/realms/IceCube"
+DEFAULT_CLIENT_ID = "ewms-dev-public"
+DEFAULT_REFRESH_TOKEN_FILE = "~/ewms-dev-device-refresh-token"
+
+AUTH_DEVICE_GRANT = "device-grant"
+AUTH_CLIENT_CREDENTIALS = "client-credentials"
+AUTH_NONE = "none"
+
+ACTIVATION_FIRST_DELAY = 1.0  # seconds -- backoff after the first (immediate) probe
+ACTIVATION_MAX_DELAY = 10.0  # seconds -- the backoff's cap (the old poll interval)
+ACTIVATION_TIMEOUT = 2 * 60 * 60  # seconds
+
+LOGGER = logging.getLogger(__name__)
+
+
+def add_connection_args(parser: argparse.ArgumentParser) -> None:
+    """Add the args for connecting to EWMS (each defaults to an env var)."""
+    parser.add_argument(
+        "--ewms-url",
+        default=os.getenv("EWMS_URL", DEFAULT_EWMS_URL),
+        help="the EWMS REST API's address (env: EWMS_URL)",
+    )
+    parser.add_argument(
+        "--auth",
+        choices=[AUTH_DEVICE_GRANT, AUTH_CLIENT_CREDENTIALS, AUTH_NONE],
+        default=os.getenv("EWMS_AUTH", AUTH_DEVICE_GRANT),
+        help="how to authenticate (env: EWMS_AUTH) -- "
+        f"use '{AUTH_NONE}' for the local stand-in",
+    )
+    parser.add_argument(
+        "--token-url",
+        default=os.getenv("EWMS_TOKEN_URL", DEFAULT_TOKEN_URL),
+        help="the OpenID token issuer (env: EWMS_TOKEN_URL)",
+    )
+    parser.add_argument(
+        "--client-id",
+        default=os.getenv("EWMS_CLIENT_ID", DEFAULT_CLIENT_ID),
+        help="the OpenID client id (env: EWMS_CLIENT_ID)",
+    )
+    parser.add_argument(
+        "--refresh-token-file",
+        type=Path,
+        default=Path(os.getenv("EWMS_REFRESH_TOKEN_FILE", DEFAULT_REFRESH_TOKEN_FILE)),
+        help=f"the saved refresh token, for '{AUTH_DEVICE_GRANT}' "
+        "(env: EWMS_REFRESH_TOKEN_FILE)",
+    )
+    # NOTE: the client secret is only taken from the env, so it's not in 'ps' output
+
+
+def connect(args: argparse.Namespace, **kwargs: Any) -> RestClient:
+    """Make the rest client from the connection args (see 'add_connection_args()')."""
+    if args.auth == AUTH_DEVICE_GRANT:
+        return SavedDeviceGrantAuth(
+            args.ewms_url,
+            token_url=args.token_url,
+            filename=str(args.refresh_token_file.expanduser().resolve()),
+            client_id=args.client_id,
+            **kwargs,
+        )
+    elif args.auth == AUTH_CLIENT_CREDENTIALS:
+        return ClientCredentialsAuth(
+            args.ewms_url,
+            token_url=args.token_url,
+            client_id=args.client_id,
+            client_secret=os.environ["EWMS_CLIENT_SECRET"],
+            **kwargs,
+        )
+    elif args.auth == AUTH_NONE:
+        return RestClient(args.ewms_url, **kwargs)
+    else:
+        raise ValueError(f"unknown auth: {args.auth}")
+
+
+def queue_from_mqprofile(mqprofile: dict) -> Queue:
+    """Make a queue object from an mqprofile."""
+    if mqprofile["broker_type"] == local_mq.BROKER_TYPE:
+        # duck-typed like 'Queue' (see 'local_mq.LocalQueue')
+        return local_mq.LocalQueue(  # type: ignore[return-value]
+            mqprofile["broker_address"],
+            name=mqprofile["mqid"],
+        )
+    return Queue(
+        mqprofile["broker_type"],
+        address=mqprofile["broker_address"],
+        name=mqprofile["mqid"],
+        auth_token=mqprofile["auth_token"],
+    )
+
+
+@dataclass
+class Activation:
+    """When a workflow's queues became activated (see 'wait_for_activation()')."""
+
+    workflow_id: str
+    t_wait_start: float  # epoch
+    t_activated: float  # epoch -- the first probe that saw all queues activated
+    n_probes: int
+
+    @property
+    def waited(self) -> float:
+        """Seconds from the start of the wait until activation was seen."""
+        return self.t_activated - self.t_wait_start
+
+    def dump(self, fpath: Path, **extra: Any) -> None:
+        """Write to a JSON file (w/ any extra fields, e.g. the request time)."""
+        with open(fpath, "w") as f:
+            json.dump({**asdict(self), "waited": self.waited, **extra}, f, indent=4)
+
+
+async def wait_for_activation(
+    rc: RestClient,
+    workflow_id: str,
+    first_delay: float = ACTIVATION_FIRST_DELAY,
+    max_delay: float = ACTIVATION_MAX_DELAY,
+    timeout: float = ACTIVATION_TIMEOUT,
+) -> tuple[list[dict], Activation]:
+    """Wait until all the workflow's queues are activated -- returns the mqprofiles.
+
+    Probes immediately, then backs off exponentially (w/ jitter, capped at
+    'max_delay'). Raises 'TimeoutError' after 'timeout' seconds.
+    """
+    LOGGER.info(f"waiting for workflow's queues to be activated: {workflow_id}")
+    t_wait_start = time.time()
+    deadline = time.monotonic() + timeout
+    delay = first_delay
+    n_probes = 0
+    while True:
+        n_probes += 1
+        mqprofiles = (
+            await rc.request(
+                "GET",
+                f"/v1/mqs/workflows/{workflow_id}/mq-profiles/public",
+            )
+        )["mqprofiles"]
+        if mqprofiles and all(m["is_activated"] for m in mqprofiles):
+            break
+        if (remaining := deadline - time.monotonic()) <= 0:
+            raise TimeoutError(
+                f"workflow's queues not activated after {timeout}s: {workflow_id}"
+            )
+        # jitter: so many waiters (e.g. a campaign) don't probe in lockstep
+        await asyncio.sleep(min(delay * random.uniform(0.5, 1.0), remaining))
+        delay = min(delay * 2, max_delay)
+
+    activation = Activation(workflow_id, t_wait_start, time.time(), n_probes)
+    LOGGER.info(
+        f"[ACTIVATION] workflow={workflow_id} waited={activation.waited:.3f}s "
+        f"probes={n_probes}"
+    )
+    return mqprofiles, activation
+
+
+async def get_workflow(rc: RestClient, workflow_id: str) -> dict:
+    """Get the workflow object -- once done, its 'deactivated' is set."""
+    return await rc.request("GET", f"/v1/workflows/{workflow_id}")
+
+
+async def finish_workflow(rc: RestClient, workflow_id: str) -> None:
+    """Mark the workflow as finished -- so EWMS deactivates it & stops its pilots."""
+    await rc.request("POST", f"/v1/workflows/{workflow_id}/actions/finished")
@@ -4,21 +4,43 @@ import argparse
 import asyncio
 import json
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
 
 from mqclient.queue import Queue
-from rest_tools.client import RestClient, SavedDeviceGrantAuth
+from rest_tools.client import RestClient
+
+import event_envelope
+from event_records import RecordWriter
+from ewms_client import (
+    ACTIVATION_TIMEOUT,
+    Activation,
+    add_connection_args,
+    connect,
+    queue_from_mqprofile,
+    wait_for_activation,
+)
 
 LOGGER = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-async def request_ewms(rc: RestClient, ewms_request_json: Path):
-    """Request an ewms workflow from the json file."""
+async def request_ewms(
+    rc: RestClient,
+    ewms_request_json: Path,
+    priority: int | None = None,
+):
+    """Request an ewms workflow from the json file (optionally, w/ a new priority)."""
     LOGGER.info(f"Requesting single-task workflow to EWMS ({ewms_request_json})...")
 
-    with open(ewms_request_json) as f:
-        post_body = json.load(f)
+    post_body = json.loads(await asyncio.to_thread(ewms_request_json.read_text))
+    if priority is not None:
+        for task in post_body["tasks"]:
+            task["worker_config"]["priority"] = priority
     LOGGER.info(json.dumps(post_body, indent=4))
 
     resp = await rc.request("POST", "/v1/workflows", post_body)
@@ -31,47 +53,241 @@ async def request_ewms(rc: RestClient, ewms_request_json: Path):
     )
 
 
+async def get_input_mqprofile(
+    rc: RestClient,
+    workflow_id: str,
+    in_mqid: str,
+    activation_timeout: float = ACTIVATION_TIMEOUT,
+) -> tuple[dict, Activation]:
+    """Retrieve the input queue's mqprofile, once the queues are activated."""
+    LOGGER.info("getting queues...")
+    mqprofiles, activation = await wait_for_activation(
+        rc, workflow_id, timeout=activation_timeout
+    )
+    LOGGER.info(json.dumps(mqprofiles, indent=4))
+
+    return next(p for p in mqprofiles if p["mqid"] == in_mqid), activation
+
+
 async def get_input_queue(
     rc: RestClient,
     workflow_id: str,
     in_mqid: str,
 ) -> Queue:
     """Retrieve the input queue object."""
-    LOGGER.info("getting queues...")
-    mqprofiles: list[dict] = []
-    while not (mqprofiles and all(m["is_activated"] for m in mqprofiles)):
-        # (re)try until queues are activated
-        await asyncio.sleep(10)
-        mqprofiles = (
-            await rc.request(
-                "GET",
-                f"/v1/mqs/workflows/{workflow_id}/mq-profiles/public",
-            )
-        )["mqprofiles"]
-    LOGGER.info(json.dumps(mqprofiles, indent=4))
+    mqprofile, _ = await get_input_mqprofile(rc, workflow_id, in_mqid)
+    return queue_from_mqprofile(mqprofile)
+
+
+@dataclass
+class ServeStats:
+    """Throughput summary of serving events."""
+
+    n_events: int
+    n_messages: int
+    elapsed: float  # seconds
+
+    @property
+    def messages_per_sec(self) -> float:
+        """Sustained broker messages per second."""
+        return self.n_messages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def events_per_sec(self) -> float:
+        """Sustained events per second (differs from messages when batching)."""
+        return self.n_events / self.elapsed if self.elapsed else 0.0
 
-    in_mqprofile = next(p for p in mqprofiles if p["mqid"] == in_mqid)
-    in_queue = Queue(
-        in_mqprofile["broker_type"],
-        address=in_mqprofile["broker_address"],
-        name=in_mqprofile["mqid"],
-        auth_token=in_mqprofile["auth_token"],
+    def __str__(self) -> str:
+        return (
+            f"{self.n_events} events in {self.n_messages} messages "
+            f"over {self.elapsed:.2f}s "
+            f"({self.messages_per_sec:.1f} msgs/s, {self.events_per_sec:.1f} events/s)"
+        )
+
+
+def split_shards(n_tasks: int, n_shards: int) -> list[range]:
+    """Split 'range(n_tasks)' into 'n_shards' disjoint, contiguous, near-equal ranges."""
+    size, extra = divmod(n_tasks, n_shards)
+    shards = []
+    start = 0
+    for i in range(n_shards):
+        stop = start + size + (1 if i < extra else 0)
+        shards.append(range(start, stop))
+        start = stop
+    if sum(len(s) for s in shards) != n_tasks:
+        raise RuntimeError(f"shards {shards} do not cover {n_tasks=}")
+    return shards
+
+
+def iter_event_id_batches(start: int, stop: int, batch_size: int) -> Iterator[range]:
+    """Yield consecutive ranges of up to 'batch_size' event ids."""
+    for i in range(start, stop, batch_size):
+        yield range(i, min(i + batch_size, stop))
+
+
+def make_message_body(event_ids: range, envelope_run_id: str | None = None) -> str:
+    """Make a message body holding the event ids, comma-joined.
+
+    With one event & no envelope, the body is just 'str(n)' (the original
+    format). With an 'envelope_run_id', each event is an 'event_envelope'
+    carrying its sequence number, the send time, and the run id.
+    """
+    if envelope_run_id is None:
+        return event_envelope.BATCH_SEP.join(str(n) for n in event_ids)
+    now = time.time()
+    return event_envelope.BATCH_SEP.join(
+        event_envelope.encode(n, envelope_run_id, now) for n in event_ids
     )
 
-    return in_queue
 
+async def serve_events(
+    n_tasks: int,
+    in_queue: Queue,
+    inflight_window: int = 1,
+    batch_size: int = 1,
+    log_every: int = 1,
+    log_interval: float = 0.0,
+    first_event: int = 0,
+    send_records: Path | None = None,
+    envelope_run_id: str | None = None,
+) -> ServeStats:
+    """Serve 'n_tasks' number of events (tasks), with ids starting at 'first_event'.
+
+    Up to 'inflight_window' sends are awaited concurrently. Each message holds
+    up to 'batch_size' events -- NOTE: the pilot runs one task per message,
+    which does a unit of work & sends an output per event (see 'task.main'), so
+    batching > 1 means fewer ewms tasks (less per-task overhead), each doing
+    the same total work as its events would one per message.
+
+    A progress line is logged every 'log_every' messages and/or at most once
+    per 'log_interval' seconds (0 disables either trigger).
 
-async def serve_events(n_tasks: int, in_queue: Queue) -> int:
-    """Serve 'n_tasks' number of events (tasks)."""
-    n = -1
+    If 'send_records' is given, each event's send (ack) time is appended to
+    that file (see 'event_records'). If 'envelope_run_id' is given, events are
+    sent as envelopes (see 'event_envelope') for end-to-end tracing.
+    """
+    n_msgs = 0
+    pending: set[asyncio.Task] = set()
+    writer = RecordWriter(send_records) if send_records else None
+
+    async def send(pub, event_ids: range, body: str) -> None:
+        await pub.send(body)
+        if writer:
+            ts = time.time()
+            for event_id in event_ids:
+                writer.add(event_id, ts)
+
+    t0 = last_log = time.monotonic()
 
     async with in_queue.open_pub() as pub:
-        for n in range(n_tasks):
-            await pub.send(str(n))  # str & bytes message don't incur json cost on pilot
-            # inflight.append(n)
-            LOGGER.info(f"Sent: #{n}")
+        # str & bytes message don't incur json cost on pilot
+        for event_ids in iter_event_id_batches(
+            first_event, first_event + n_tasks, batch_size
+        ):
+            if len(pending) >= inflight_window:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()  # re-raise any send error
+            body = make_message_body(event_ids, envelope_run_id)
+            pending.add(asyncio.create_task(send(pub, event_ids, body)))
+            n_msgs += 1
+
+            # rate-limited logging
+            now = time.monotonic()
+            if (log_every and n_msgs % log_every == 0) or (
+                log_interval and now - last_log >= log_interval
+            ):
+                last_log = now
+                LOGGER.info(
+                    f"Sent: #{event_ids[-1]} "
+                    f"({n_msgs / max(now - t0, 1e-9):.1f} msgs/s)"
+                )
+
+        if pending:
+            await asyncio.gather(*pending)
+
+    if writer:
+        writer.flush()
 
-    return n + 1
+    return ServeStats(
+        n_events=n_tasks,
+        n_messages=n_msgs,
+        elapsed=time.monotonic() - t0,
+    )
+
+
+def _serve_shard(
+    mqprofile: dict,
+    shard: range,
+    serve_kwargs: dict,
+    send_records: Path | None,
+) -> ServeStats:
+    """Serve one shard of events on its own connection -- runs in a worker process."""
+    return asyncio.run(
+        serve_events(
+            len(shard),
+            queue_from_mqprofile(mqprofile),
+            first_event=shard.start,
+            send_records=send_records,
+            **serve_kwargs,
+        )
+    )
+
+
+def serve_events_multiprocess(
+    n_tasks: int,
+    mqprofile: dict,
+    n_publishers: int,
+    send_records: Path | None = None,
+    **serve_kwargs,
+) -> ServeStats:
+    """Serve 'n_tasks' events split across 'n_publishers' processes.
+
+    Each process gets a disjoint shard of 'range(n_tasks)' and opens its own
+    publisher connection to the queue described by 'mqprofile'. If
+    'send_records' is given, each shard appends to its own "<path>.<i>" file.
+
+    The processes are spawned (not forked), since this is called from a thread
+    of a running event loop -- forking a threaded process can deadlock.
+    """
+    shards = split_shards(n_tasks, n_publishers)
+
+    t0 = time.monotonic()
+    with ProcessPoolExecutor(
+        max_workers=n_publishers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        futures = [
+            pool.submit(
+                _serve_shard,
+                mqprofile,
+                shard,
+                serve_kwargs,
+                (
+                    send_records.with_name(f"{send_records.name}.{i}")
+                    if send_records
+                    else None
+                ),
+            )
+            for i, shard in enumerate(shards)
+        ]
+        results = [f.result() for f in futures]
+    elapsed = time.monotonic() - t0
+
+    # per-shard summary
+    for shard, stats in zip(shards, results):
+        LOGGER.info(f"shard [{shard.start}, {shard.stop}): {stats}")
+
+    total = ServeStats(
+        n_events=sum(r.n_events for r in results),
+        n_messages=sum(r.n_messages for r in results),
+        elapsed=elapsed,
+    )
+    if total.n_events != n_tasks:
+        raise RuntimeError(f"served {total.n_events} events, expected {n_tasks}")
+    return total
 
 
 async def main():
@@ -91,24 +307,107 @@ async def main():
         type=int,
         help="Total number of tasks to generate",
     )
+    parser.add_argument(
+        "--inflight-window",
+        type=int,
+        default=1,
+        help="Max number of concurrent (un-acknowledged) sends",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of events per broker message (each message is one ewms task, "
+        "doing one unit of work per event)",
+    )
+    parser.add_argument(
+        "--log-every",
+        type=int,
+        default=1,
+        help="Log a progress line every N messages (0 to disable)",
+    )
+    parser.add_argument(
+        "--log-interval",
+        type=float,
+        default=0.0,
+        help="Log a progress line at most every N seconds (0 to disable)",
+    )
+    parser.add_argument(
+        "--n-publishers",
+        type=int,
+        default=1,
+        help="Number of publisher processes, each serving a disjoint shard of events",
+    )
+    parser.add_argument(
+        "--send-records",
+        type=Path,
+        default=None,
+        help="Append each event's send time to this binary records file "
+        "(see event_records.py) -- for end-to-end latencies",
+    )
+    parser.add_argument(
+        "--envelope-run-id",
+        default=None,
+        help="Send each event as an envelope (seq, send time, this run id) "
+        "for end-to-end latency tracing (see event_envelope.py)",
+    )
+    parser.add_argument(
+        "--activation-timeout",
+        type=float,
+        default=ACTIVATION_TIMEOUT,
+        help="seconds to wait for the workflow's queues to be activated",
+    )
+    parser.add_argument(
+        "--activation-record",
+        type=Path,
+        default=None,
+        help="write the request & queue-activation times to this JSON file "
+        "(for 'analyze_ewms.py --activation-record')",
+    )
+    add_connection_args(parser)
     args = parser.parse_args()
+    if args.inflight_window < 1 or args.batch_size < 1 or args.n_publishers < 1:
+        parser.error("--inflight-window, --batch-size, and --n-publishers must be >= 1")
     LOGGER.info(args)
 
-    rc = SavedDeviceGrantAuth(
-        "https://ewms-dev.icecube.aq",
-        token_url="https://keycloak.icecube.wisc.edu/auth/realms/IceCube",
-        filename=str(Path("~/ewms-dev-device-refresh-token").expanduser().resolve()),
-        client_id="ewms-dev-public",
-        retries=0,
-    )
+    rc = connect(args, retries=0)
 
     # request
+    request_time = time.time()
     workflow_id, in_mqid, out_mqid = await request_ewms(rc, args.request_json)
 
     # load queue
-    in_queue = await get_input_queue(rc, workflow_id, in_mqid)
-    nsent = await serve_events(args.n_tasks, in_queue)
-    LOGGER.info(f"done sending {nsent} event messages: {in_queue}")
+    in_mqprofile, activation = await get_input_mqprofile(
+        rc, workflow_id, in_mqid, args.activation_timeout
+    )
+    if args.activation_record:
+        activation.dump(args.activation_record, request_time=request_time)
+    serve_kwargs = dict(
+        inflight_window=args.inflight_window,
+        batch_size=args.batch_size,
+        log_every=args.log_every,
+        log_interval=args.log_interval,
+        envelope_run_id=args.envelope_run_id,
+    )
+    if args.n_publishers == 1:
+        stats = await serve_events(
+            args.n_tasks,
+            queue_from_mqprofile(in_mqprofile),
+            send_records=args.send_records,
+            **serve_kwargs,
+        )
+    else:
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: serve_events_multiprocess(
+                args.n_tasks,
+                in_mqprofile,
+                args.n_publishers,
+                send_records=args.send_records,
+                **serve_kwargs,
+            ),
+        )
+    LOGGER.info(f"done sending {stats}: {in_mqprofile['mqid']}")
     LOGGER.info(f"OPTIONAL: to receive output event messages use queue: {out_mqid}")
 
 
@@ -2,12 +2,25 @@
 
 import argparse
 import asyncio
+import contextlib
 import json
 import logging
+import time
+from collections import deque
 from pathlib import Path
 
+import numpy as np
 from mqclient.queue import Queue
-from rest_tools.client import RestClient, SavedDeviceGrantAuth
+from rest_tools.client import RestClient
+
+import event_envelope
+from event_records import TRACE_DTYPE, RecordWriter, index_by_event_id, read_records
+from ewms_client import (
+    add_connection_args,
+    connect,
+    queue_from_mqprofile,
+    wait_for_activation,
+)
 
 LOGGER = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -16,27 +29,11 @@ logging.basicConfig(level=logging.INFO)
 async def get_output_queue(rc: RestClient, workflow_id: str) -> Queue:
     """Retrieve the output queue object."""
     LOGGER.info("getting queues...")
-    mqprofiles: list[dict] = []
-    while not (mqprofiles and all(m["is_activated"] for m in mqprofiles)):
-        # (re)try until queues are activated
-        await asyncio.sleep(10)
-        mqprofiles = (
-            await rc.request(
-                "GET",
-                f"/v1/mqs/workflows/{workflow_id}/mq-profiles/public",
-            )
-        )["mqprofiles"]
+    mqprofiles, _ = await wait_for_activation(rc, workflow_id)
     LOGGER.info(json.dumps(mqprofiles, indent=4))
 
     out_mqprofile = next(p for p in mqprofiles if p["alias"] == "output-queue")
-    out_queue = Queue(
-        out_mqprofile["broker_type"],
-        address=out_mqprofile["broker_address"],
-        name=out_mqprofile["mqid"],
-        auth_token=out_mqprofile["auth_token"],
-    )
-
-    return out_queue
+    return queue_from_mqprofile(out_mqprofile)
 
 
 async def sub_events(queue: Queue) -> int:
@@ -51,6 +48,146 @@ async def sub_events(queue: Queue) -> int:
     return n + 1
 
 
+def parse_message(msg: object) -> list[tuple[int, event_envelope.Envelope | None]]:
+    """Get the event id(s) & envelope(s) from an output message.
+
+    The event id is -1 if unparseable; the envelope is None if not enveloped.
+    """
+    events: list[tuple[int, event_envelope.Envelope | None]] = []
+    for part in str(msg).split(event_envelope.BATCH_SEP):
+        try:
+            if event_envelope.is_envelope(part):
+                env = event_envelope.decode(part)
+                events.append((env.seq, env))
+            else:
+                events.append((int(part), None))
+        except ValueError:
+            events.append((-1, None))
+    return events
+
+
+class DrainSummary:
+    """Live throughput & latency-percentile summary over a bounded window."""
+
+    def __init__(self, send_lookup: np.ndarray | None, window: int) -> None:
+        self.send_lookup = send_lookup
+        self.recent: deque[float] = deque(maxlen=window)  # latencies or gaps
+        # enveloped events' breakdown: send->start, start->end, end->receive,
+        # & the task's startup (part of start->end)
+        self.recent_breakdown: deque[tuple[float, float, float, float]] = deque(
+            maxlen=window
+        )
+        self.t0 = self.last_t = self.last_recv = time.time()
+        self.n = self.last_n = 0
+
+    def add(
+        self, event_id: int, ts: float, env: event_envelope.Envelope | None
+    ) -> None:
+        """Add a received event."""
+        self.n += 1
+        if env:
+            self.recent.append(ts - env.send_ts)
+            self.recent_breakdown.append(
+                (
+                    env.task_start_ts - env.send_ts,
+                    env.task_end_ts - env.task_start_ts,
+                    ts - env.task_end_ts,
+                    env.extra_float("startup_s"),
+                )
+            )
+        elif self.send_lookup is None:
+            self.recent.append(ts - self.last_recv)  # inter-arrival gap
+        elif 0 <= event_id < self.send_lookup.size:
+            if not np.isnan(sent := self.send_lookup[event_id]):
+                self.recent.append(ts - sent)
+        self.last_recv = ts
+
+    def log(self) -> None:
+        """Log the summary (& reset the interval)."""
+        now = time.time()
+        what = (
+            "latency"
+            if self.send_lookup is not None or self.recent_breakdown
+            else "inter-arrival"
+        )
+        pcts = (
+            np.percentile(np.fromiter(self.recent, float), [50, 90, 99])
+            if self.recent
+            else [np.nan] * 3
+        )
+        LOGGER.info(
+            f"received {self.n} events "
+            f"({self.n / max(now - self.t0, 1e-9):.1f}/s overall, "
+            f"{(self.n - self.last_n) / max(now - self.last_t, 1e-9):.1f}/s now) "
+            f"-- {what} p50/p90/p99: "
+            f"{pcts[0]:.3f}s / {pcts[1]:.3f}s / {pcts[2]:.3f}s"
+        )
+        if self.recent_breakdown:
+            p50s = np.nanpercentile(np.array(self.recent_breakdown), 50, axis=0)
+            LOGGER.info(
+                f"  breakdown p50: queue-dwell {p50s[0]:.3f}s, "
+                f"task {p50s[1]:.3f}s (startup {p50s[3]:.3f}s), "
+                f"return {p50s[2]:.3f}s"
+            )
+        self.last_t, self.last_n = now, self.n
+
+
+async def sub_events_to_records(
+    queue: Queue,
+    records: Path,
+    summary_interval: float,
+    send_records: list[Path],
+    traces: Path | None = None,
+    summary_window: int = 100_000,
+) -> int:
+    """Retrieve events, appending each one's receive time (w/ its event id) to 'records'.
+
+    A live summary is logged every 'summary_interval' seconds: throughput and
+    percentiles of either the send-to-receive latency (if the events are
+    enveloped, or if 'send_records' from 'ewms_external.serve_events' are
+    given) or the inter-arrival gaps.
+
+    If 'traces' is given, each enveloped event's full send/start/end/receive
+    trace is appended to that file.
+    """
+    send_lookup = (
+        index_by_event_id(read_records(*send_records)) if send_records else None
+    )
+    summary = DrainSummary(send_lookup, summary_window)
+    next_summary = time.monotonic() + summary_interval
+
+    with (
+        RecordWriter(records) as writer,
+        (
+            RecordWriter(traces, dtype=TRACE_DTYPE)
+            if traces
+            else contextlib.nullcontext()
+        ) as trace_writer,
+    ):
+        async with queue.open_sub() as sub:
+            async for msg in sub:
+                ts = time.time()
+                for event_id, env in parse_message(msg):
+                    writer.add(event_id, ts)
+                    summary.add(event_id, ts, env)
+                    if trace_writer and env:
+                        trace_writer.add(
+                            event_id,
+                            env.send_ts,
+                            env.task_start_ts,
+                            env.task_end_ts,
+                            ts,
+                            env.worker.encode()[:64],
+                            env.extra_float("startup_s"),
+                        )
+                if time.monotonic() >= next_summary:
+                    summary.log()
+                    next_summary = time.monotonic() + summary_interval
+
+    summary.log()
+    return summary.n
+
+
 async def main():
     """Main."""
     parser = argparse.ArgumentParser(
@@ -60,19 +197,51 @@ async def main():
         "workflow_id",
         help="the ewms workflow id",
     )
+    parser.add_argument(
+        "--records",
+        type=Path,
+        default=None,
+        help="instead of printing each message, append each event's receive time "
+        "to this binary records file (see event_records.py)",
+    )
+    parser.add_argument(
+        "--send-records",
+        type=Path,
+        nargs="*",
+        default=[],
+        help="the send-records file(s) from 'ewms_external.py --send-records', "
+        "for live send-to-receive latency percentiles",
+    )
+    parser.add_argument(
+        "--traces",
+        type=Path,
+        default=None,
+        help="append each enveloped event's send/start/end/receive trace "
+        "to this binary records file (with --records)",
+    )
+    parser.add_argument(
+        "--summary-interval",
+        type=float,
+        default=10.0,
+        help="seconds between live summaries (with --records)",
+    )
+    add_connection_args(parser)
     args = parser.parse_args()
     LOGGER.info(args)
 
-    rc = SavedDeviceGrantAuth(
-        "https://ewms-dev.icecube.aq",
-        token_url="https://keycloak.icecube.wisc.edu/auth/realms/IceCube",
-        filename=str(Path("~/ewms-dev-device-refresh-token").expanduser().resolve()),
-        client_id="ewms-dev-public",
-        retries=0,
-    )
+    rc = connect(args, retries=0)
 
     queue = await get_output_queue(rc, args.workflow_id)
-    n_recvd = await sub_events(queue)
+    if args.records:
+        n_recvd = await sub_events_to_records(
+            queue,
+            args.records,
+            args.summary_interval,
+            args.send_records,
+            args.traces,
+        )
+    else:
+        n_recvd = await sub_events(queue)
     LOGGER.info(f"got {n_recvd} event messages: {queue}")
 
 
@@ -0,0 +1,616 @@
+"""A local stand-in for EWMS's REST API & message broker, plus a fake-pilot pool.
+
+For load-testing the publish/drain tooling ('ewms_external.py' &
+'ewms_external_drain_outputs.py') on one box, without the real service:
+
+    python local_ewms.py serve --port 8080
+    python ewms_external.py --ewms-url http://localhost:8080 --auth none ...
+    python local_ewms.py pilots <workflow_id> --ewms-url http://localhost:8080 --auth none
+    python ewms_external_drain_outputs.py <workflow_id> --ewms-url http://localhost:8080 --auth none ...
+
+The server implements the EWMS routes the tooling uses,
+
+    POST /v1/workflows
+    GET  /v1/workflows/{workflow_id}
+    POST /v1/workflows/{workflow_id}/actions/finished
+    GET  /v1/mqs/workflows/{workflow_id}/mq-profiles/public
+
+and holds every workflow's queues in memory (in the server's process), served
+over these stand-in-only routes:
+
+    POST /local/mqs/{mqid}/messages   -- publish (a list of messages)
+    POST /local/mqs/{mqid}/lease      -- lease up to N messages (long-polls)
+    POST /local/mqs/{mqid}/settle     -- ack or nack leased messages
+    GET  /local/mqs/{mqid}            -- the queue's counts
+    GET  /local/workflows/{workflow_id}/request  -- the original request body
+
+The mqprofiles have the broker type "local", which 'ewms_client' turns into a
+'local_mq.LocalQueue' -- a drop-in for 'mqclient.Queue''s pub/sub interface.
+
+The fake pilots consume a workflow's input events, run 'task.py' on each (with
+the request's 'task_env'), and publish the outputs -- logging like the real
+pilot, so 'analyze_ewms.py' works on their logs. Like real pilots, they
+never mark the workflow finished -- that's up to the client (e.g. 'campaign.py',
+once it has drained all the outputs).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import tornado.web
+from rest_tools.client import RestClient
+from rest_tools.server import RestHandler, RestHandlerSetup, RestServer
+
+import ewms_client
+from local_mq import (
+    BROKER_TYPE,
+    DEFAULT_QUEUE_TIMEOUT,
+    MAX_LONG_POLL,
+    LocalQueue,
+)
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_PORT = 8080
+DEFAULT_LEASE_TIMEOUT = 10 * 60  # seconds -- an unsettled lease is redelivered after
+
+TASK_PY = Path(__file__).parent / "task.py"
+
+
+########################################################################################
+# the server
+
+
+@dataclass
+class LocalMQ:
+    """An in-memory queue w/ leases: like a broker's un-acked messages."""
+
+    mqid: str
+    lease_timeout: float
+    ready: deque[tuple[int, Any]] = field(default_factory=deque)  # (msg id, data)
+    leased: dict[int, Any] = field(default_factory=dict)  # msg id -> data
+    lease_deadlines: list[tuple[float, int]] = field(default_factory=list)  # heap
+    cond: asyncio.Condition = field(default_factory=asyncio.Condition)
+    n_published: int = 0
+    n_acked: int = 0
+    n_nacked: int = 0
+    n_redelivered: int = 0  # from expired leases
+    _ids: Any = field(default_factory=itertools.count)
+
+    async def publish(self, messages: list[Any]) -> None:
+        """Add the messages to the queue."""
+        for data in messages:
+            self.ready.append((next(self._ids), data))
+        self.n_published += len(messages)
+        async with self.cond:
+            self.cond.notify_all()
+
+    def _expire_leases(self) -> None:
+        now = time.monotonic()
+        while self.lease_deadlines and self.lease_deadlines[0][0] <= now:
+            _, msg_id = heapq.heappop(self.lease_deadlines)
+            if msg_id in self.leased:  # not settled yet
+                self.ready.append((msg_id, self.leased.pop(msg_id)))
+                self.n_redelivered += 1
+
+    async def lease(self, max_n: int, timeout: float) -> list[tuple[int, Any]]:
+        """Lease up to 'max_n' messages, waiting up to 'timeout' seconds for any."""
+        deadline = time.monotonic() + min(timeout, MAX_LONG_POLL)
+        while True:
+            self._expire_leases()
+            if self.ready:
+                out = [self.ready.popleft() for _ in range(min(max_n, len(self.ready)))]
+                lease_deadline = time.monotonic() + self.lease_timeout
+                for msg_id, data in out:
+                    self.leased[msg_id] = data
+                    heapq.heappush(self.lease_deadlines, (lease_deadline, msg_id))
+                return out
+            if (remaining := deadline - time.monotonic()) <= 0:
+                return []
+            async with self.cond:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.cond.wait(), remaining)
+
+    async def settle(self, acks: list[int], nacks: list[int]) -> None:
+        """Ack (delete) or nack (redeliver) leased messages."""
+        for msg_id in acks:
+            if self.leased.pop(msg_id, None) is not None:
+                self.n_acked += 1
+        requeued = [(i, self.leased.pop(i)) for i in nacks if i in self.leased]
+        self.ready.extend(requeued)
+        self.n_nacked += len(requeued)
+        if requeued:
+            async with self.cond:
+                self.cond.notify_all()
+
+    def counts(self) -> dict[str, int]:
+        """Get the queue's counts."""
+        return {
+            "n_ready": len(self.ready),
+            "n_leased": len(self.leased),
+            "n_published": self.n_published,
+            "n_acked": self.n_acked,
+            "n_nacked": self.n_nacked,
+            "n_redelivered": self.n_redelivered,
+        }
+
+
+@dataclass
+class LocalState:
+    """Everything the server holds."""
+
+    activation_delay: float
+    lease_timeout: float
+    workflows: dict[str, dict[str, Any]] = field(default_factory=dict)
+    mqs: dict[str, LocalMQ] = field(default_factory=dict)
+
+    def create_workflow(self, post_body: dict[str, Any]) -> dict[str, Any]:
+        """Create a workflow & its queues -- returns the response (like EWMS's)."""
+        workflow_id = uuid.uuid4().hex[:12]
+        mqids = {
+            alias: f"{alias}-{workflow_id}"
+            for alias in post_body.get("public_queue_aliases", [])
+        }
+        for mqid in mqids.values():
+            self.mqs[mqid] = LocalMQ(mqid, self.lease_timeout)
+        workflow = {
+            "workflow_id": workflow_id,
+            "timestamp": time.time(),
+            "mqids": mqids,
+            "request": post_body,
+            "deactivated": None,
+            "deactivated_timestamp": None,
+        }
+        self.workflows[workflow_id] = workflow
+        LOGGER.info(f"created workflow {workflow_id} w/ queues {list(mqids.values())}")
+
+        return {
+            "workflow": {
+                "workflow_id": workflow_id,
+                "timestamp": workflow["timestamp"],
+            },
+            "task_directives": [
+                {
+                    "task_image": task["task_image"],
+                    "input_queues": [mqids[a] for a in task["input_queue_aliases"]],
+                    "output_queues": [mqids[a] for a in task["output_queue_aliases"]],
+                }
+                for task in post_body.get("tasks", [])
+            ],
+        }
+
+    def get_workflow(self, workflow_id: str) -> dict[str, Any]:
+        """Get the workflow object (like EWMS's)."""
+        workflow = self.workflows[workflow_id]
+        return {
+            k: workflow[k]
+            for k in [
+                "workflow_id",
+                "timestamp",
+                "deactivated",
+                "deactivated_timestamp",
+            ]
+        }
+
+    def finish_workflow(self, workflow_id: str) -> None:
+        """Mark the workflow as finished (deactivated)."""
+        workflow = self.workflows[workflow_id]
+        if not workflow["deactivated"]:
+            workflow["deactivated"] = "FINISHED"
+            workflow["deactivated_timestamp"] = time.time()
+            LOGGER.info(f"finished workflow {workflow_id}")
+
+    def get_mqprofiles(self, workflow_id: str, address: str) -> list[dict[str, Any]]:
+        """Get the workflow's public mqprofiles (like EWMS's)."""
+        workflow = self.workflows[workflow_id]
+        is_activated = time.time() >= workflow["timestamp"] + self.activation_delay
+        return [
+            {
+                "mqid": mqid,
+                "alias": alias,
+                "is_activated": is_activated,
+                "broker_type": BROKER_TYPE,
+                "broker_address": address if is_activated else "",
+                "auth_token": "",
+            }
+            for alias, mqid in workflow["mqids"].items()
+        ]
+
+
+class _BaseHandler(RestHandler):  # pylint: disable=W0223
+    """Has the state."""
+
+    def initialize(self, state: LocalState, **kwargs: Any) -> None:  # type: ignore[override]
+        super().initialize(**kwargs)
+        self.state = state
+
+    def json_body(self) -> dict[str, Any]:
+        """Get the request's JSON body."""
+        return json.loads(self.request.body) if self.request.body else {}
+
+    def check_workflow(self, workflow_id: str) -> None:
+        """404 if no such workflow."""
+        if workflow_id not in self.state.workflows:
+            raise tornado.web.HTTPError(404, reason=f"no workflow: {workflow_id}")
+
+    def get_mq(self, mqid: str) -> LocalMQ:
+        """Get the queue (404 if none)."""
+        try:
+            return self.state.mqs[mqid]
+        except KeyError:
+            raise tornado.web.HTTPError(404, reason=f"no queue: {mqid}")
+
+
+class WorkflowsHandler(_BaseHandler):  # pylint: disable=W0223
+    """POST /v1/workflows"""
+
+    async def post(self) -> None:
+        self.write(self.state.create_workflow(self.json_body()))
+
+
+class WorkflowHandler(_BaseHandler):  # pylint: disable=W0223
+    """GET /v1/workflows/{workflow_id}"""
+
+    async def get(self, workflow_id: str) -> None:
+        self.check_workflow(workflow_id)
+        self.write(self.state.get_workflow(workflow_id))
+
+
+class WorkflowFinishedHandler(_BaseHandler):  # pylint: disable=W0223
+    """POST /v1/workflows/{workflow_id}/actions/finished"""
+
+    async def post(self, workflow_id: str) -> None:
+        self.check_workflow(workflow_id)
+        self.state.finish_workflow(workflow_id)
+        self.write({})
+
+
+class MQProfilesHandler(_BaseHandler):  # pylint: disable=W0223
+    """GET /v1/mqs/workflows/{workflow_id}/mq-profiles/public"""
+
+    async def get(self, workflow_id: str) -> None:
+        self.check_workflow(workflow_id)
+        address = f"{self.request.protocol}://{self.request.host}"
+        self.write(
+            {"mqprofiles": self.state.get_mqprofiles(workflow_id, address)},
+        )
+
+
+class WorkflowRequestHandler(_BaseHandler):  # pylint: disable=W0223
+    """GET /local/workflows/{workflow_id}/request"""
+
+    async def get(self, workflow_id: str) -> None:
+        self.check_workflow(workflow_id)
+        self.write(self.state.workflows[workflow_id]["request"])
+
+
+class MQHandler(_BaseHandler):  # pylint: disable=W0223
+    """GET /local/mqs/{mqid}"""
+
+    async def get(self, mqid: str) -> None:
+        self.write(self.get_mq(mqid).counts())
+
+
+class MQMessagesHandler(_BaseHandler):  # pylint: disable=W0223
+    """POST /local/mqs/{mqid}/messages"""
+
+    async def post(self, mqid: str) -> None:
+        await self.get_mq(mqid).publish(self.json_body()["messages"])
+        self.write({})
+
+
+class MQLeaseHandler(_BaseHandler):  # pylint: disable=W0223
+    """POST /local/mqs/{mqid}/lease"""
+
+    async def post(self, mqid: str) -> None:
+        body = self.json_body()
+        leased = await self.get_mq(mqid).lease(int(body["max"]), float(body["timeout"]))
+        self.write({"messages": [{"id": i, "data": d} for i, d in leased]})
+
+
+class MQSettleHandler(_BaseHandler):  # pylint: disable=W0223
+    """POST /local/mqs/{mqid}/settle"""
+
+    async def post(self, mqid: str) -> None:
+        body = self.json_body()
+        await self.get_mq(mqid).settle(body.get("acks", []), body.get("nacks", []))
+        self.write({})
+
+
+async def serve(host: str, port: int, state: LocalState) -> None:
+    """Run the server, forever (until cancelled)."""
+    handler_args = {**RestHandlerSetup({}), "state": state}
+    server = RestServer()
+    server.add_route(r"/v1/workflows", WorkflowsHandler, handler_args)
+    server.add_route(
+        r"/v1/workflows/(?P<workflow_id>\w+)", WorkflowHandler, handler_args
+    )
+    server.add_route(
+        r"/v1/workflows/(?P<workflow_id>\w+)/actions/finished",
+        WorkflowFinishedHandler,
+        handler_args,
+    )
+    server.add_route(
+        r"/v1/mqs/workflows/(?P<workflow_id>\w+)/mq-profiles/public",
+        MQProfilesHandler,
+        handler_args,
+    )
+    server.add_route(
+        r"/local/workflows/(?P<workflow_id>\w+)/request",
+        WorkflowRequestHandler,
+        handler_args,
+    )
+    server.add_route(r"/local/mqs/(?P<mqid>[\w-]+)", MQHandler, handler_args)
+    server.add_route(
+        r"/local/mqs/(?P<mqid>[\w-]+)/messages", MQMessagesHandler, handler_args
+    )
+    server.add_route(r"/local/mqs/(?P<mqid>[\w-]+)/lease", MQLeaseHandler, handler_args)
+    server.add_route(
+        r"/local/mqs/(?P<mqid>[\w-]+)/settle", MQSettleHandler, handler_args
+    )
+    server.startup(address=host, port=port)
+    LOGGER.info(f"serving on http://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+########################################################################################
+# the fake pilots
+
+
+@dataclass
+class PilotStats:
+    """What the fake pilots did."""
+
+    n_ok: int = 0
+    n_failed: int = 0
+    t0: float = field(default_factory=time.monotonic)
+
+    def __str__(self) -> str:
+        elapsed = time.monotonic() - self.t0
+        return (
+            f"{self.n_ok} tasks ok, {self.n_failed} failed in {elapsed:.1f}s "
+            f"({self.n_ok / max(elapsed, 1e-9):.1f} tasks/s)"
+        )
+
+
+def make_pilot_logger(pilot_id: int, logs_dir: Path | None) -> logging.Logger:
+    """Make a pilot's logger -- w/ a 'logs_dir', it writes (like the real pilot's
+    stderr) to '<logs_dir>/pilot-<id>.err', for 'analyze_ewms.py'.
+    """
+    logger = logging.getLogger(f"fake_pilot.{pilot_id}")
+    if logs_dir:
+        handler = logging.FileHandler(logs_dir / f"pilot-{pilot_id:04d}.err")
+        handler.setFormatter(
+            logging.Formatter(
+                "%(asctime)s.%(msecs)03d [%(levelname)8s] %(name)s[%(process)d] "
+                "%(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+        )
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    else:
+        logger.setLevel(logging.DEBUG)  # -> not shown by the root logger (INFO)
+    return logger
+
+
+def _run_task_inprocess(task_env: dict[str, str], infile: str, outfile: str) -> int:
+    """Run 'task.main' in this (pool) process -- returns a return code."""
+    os.environ.update(task_env)
+    os.environ["EWMS_TASK_INFILE"] = infile
+    os.environ["EWMS_TASK_OUTFILE"] = outfile
+    import task
+
+    try:
+        task.main(**task.get_main_kwargs_from_env())
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        LOGGER.exception("task raised an exception")
+        return 1
+    return 0
+
+
+async def run_pilot(
+    pilot_id: int,
+    in_queue: LocalQueue,
+    out_queue: LocalQueue,
+    task_env: dict[str, str],
+    pool: ProcessPoolExecutor | None,
+    logs_dir: Path | None,
+    stats: PilotStats,
+) -> None:
+    """Consume input events one at a time, run the task on each, & send its output."""
+    logger = make_pilot_logger(pilot_id, logs_dir)
+    workdir = Path(tempfile.mkdtemp(prefix=f"fake-pilot-{pilot_id}-"))
+    env = {**os.environ, **task_env, "EWMS_TASK_DATA_HUB_DIR": str(workdir)}
+
+    async with (
+        in_queue.open_sub_manual_acking() as sub,
+        out_queue.open_pub() as pub,
+    ):
+        n = 0
+        async for msg in sub.iter_messages():
+            n += 1
+            infile, outfile = workdir / f"in-{n}.txt", workdir / f"out-{n}.txt"
+            infile.write_text(str(msg.data))  # like the pilot, for str messages
+            logger.info(f"Got a task to process (#{n}): {msg.data}")
+
+            if pool:
+                rc = await asyncio.get_running_loop().run_in_executor(
+                    pool, _run_task_inprocess, env, str(infile), str(outfile)
+                )
+            else:
+                proc = await asyncio.create_subprocess_exec(
+                    sys.executable,
+                    str(TASK_PY),
+                    env={
+                        **env,
+                        "EWMS_TASK_INFILE": str(infile),
+                        "EWMS_TASK_OUTFILE": str(outfile),
+                    },
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                rc = await proc.wait()
+            logger.info(f"task return code: {rc}")
+
+            if rc:
+                stats.n_failed += 1
+                await sub.nack(msg)
+            else:
+                logger.info("TASK FINISHED -- attempting to send output-event")
+                await pub.send(outfile.read_text())
+                logger.info("Now, attempting to ack input-event message")
+                await sub.ack(msg)
+                stats.n_ok += 1
+            infile.unlink(missing_ok=True)
+            outfile.unlink(missing_ok=True)
+
+    logger.info(f"no messages for {in_queue.timeout}s -- done after {n} tasks")
+
+
+async def run_pilots(
+    rc: RestClient,
+    workflow_id: str,
+    n_pilots: int,
+    task_mode: str,
+    queue_timeout: int,
+    logs_dir: Path | None,
+) -> PilotStats:
+    """Run the fake-pilot pool on the workflow, until its input queue goes quiet."""
+    request = await rc.request("GET", f"/local/workflows/{workflow_id}/request")
+    task_env = {k: str(v) for k, v in request["tasks"][0]["task_env"].items()}
+
+    mqprofiles, _ = await ewms_client.wait_for_activation(rc, workflow_id)
+    queues = {}
+    for alias in ["input-queue", "output-queue"]:
+        profile = next(p for p in mqprofiles if p["alias"] == alias)
+        queues[alias] = ewms_client.queue_from_mqprofile(profile)
+        queues[alias].timeout = queue_timeout
+    if logs_dir:
+        logs_dir.mkdir(parents=True, exist_ok=True)
+
+    stats = PilotStats()
+    pool = ProcessPoolExecutor(n_pilots) if task_mode == "inprocess" else None
+    try:
+        await asyncio.gather(
+            *[
+                run_pilot(
+                    i,
+                    queues["input-queue"],
+                    queues["output-queue"],
+                    task_env,
+                    pool,
+                    logs_dir,
+                    stats,
+                )
+                for i in range(n_pilots)
+            ]
+        )
+    finally:
+        if pool:
+            pool.shutdown()
+    return stats
+
+
+########################################################################################
+
+
+async def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="A local stand-in for EWMS's REST API & message broker, "
+        "plus a fake-pilot pool.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="run the stand-in server")
+    serve_parser.add_argument("--host", default="localhost", help="bind address")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port")
+    serve_parser.add_argument(
+        "--activation-delay",
+        type=float,
+        default=0.0,
+        help="seconds after a workflow's request until its queues are activated",
+    )
+    serve_parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=DEFAULT_LEASE_TIMEOUT,
+        help="seconds until an un-acked message is redelivered",
+    )
+
+    pilots_parser = subparsers.add_parser("pilots", help="run a fake-pilot pool")
+    pilots_parser.add_argument("workflow_id", help="the (local) workflow id")
+    pilots_parser.add_argument(
+        "--n-pilots",
+        type=int,
+        default=os.cpu_count(),
+        help="number of concurrent pilots (each runs one task at a time)",
+    )
+    pilots_parser.add_argument(
+        "--task-mode",
+        choices=["subprocess", "inprocess"],
+        default="subprocess",
+        help="run each task as a new python process (like the pilot), or call "
+        "'task.main' in a pool process (for higher throughput)",
+    )
+    pilots_parser.add_argument(
+        "--queue-timeout",
+        type=int,
+        default=DEFAULT_QUEUE_TIMEOUT,
+        help="a pilot quits after this many seconds w/o an input message",
+    )
+    pilots_parser.add_argument(
+        "--logs-dir",
+        type=Path,
+        default=None,
+        help="write each pilot's log here (for 'analyze_ewms.py')",
+    )
+    ewms_client.add_connection_args(pilots_parser)
+
+    args = parser.parse_args()
+    LOGGER.info(args)
+
+    if args.command == "serve":
+        await serve(
+            args.host,
+            args.port,
+            LocalState(args.activation_delay, args.lease_timeout),
+        )
+    else:
+        stats = await run_pilots(
+            ewms_client.connect(args),
+            args.workflow_id,
+            args.n_pilots,
+            args.task_mode,
+            args.queue_timeout,
+            args.logs_dir,
+        )
+        LOGGER.info(f"fake pilots: {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    LOGGER.info("Done.")
@@ -0,0 +1,172 @@
+"""The client side of the local EWMS stand-in -- a drop-in for 'mqclient.Queue''s
+pub/sub interface, over the stand-in server's queue routes (see 'local_ewms.py').
+
+Kept apart from the server & fake pilots, so 'ewms_client' can import it directly.
+"""
+
+import contextlib
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from rest_tools.client import RestClient
+
+BROKER_TYPE = "local"
+
+MAX_LONG_POLL = 20.0  # seconds -- a lease request waits at most this long
+DEFAULT_QUEUE_TIMEOUT = 60  # seconds -- like 'mqclient.Queue.timeout'
+DEFAULT_PREFETCH = 1
+
+
+@dataclass
+class LocalMessage:
+    """A leased message (like 'mqclient.broker_client_interface.Message')."""
+
+    msg_id: int
+    data: Any
+
+
+class LocalPub:
+    """Like 'mqclient.queue.QueuePubResource'."""
+
+    def __init__(self, rc: RestClient, mqid: str) -> None:
+        self.rc = rc
+        self.mqid = mqid
+
+    async def send(self, data: Any) -> None:
+        """Send a message (data must be JSON serializable)."""
+        await self.rc.request(
+            "POST", f"/local/mqs/{self.mqid}/messages", {"messages": [data]}
+        )
+
+
+class LocalManualSub:
+    """Like 'mqclient.queue.ManualQueueSubResource'."""
+
+    def __init__(self, queue: "LocalQueue", rc: RestClient) -> None:
+        self.queue = queue
+        self.rc = rc
+        self._buffer: deque[LocalMessage] = deque()
+
+    async def _get(self) -> LocalMessage | None:
+        """Get the next message, or None after 'queue.timeout' seconds w/o one."""
+        deadline = time.monotonic() + self.queue.timeout
+        while not self._buffer:
+            if (remaining := deadline - time.monotonic()) <= 0:
+                return None
+            resp = await self.rc.request(
+                "POST",
+                f"/local/mqs/{self.queue.name}/lease",
+                {"max": self.queue.prefetch, "timeout": remaining},
+            )
+            self._buffer.extend(
+                LocalMessage(m["id"], m["data"]) for m in resp["messages"]
+            )
+        return self._buffer.popleft()
+
+    async def iter_messages(self) -> AsyncIterator[LocalMessage]:
+        """Yield messages until 'queue.timeout' seconds w/o one."""
+        while msg := await self._get():
+            yield msg
+
+    async def ack(self, msg: LocalMessage) -> None:
+        """Ack the message."""
+        await self.rc.request(
+            "POST", f"/local/mqs/{self.queue.name}/settle", {"acks": [msg.msg_id]}
+        )
+
+    async def nack(self, msg: LocalMessage) -> None:
+        """Nack the message -- it's redelivered."""
+        await self.rc.request(
+            "POST", f"/local/mqs/{self.queue.name}/settle", {"nacks": [msg.msg_id]}
+        )
+
+    async def release_buffered(self) -> None:
+        """Nack the prefetched (un-yielded) messages."""
+        if self._buffer:
+            nacks = [m.msg_id for m in self._buffer]
+            self._buffer.clear()
+            await self.rc.request(
+                "POST", f"/local/mqs/{self.queue.name}/settle", {"nacks": nacks}
+            )
+
+
+class LocalSub:
+    """Like 'mqclient.queue.QueueSubResource': iterating yields each message's
+    data, acking the previous one; an exception in the 'async with' block nacks
+    the current one (and is re-raised).
+    """
+
+    def __init__(self, queue: "LocalQueue") -> None:
+        self.queue = queue
+        self._sub: LocalManualSub | None = None
+        self._current: LocalMessage | None = None
+
+    async def __aenter__(self) -> "LocalSub":
+        self._sub = LocalManualSub(self.queue, self.queue.make_rest_client())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        assert self._sub
+        if self._current:
+            if exc_type:
+                await self._sub.nack(self._current)
+            else:
+                await self._sub.ack(self._current)
+            self._current = None
+        await self._sub.release_buffered()
+
+    def __aiter__(self) -> "LocalSub":
+        return self
+
+    async def __anext__(self) -> Any:
+        assert self._sub
+        if self._current:
+            await self._sub.ack(self._current)
+            self._current = None
+        if not (msg := await self._sub._get()):
+            raise StopAsyncIteration
+        self._current = msg
+        return msg.data
+
+
+class LocalQueue:
+    """A drop-in for 'mqclient.Queue''s pub/sub interface, served by 'local_ewms'."""
+
+    def __init__(
+        self,
+        address: str,
+        name: str,
+        prefetch: int = DEFAULT_PREFETCH,
+        timeout: int = DEFAULT_QUEUE_TIMEOUT,
+    ) -> None:
+        self.address = address
+        self.name = name
+        self.prefetch = prefetch
+        self.timeout = timeout
+
+    def make_rest_client(self) -> RestClient:
+        """Make a rest client for the queue's server."""
+        return RestClient(self.address, timeout=MAX_LONG_POLL + 30, retries=3)
+
+    @contextlib.asynccontextmanager
+    async def open_pub(self) -> AsyncIterator[LocalPub]:
+        """Open a publishing resource."""
+        yield LocalPub(self.make_rest_client(), self.name)
+
+    def open_sub(self) -> LocalSub:
+        """Open a subscribing resource (auto-acking)."""
+        return LocalSub(self)
+
+    @contextlib.asynccontextmanager
+    async def open_sub_manual_acking(self) -> AsyncIterator[LocalManualSub]:
+        """Open a subscribing resource, w/ explicit acks & nacks."""
+        sub = LocalManualSub(self, self.make_rest_client())
+        try:
+            yield sub
+        finally:
+            await sub.release_buffered()
+
+    def __repr__(self) -> str:
+        return f"LocalQueue({self.address!r}, name={self.name!r})"
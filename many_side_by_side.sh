@@ -1,43 +1,32 @@
 #!/bin/bash
 set -euo pipefail
 
+########################################################################################################################
+# Run side-by-side pairs for every 'runs_*' dir -- see campaign.py (one long-lived process for the whole campaign)
+########################################################################################################################
+
 # Check for required argument
 if [[ $# -lt 1 ]]; then
-    echo "Usage: $0 <BENCHMARK_TAG>"
+    echo "Usage: $0 <BENCHMARK_TAG> [PAIR...]  (default pair: A)"
     exit 1
 fi
 
 export BENCHMARK_TAG="$1"
+shift
 
-# Base directory containing runs_*
-base_dir="/scratch/eevans/ewms-benchmarking"
+readonly SCRATCH_DIR="/scratch/eevans"
 img="/cvmfs/icecube.opensciencegrid.org/containers/ewms/observation-management-service/ewms-condor-benchmarking:main-$BENCHMARK_TAG"
 
-wait_for_no_jobs() {
-    # waits for there to be no 'ewms'-user jobs
-    while condor_q ewms -format '%d\n' ClusterId | read -r _; do
-        echo "[WAIT] ewms has submitted Condor jobs. Waiting..."
-        sleep 1800 # 30 mins
-    done
-}
-
-# for each 'runs_*' dir:
-for runs_dir in "${base_dir}"/runs_*; do
-
-    if [[ -d $runs_dir ]]; then
-        echo "Processing $runs_dir"
-        cd "$runs_dir"
-
-        # for each side-by-side flavor
-        # not testing B -- the 1% fail
-        # just test A -- later change if time
-        for X in A; do
-            echo "  Next up is $X"
-            wait_for_no_jobs
-            echo "  Running $img/app/run_side_by_side.sh $X in $runs_dir"
-            "$img"/app/run_side_by_side.sh "$X"
-        done
-
-    fi
+# the campaign submits & polls condor, so it runs on the host (like the condor calls always have),
+# from the image's code -- w/ a host python that has 'requirements.txt' installed (e.g., a venv)
+python="${CAMPAIGN_PYTHON:-python3}"
+if ! "$python" -c 'import mqclient, numpy, rest_tools' 2>/dev/null; then
+    echo "Error: $python is missing the requirements -- set CAMPAIGN_PYTHON (pip install -r $img/app/requirements.txt)" >&2
+    exit 1
+fi
 
-done
+# not testing B -- the 1% fail
+# just test A -- later change if time
+"$python" "$img"/app/campaign.py \
+    --base-dir "${SCRATCH_DIR%/}/ewms-benchmarking" \
+    "${@:-A}"
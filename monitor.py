@@ -0,0 +1,389 @@
+"""Live progress & throughput telemetry for a side-by-side run.
+
+Follows, in one process w/ bounded memory:
+
+- classical: the DAG's per-node job event logs (see 'DAGBuilder.write_submit_file'),
+  incrementally -- each job's tasks count as done when it terminates OK
+- EWMS: the workflow's output queue (like 'ewms_external_drain_outputs.py' --
+  NOTE: this consumes the output messages, so don't run both)
+
+and keeps each side's done count, rolling throughput (tasks/s), in-flight
+count, & ETA -- written periodically as a Prometheus textfile and/or served
+at 'http://<host>:<port>/metrics'.
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from mqclient.queue import Queue
+
+import analyze_classical
+import ewms_client
+import ewms_external_drain_outputs
+from event_records import RECORD_DTYPE
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_WINDOW = 300  # seconds
+DEFAULT_INTERVAL = 15.0  # seconds
+DEFAULT_EWMS_IDLE_TIMEOUT = 60 * 60  # seconds
+
+TPJ_FROM_DIRNAME_RE = re.compile(r"TPJ_(\d+)")
+
+
+class RollingRate:
+    """A count's rate over the last 'window' seconds -- w/ per-second buckets, so
+    memory is bounded by the window (not the number of events).
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.buckets: deque[list[int]] = deque()  # [epoch second, count]
+
+    def add(self, ts: float, n: int = 1) -> None:
+        """Count 'n' at time 'ts' (in about time order)."""
+        sec = int(ts)
+        if self.buckets and self.buckets[-1][0] >= sec:
+            self.buckets[-1][1] += n  # (late arrivals go in the latest bucket)
+        else:
+            self.buckets.append([sec, n])
+        self._expire(time.time())
+
+    def _expire(self, now: float) -> None:
+        while self.buckets and self.buckets[0][0] <= now - self.window:
+            self.buckets.popleft()
+
+    def rate(self) -> float:
+        """Get the rate (per second) over the window."""
+        self._expire(time.time())
+        return sum(n for _, n in self.buckets) / self.window
+
+
+@dataclass
+class SideStats:
+    """One system's live stats."""
+
+    system: str
+    n_total: int
+    window: int
+    n_done: int = 0
+    n_failed: int = 0  # classical: failed job attempts (its tasks are retried)
+    in_flight: float = math.nan  # tasks
+    rolling: RollingRate = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.rolling = RollingRate(self.window)
+
+    def eta(self) -> float:
+        """Seconds until all tasks are done, at the rolling rate."""
+        if (remaining := max(self.n_total - self.n_done, 0)) == 0:
+            return 0.0
+        rate = self.rolling.rate()
+        return remaining / rate if rate else math.inf
+
+    def prometheus_lines(self) -> list[str]:
+        """Get the stats in the Prometheus text format."""
+        label = f'system="{self.system}"'
+        return [
+            f"benchmark_tasks_done_total{{{label}}} {self.n_done}",
+            f"benchmark_tasks_total{{{label}}} {self.n_total}",
+            f"benchmark_failed_attempts_total{{{label}}} {self.n_failed}",
+            f'benchmark_tasks_per_second{{{label},window="{self.window}"}} '
+            f"{self.rolling.rate()}",
+            f"benchmark_tasks_in_flight{{{label}}} {_prom_float(self.in_flight)}",
+            f"benchmark_eta_seconds{{{label}}} {_prom_float(self.eta())}",
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.system}: {self.n_done}/{self.n_total} done "
+            f"({self.rolling.rate():.2f} tasks/s, in-flight {self.in_flight:.0f}, "
+            f"ETA {self.eta():.0f}s)"
+        )
+
+
+def _prom_float(x: float) -> str:
+    if math.isnan(x):
+        return "NaN"
+    if math.isinf(x):
+        return "+Inf" if x > 0 else "-Inf"
+    return repr(x)
+
+
+########################################################################################
+# classical
+
+
+class ClassicalTail:
+    """Follow the DAG's job event logs (per-node or shared), incrementally."""
+
+    def __init__(self, dag_dir: Path, glob: str, tasks_per_job: int) -> None:
+        self.dag_dir = dag_dir
+        self.glob = glob
+        self.tasks_per_job = tasks_per_job
+        self.offsets: dict[str, int] = {}  # of the logs that may still grow
+        self.finished: set[str] = set()  # per-node logs whose job terminated OK
+        self.n_executing = 0
+        self.year = datetime.now().year
+
+    def poll(self, stats: SideStats) -> None:
+        """Read any new events from the logs & update the stats."""
+        with os.scandir(self.dag_dir) as it:
+            for entry in it:
+                if entry.name in self.finished or not Path(entry.name).match(self.glob):
+                    continue
+                if entry.name.endswith(analyze_classical.DAGMAN_OWN_LOG_SUFFIXES):
+                    continue
+                offset = self.offsets.get(entry.name, 0)
+                if entry.stat().st_size > offset:
+                    self._read(entry.name, offset, stats)
+        stats.in_flight = self.n_executing * self.tasks_per_job
+
+    def _read(self, name: str, offset: int, stats: SideStats) -> None:
+        with open(self.dag_dir / name, "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+        # only whole events (each ends w/ a "..." line) -- the rest is re-read later
+        end = chunk.rfind(b"\n...\n")
+        if end == -1:
+            return
+        self.offsets[name] = offset + end + len(b"\n...\n")
+
+        for event in chunk[:end].decode(errors="replace").split("\n...\n"):
+            header, _, body = event.lstrip("\n").partition("\n")
+            if not (m := analyze_classical.EVENT_HEADER_RE.match(header)):
+                continue
+            if m[1] == analyze_classical.EXECUTE:
+                self.n_executing += 1
+            elif m[1] in analyze_classical.ATTEMPT_ENDING_EVENTS:
+                # NOTE: a held job that's released w/o executing was never counted
+                self.n_executing = max(self.n_executing - 1, 0)
+                ts = analyze_classical.parse_timestamp(m[4], self.year)
+                rv = analyze_classical.RETURN_VALUE_RE.search(body)
+                if m[1] == analyze_classical.TERMINATED and rv and rv[1] == "0":
+                    stats.n_done += self.tasks_per_job
+                    stats.rolling.add(ts, self.tasks_per_job)
+                    # per-node log: its job is done (a shared log keeps going)
+                    if analyze_classical.NODE_FROM_FNAME_RE.search(name):
+                        self.finished.add(name)
+                        self.offsets.pop(name, None)
+                        return
+                    continue
+                stats.n_failed += 1
+
+
+async def follow_classical(
+    tail: ClassicalTail, stats: SideStats, interval: float
+) -> None:
+    """Poll the classical logs until all the tasks are done."""
+    while True:
+        await asyncio.to_thread(tail.poll, stats)
+        if stats.n_done >= stats.n_total:
+            LOGGER.info("classical: all tasks done -- stopped following")
+            return
+        await asyncio.sleep(interval)
+
+
+########################################################################################
+# EWMS
+
+
+def count_send_records(send_records: Path) -> int:
+    """Count the records in 'ewms_external.py --send-records' file(s), incl. shards."""
+    fpaths = [send_records, *send_records.parent.glob(f"{send_records.name}.*")]
+    return sum(p.stat().st_size // RECORD_DTYPE.itemsize for p in fpaths if p.exists())
+
+
+async def follow_ewms(
+    queue: Queue,
+    stats: SideStats,
+    send_records: Path | None,
+) -> None:
+    """Consume the output queue until it's idle for 'queue.timeout' seconds."""
+    async with queue.open_sub() as sub:
+        async for msg in sub:
+            n = len(ewms_external_drain_outputs.parse_message(msg))
+            stats.n_done += n
+            stats.rolling.add(time.time(), n)
+            if send_records:
+                stats.in_flight = count_send_records(send_records) - stats.n_done
+    LOGGER.info(f"EWMS output queue idle for {queue.timeout}s -- stopped following")
+
+
+########################################################################################
+# output
+
+
+def render(sides: list[SideStats]) -> str:
+    """Get all the stats in the Prometheus text format."""
+    return "\n".join(line for s in sides for line in s.prometheus_lines()) + "\n"
+
+
+def write_textfile(fpath: Path, sides: list[SideStats]) -> None:
+    """Write the stats atomically (for node-exporter's textfile collector, etc.)."""
+    tmp = fpath.with_suffix(".tmp")
+    tmp.write_text(render(sides))
+    tmp.replace(fpath)
+
+
+def serve_http(host: str, port: int, sides: list[SideStats]) -> ThreadingHTTPServer:
+    """Serve the stats at '/metrics', in a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render(sides).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:  # type: ignore[no-untyped-def]
+            pass  # no per-scrape logging
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    LOGGER.info(f"serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+async def report(
+    sides: list[SideStats], textfile: Path | None, interval: float
+) -> None:
+    """Log (& write) the stats every 'interval' seconds, until cancelled (then, once
+    more).
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            LOGGER.info(" | ".join(str(s) for s in sides))
+            if textfile:
+                write_textfile(textfile, sides)
+    finally:
+        LOGGER.info(" | ".join(str(s) for s in sides))
+        if textfile:
+            write_textfile(textfile, sides)
+
+
+########################################################################################
+
+
+async def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="Live progress & throughput telemetry for a side-by-side run.",
+    )
+    parser.add_argument(
+        "--n-tasks",
+        required=True,
+        type=int,
+        help="the number of tasks (per system) -- for the ETAs",
+    )
+    parser.add_argument(
+        "--classical-dir",
+        type=Path,
+        default=None,
+        help="the classical DAG's directory (where its job event logs are written)",
+    )
+    parser.add_argument(
+        "--tasks-per-job",
+        type=int,
+        default=None,
+        help="the classical DAG's tasks per job (default: from the dir's name)",
+    )
+    parser.add_argument(
+        "--workflow-id",
+        default=None,
+        help="the EWMS workflow id -- follows its output queue",
+    )
+    parser.add_argument(
+        "--send-records",
+        type=Path,
+        default=None,
+        help="the send-records file from 'ewms_external.py --send-records' "
+        "-- for the EWMS in-flight count",
+    )
+    parser.add_argument(
+        "--ewms-idle-timeout",
+        type=int,
+        default=DEFAULT_EWMS_IDLE_TIMEOUT,
+        help="stop following the EWMS output queue after this many seconds w/o a message",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help="seconds of the rolling throughput",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="seconds between updates",
+    )
+    parser.add_argument(
+        "--textfile",
+        type=Path,
+        default=None,
+        help="write the metrics to this file (Prometheus text format) every update",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="serve the metrics at 'http://<host>:<port>/metrics'",
+    )
+    parser.add_argument("--host", default="localhost", help="with --port")
+    ewms_client.add_connection_args(parser)
+    args = parser.parse_args()
+    if not (args.classical_dir or args.workflow_id):
+        parser.error("give --classical-dir and/or --workflow-id")
+    LOGGER.info(args)
+
+    sides: list[SideStats] = []
+    followers = []
+    if args.classical_dir:
+        tpj = args.tasks_per_job
+        if tpj is None:
+            if not (m := TPJ_FROM_DIRNAME_RE.search(args.classical_dir.resolve().name)):
+                parser.error("can't tell the tasks per job -- give --tasks-per-job")
+            tpj = int(m[1])
+        sides.append(stats := SideStats("classical", args.n_tasks, args.window))
+        tail = ClassicalTail(args.classical_dir, analyze_classical.DEFAULT_GLOB, tpj)
+        followers.append(follow_classical(tail, stats, args.interval))
+    if args.workflow_id:
+        rc = ewms_client.connect(args)
+        queue = await ewms_external_drain_outputs.get_output_queue(rc, args.workflow_id)
+        queue.timeout = args.ewms_idle_timeout
+        sides.append(stats := SideStats("ewms", args.n_tasks, args.window))
+        followers.append(follow_ewms(queue, stats, args.send_records))
+
+    if args.port is not None:
+        serve_http(args.host, args.port, sides)
+    reporter = asyncio.create_task(report(sides, args.textfile, args.interval))
+    await asyncio.gather(*followers)
+    reporter.cancel()
+    try:
+        await reporter
+    except asyncio.CancelledError:
+        pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    LOGGER.info("Done.")
@@ -0,0 +1,144 @@
+"""Each run's share of the pool over time -- for concurrent pairs (see 'campaign.py').
+
+Takes the analyzers' NPZs ('analyze_classical.py' / 'analyze_ewms.py', see
+'run_metrics.py') and samples each run's executing attempts on a common time
+grid. A run's share at a time is its count over all the runs' counts (or over
+'--pool-slots', the pool's size, if known).
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+import run_metrics
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+OUTPUT_FNAME = "pool_share.npz"
+
+
+def parse_run_arg(arg: str) -> tuple[str | None, Path]:
+    """Parse 'LABEL=NPZ' or 'NPZ' (no label)."""
+    label, sep, fpath = arg.rpartition("=")
+    return (label if sep else None), Path(fpath)
+
+
+def pool_share(
+    runs: dict[str, run_metrics.Attempts],
+    step: float,
+    pool_slots: int | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the time grid, each run's concurrency (runs x times), & each run's share."""
+    starts = np.concatenate([a.start for a in runs.values()])
+    ends = np.concatenate([a.end for a in runs.values()])
+    t = np.arange(np.nanmin(starts), np.nanmax(ends) + step, step)
+
+    concurrency = np.stack(
+        [run_metrics.concurrency_at(a.start, a.end, t) for a in runs.values()]
+    )
+    denom = (
+        np.full(t.shape, pool_slots, dtype=np.float64)
+        if pool_slots
+        else concurrency.sum(axis=0).astype(np.float64)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(denom > 0, concurrency / denom, np.nan)
+    return t, concurrency, share
+
+
+def summarize(
+    labels: list[str],
+    concurrency: np.ndarray,
+    share: np.ndarray,
+) -> dict[str, dict[str, float]]:
+    """Summarize each run's share: overall, while active, & while contended.
+
+    "Contended" is when 2+ runs are executing -- there, Jain's fairness index
+    (1 = equal shares) is also given.
+    """
+    n_active = (concurrency > 0).sum(axis=0)
+    contended = n_active >= 2
+    summary: dict[str, dict[str, float]] = {}
+    for i, label in enumerate(labels):
+        active = concurrency[i] > 0
+        summary[label] = {
+            "peak_concurrency": int(concurrency[i].max()),
+            "share_mean": float(np.nanmean(share[i])),
+            "share_mean_while_active": (
+                float(np.nanmean(share[i][active])) if active.any() else np.nan
+            ),
+            "share_mean_while_contended": (
+                float(np.nanmean(share[i][contended])) if contended.any() else np.nan
+            ),
+        }
+
+    if contended.any():
+        x = concurrency[:, contended].astype(np.float64)
+        jain = x.sum(axis=0) ** 2 / (len(labels) * (x**2).sum(axis=0))
+        summary["_all"] = {
+            "contended_fraction": float(contended.mean()),
+            "jain_fairness_mean_while_contended": float(jain.mean()),
+        }
+    return summary
+
+
+def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="Compute each run's share of the pool over time, "
+        "from the analyzers' NPZs.",
+    )
+    parser.add_argument(
+        "runs",
+        nargs="+",
+        help="the runs' NPZs, each optionally labeled like 'LABEL=NPZ' "
+        "(default label: '<the NPZ's dir name>:<system>')",
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        default=run_metrics.TIMELINE_STEP,
+        help="seconds between samples",
+    )
+    parser.add_argument(
+        "--pool-slots",
+        type=int,
+        default=None,
+        help="the pool's size -- shares are of it, instead of the runs' total",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path(OUTPUT_FNAME),
+        help="output NPZ file",
+    )
+    args = parser.parse_args()
+
+    runs = {}
+    for arg in args.runs:
+        label, fpath = parse_run_arg(arg)
+        attempts, metrics, _ = run_metrics.load_npz(fpath)
+        label = label or f"{fpath.parent.name}:{metrics['system']}"
+        if label in runs:
+            raise ValueError(f"duplicate label: {label} (use 'LABEL=NPZ')")
+        runs[label] = attempts
+
+    t, concurrency, share = pool_share(runs, args.step, args.pool_slots)
+    np.savez_compressed(
+        args.output,
+        labels=np.asarray(list(runs)),
+        t=t,
+        concurrency=concurrency,
+        share=share,
+    )
+    print(json.dumps(summarize(list(runs), concurrency, share), indent=4))
+    LOGGER.info(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
+    LOGGER.info("Done.")
@@ -0,0 +1,16 @@
+"""Small process helpers shared by the task & the drivers (stdlib only)."""
+
+import os
+
+
+def get_process_age() -> float | None:
+    """Get how long ago (seconds) this process started, if known (Linux only)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # the fields after the executable's name (which may have spaces)
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
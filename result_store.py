@@ -0,0 +1,281 @@
+"""An indexed store of benchmark results, across runs & campaigns.
+
+One SQLite row per analyzed run (a pair's classical or EWMS side), keyed by
+its 'runs_*' dir, pair id, & system, w/ the pair's 'TestVars' & the run's
+metrics (as JSON) -- the per-run columnar tables stay in the analyzers' NPZs
+(see 'run_metrics.py'), referenced by path. So, cross-campaign queries don't
+re-parse any logs:
+
+    python result_store.py results.sqlite ingest /scratch/.../ewms-benchmarking
+    python result_store.py results.sqlite ratio --by TASK_RUNTIME
+
+Rows are added by the analyzers ('--store') or by 'ingest', which scans the
+'runs_*' dirs' 'index.json' for (new or changed) analyzer NPZs:
+
+    <runs_dir>/<classical DAG dir>/classical_analysis.npz
+    <runs_dir>/pair_<pair_id>/ewms_analysis.npz  (the workers' logs dir)
+
+-- the EWMS side by pair (its dir, like 'campaign.py''s), since pairs may share an
+EWMS request JSON.
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+CLASSICAL = "classical"
+EWMS = "ewms"
+
+# the analyzers' default output fnames (see 'analyze_classical.py' & 'analyze_ewms.py')
+NPZ_FNAMES = {
+    CLASSICAL: "classical_analysis.npz",
+    EWMS: "ewms_analysis.npz",
+}
+PAIR_DIR_FMT = "pair_{}"  # each pair's own dir (see 'campaign.py')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    runs_dir      TEXT NOT NULL,
+    pair_id       TEXT NOT NULL,
+    system        TEXT NOT NULL,
+    name          TEXT NOT NULL,  -- the classical DAG dir or EWMS request JSON
+    test_vars     TEXT NOT NULL,  -- JSON
+    metrics       TEXT NOT NULL,  -- JSON (see 'run_metrics.RunMetrics')
+    extras        TEXT NOT NULL,  -- JSON (the analyzer's system-only metrics)
+    npz_path      TEXT NOT NULL,
+    npz_mtime_ns  INTEGER NOT NULL,
+    ingested_at   REAL NOT NULL,
+    PRIMARY KEY (runs_dir, pair_id, system)
+);
+CREATE INDEX IF NOT EXISTS runs_by_pair ON runs (runs_dir, pair_id);
+"""
+
+
+def load_npz_metrics(npz_path: Path) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Load just the metrics & extras from an analyzer NPZ (not the attempts)."""
+    with np.load(npz_path) as npz:  # lazy -- only the read members are loaded
+        metrics = json.loads(str(npz["metrics_json"]))
+        extras = (
+            json.loads(str(npz["extra_metrics_json"]))
+            if "extra_metrics_json" in npz.files
+            else {}
+        )
+    return metrics, extras
+
+
+def find_pair(runs_dir: Path, **match: str) -> dict[str, Any]:
+    """Find the pair in the runs dir's 'index.json' (see 'test_suite_builder.py'),
+    by any of its fields -- e.g. 'pair_id', 'classical', or 'ewms_json'.
+    """
+    with open(runs_dir / "index.json") as f:
+        pairs = json.load(f)["pairs"]
+    try:
+        return next(p for p in pairs if all(p[k] == v for k, v in match.items()))
+    except StopIteration:
+        raise ValueError(f"no pair matching {match} in {runs_dir / 'index.json'}")
+
+
+def get_pair_dir(runs_dir: Path, pair_id: str) -> Path:
+    """Get the pair's own dir -- where its EWMS workers' logs & NPZ go."""
+    return runs_dir / PAIR_DIR_FMT.format(pair_id)
+
+
+def parse_pair_dir(pair_dir: Path) -> tuple[Path, str]:
+    """Get the runs dir & pair id from a pair's own dir (see 'get_pair_dir()')."""
+    pair_dir = pair_dir.resolve()
+    prefix = PAIR_DIR_FMT.format("")
+    if not pair_dir.name.startswith(prefix):
+        raise ValueError(f"not a pair's dir ('{prefix}<pair_id>'): {pair_dir}")
+    return pair_dir.parent, pair_dir.name.removeprefix(prefix)
+
+
+def _sort_key(item: tuple[Any, Any]) -> tuple[bool, Any]:
+    """Sort numbers numerically, others (e.g. lists, as JSON) as strings."""
+    value = item[0]
+    return (
+        not isinstance(value, (int, float)),
+        value if isinstance(value, (int, float)) else str(value),
+    )
+
+
+class ResultStore:
+    """The SQLite store -- use as a context manager (commits on exit)."""
+
+    def __init__(self, fpath: Path) -> None:
+        self.conn = sqlite3.connect(fpath)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        if exc_type is None:
+            self.conn.commit()
+        self.conn.close()
+
+    def is_current(self, runs_dir: Path, pair_id: str, system: str, npz: Path) -> bool:
+        """Is the run already stored, from this (unchanged) NPZ?"""
+        row = self.conn.execute(
+            "SELECT npz_path, npz_mtime_ns FROM runs "
+            "WHERE runs_dir = ? AND pair_id = ? AND system = ?",
+            (str(runs_dir.resolve()), pair_id, system),
+        ).fetchone()
+        return row == (str(npz.resolve()), npz.stat().st_mtime_ns)
+
+    def add(
+        self,
+        runs_dir: Path,
+        pair: dict[str, Any],
+        system: str,
+        npz: Path,
+    ) -> None:
+        """Add (or replace) the run -- 'pair' is its entry in 'index.json'."""
+        metrics, extras = load_npz_metrics(npz)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(runs_dir.resolve()),
+                pair["pair_id"],
+                system,
+                pair["classical"] if system == CLASSICAL else pair["ewms_json"],
+                # (w/ any DAGMan tuning -- so, it can be grouped/queried by too)
+                json.dumps({**pair["test_vars"], **pair.get("dagman", {})}),
+                json.dumps(metrics),
+                json.dumps(extras),
+                str(npz.resolve()),
+                npz.stat().st_mtime_ns,
+                time.time(),
+            ),
+        )
+        LOGGER.info(f"stored {runs_dir.name}/{pair['pair_id']}/{system}: {npz}")
+
+    def ingest(self, base_dir: Path) -> int:
+        """Add every new/changed analyzer NPZ under the base dir's 'runs_*' dirs --
+        returns the number added.
+        """
+        n = 0
+        for runs_dir in sorted(base_dir.glob("runs_*")):
+            if not (runs_dir / "index.json").exists():
+                continue
+            with open(runs_dir / "index.json") as f:
+                pairs = json.load(f)["pairs"]
+            for pair in pairs:
+                for system, npz in [
+                    (CLASSICAL, runs_dir / pair["classical"] / NPZ_FNAMES[CLASSICAL]),
+                    (
+                        EWMS,
+                        get_pair_dir(runs_dir, pair["pair_id"]) / NPZ_FNAMES[EWMS],
+                    ),
+                ]:
+                    if not npz.exists():
+                        continue
+                    if self.is_current(runs_dir, pair["pair_id"], system, npz):
+                        continue
+                    self.add(runs_dir, pair, system, npz)
+                    n += 1
+        return n
+
+    def iter_pairs(self) -> Iterator[tuple[str, str, dict, dict, dict]]:
+        """Yield (runs dir, pair id, test vars, classical metrics, EWMS metrics) per
+        pair w/ both systems stored.
+        """
+        rows = self.conn.execute(
+            "SELECT c.runs_dir, c.pair_id, c.test_vars, c.metrics, e.metrics "
+            "FROM runs c JOIN runs e "
+            "ON c.runs_dir = e.runs_dir AND c.pair_id = e.pair_id "
+            "WHERE c.system = ? AND e.system = ? "
+            "ORDER BY c.runs_dir, c.pair_id",
+            (CLASSICAL, EWMS),
+        )
+        for runs_dir, pair_id, test_vars, classical, ewms in rows:
+            yield (
+                runs_dir,
+                pair_id,
+                json.loads(test_vars),
+                json.loads(classical),
+                json.loads(ewms),
+            )
+
+    def iter_ratios(
+        self,
+        by: str,
+        metric: str = "makespan",
+    ) -> Iterator[tuple[Any, float]]:
+        """Yield (the 'by' test var's value, EWMS/classical metric ratio) per pair."""
+        for _, _, test_vars, classical, ewms in self.iter_pairs():
+            if ewms.get(metric) is not None and classical.get(metric):
+                # (NaN metrics are stored as nulls)
+                yield test_vars.get(by), ewms[metric] / classical[metric]
+
+    def ratio_table(self, by: str, metric: str = "makespan") -> list[dict[str, Any]]:
+        """Summarize the EWMS/classical metric ratio, grouped by a test var."""
+        # keyed by the value as JSON -- values may be lists (e.g. WORKER_SPEED_FACTOR)
+        groups: dict[str, tuple[Any, list[float]]] = {}
+        for value, ratio in self.iter_ratios(by, metric):
+            groups.setdefault(json.dumps(value), (value, []))[1].append(ratio)
+        return [
+            {
+                by: value,
+                "n": len(ratios),
+                "mean": statistics.fmean(ratios),
+                "median": statistics.median(ratios),
+                "min": min(ratios),
+                "max": max(ratios),
+            }
+            for value, ratios in sorted(groups.values(), key=_sort_key)
+        ]
+
+
+def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="Store & query benchmark results across runs & campaigns.",
+    )
+    parser.add_argument("db", type=Path, help="the SQLite file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="add the new/changed analyzer NPZs under a base dir"
+    )
+    ingest_parser.add_argument(
+        "base_dir", type=Path, help="the directory containing the 'runs_*' dirs"
+    )
+
+    ratio_parser = subparsers.add_parser(
+        "ratio", help="the EWMS/classical metric ratio, by a test var"
+    )
+    ratio_parser.add_argument(
+        "--by", required=True, help="the TestVars field, e.g. TASK_RUNTIME"
+    )
+    ratio_parser.add_argument(
+        "--metric", default="makespan", help="the metric (see 'run_metrics.py')"
+    )
+
+    sql_parser = subparsers.add_parser("sql", help="run an ad-hoc query")
+    sql_parser.add_argument("query", help="e.g. 'SELECT COUNT(*) FROM runs'")
+
+    args = parser.parse_args()
+
+    with ResultStore(args.db) as store:
+        if args.command == "ingest":
+            LOGGER.info(f"added {store.ingest(args.base_dir)} runs")
+        elif args.command == "ratio":
+            print(json.dumps(store.ratio_table(args.by, args.metric), indent=4))
+        else:
+            for row in store.conn.execute(args.query):
+                print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
+    LOGGER.info("Done.")
@@ -0,0 +1,235 @@
+"""Shared columnar schema & metrics for analyzing classical and EWMS runs.
+
+Both analyzers reduce their raw inputs to a table of "attempts" -- one row per
+execution of a unit of work (a DAG node's job or an EWMS task) -- so that the
+same metrics are computed the same way for both systems.
+
+A classical unit (a DAG node) runs TASKS_PER_JOB tasks, while an EWMS unit is
+one task -- so the throughputs are counted in tasks ('tasks_per_unit'), which
+makes them comparable across the two.
+"""
+
+import json
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# columns of the attempts table
+ATTEMPT_COLUMNS = ("unit_id", "worker_id", "queued", "start", "end", "ok")
+
+TIMELINE_STEP = 10.0  # seconds
+
+
+@dataclass
+class Attempts:
+    """One row per execution attempt -- times are epoch seconds (NaN if unknown)."""
+
+    unit_id: np.ndarray  # str: DAG node name or EWMS event id
+    worker_id: np.ndarray  # str: execute slot/host or EWMS worker
+    queued: np.ndarray  # float: when the attempt became runnable
+    start: np.ndarray  # float: when the attempt started executing
+    end: np.ndarray  # float: when the attempt stopped executing
+    ok: np.ndarray  # bool: did the attempt succeed?
+
+    @staticmethod
+    def from_rows(rows: list[tuple[str, str, float, float, float, bool]]) -> "Attempts":
+        """Build from a list of rows ordered like 'ATTEMPT_COLUMNS'."""
+        cols = list(zip(*rows)) if rows else [()] * len(ATTEMPT_COLUMNS)
+        return Attempts(
+            unit_id=np.asarray(cols[0], dtype=str),
+            worker_id=np.asarray(cols[1], dtype=str),
+            queued=np.asarray(cols[2], dtype=np.float64),
+            start=np.asarray(cols[3], dtype=np.float64),
+            end=np.asarray(cols[4], dtype=np.float64),
+            ok=np.asarray(cols[5], dtype=bool),
+        )
+
+    def __len__(self) -> int:
+        return len(self.unit_id)
+
+
+@dataclass
+class RunMetrics:
+    """Metrics of one run -- same schema for classical and EWMS."""
+
+    system: str  # "classical" or "ewms"
+    tasks_per_unit: int  # a classical DAG node's TASKS_PER_JOB (EWMS: 1)
+    n_units: int
+    n_attempts: int
+    n_ok: int
+    n_tasks_ok: int  # successful tasks: 'n_ok' * 'tasks_per_unit'
+    n_retries: int  # attempts beyond the first, per unit
+    n_workers: int
+    t_first: float  # epoch
+    t_last: float  # epoch
+    makespan: float  # seconds
+    throughput: float  # successful tasks per second
+    goodput: float  # successful execution time / all execution time
+    queue_wait_p50: float
+    queue_wait_p90: float
+    queue_wait_p99: float
+    runtime_p50: float
+    runtime_p90: float
+    runtime_p99: float
+    runtime_max: float
+    per_worker_throughput_mean: float  # successful tasks per worker-hour
+    idle_gap_p50: float  # between consecutive attempts on the same worker
+    idle_gap_p90: float
+    idle_gap_total: float
+    peak_concurrency: int
+
+    def to_json(self) -> str:
+        """Dump to a JSON string (NaNs become nulls)."""
+        return json.dumps(
+            {
+                k: (None if isinstance(v, float) and math.isnan(v) else v)
+                for k, v in asdict(self).items()
+            },
+            indent=4,
+        )
+
+
+def _pct(arr: np.ndarray, q: float) -> float:
+    """Get a percentile, ignoring NaNs (NaN if empty)."""
+    arr = arr[~np.isnan(arr)]
+    return float(np.percentile(arr, q)) if arr.size else math.nan
+
+
+def concurrency_timeline(
+    start: np.ndarray,
+    end: np.ndarray,
+    step: float = TIMELINE_STEP,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get the number of concurrently-executing attempts, sampled every 'step' seconds."""
+    mask = ~np.isnan(start)
+    if not mask.any():
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    start, end = start[mask], end[mask]
+    # still executing (or unknown end) => count until the last known time
+    end = np.where(np.isnan(end), np.nanmax(np.append(end, start.max())), end)
+    t = np.arange(start.min(), end.max() + step, step)
+    return t, concurrency_at(start, end, t)
+
+
+def concurrency_at(start: np.ndarray, end: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Get the number of attempts executing at each time 't' (NaN starts are skipped;
+    NaN ends count as still executing).
+    """
+    mask = ~np.isnan(start)
+    start, end = start[mask], end[mask]
+    end = end[~np.isnan(end)]
+    n_started = np.searchsorted(np.sort(start), t, side="right")
+    n_ended = np.searchsorted(np.sort(end), t, side="right")
+    return (n_started - n_ended).astype(np.int64)
+
+
+def compute_metrics(
+    system: str,
+    attempts: Attempts,
+    t_first: float | None = None,
+    t_last: float | None = None,
+    tasks_per_unit: int = 1,
+) -> RunMetrics:
+    """Compute the run metrics from the attempts table.
+
+    't_first' / 't_last' override the makespan's endpoints (e.g. the EWMS
+    request time or the last output-message time); by default, these are
+    the earliest queued/start time and the latest successful end time.
+
+    'tasks_per_unit' scales the throughputs from units to tasks.
+    """
+    a = attempts
+    durations = a.end - a.start
+
+    if t_first is None:
+        t_first = float(np.nanmin(np.concatenate([a.queued, a.start])))
+    if t_last is None:
+        t_last = float(np.nanmax(a.end[a.ok])) if a.ok.any() else math.nan
+    makespan = t_last - t_first
+
+    n_units = len(np.unique(a.unit_id))
+    n_ok = int(len(np.unique(a.unit_id[a.ok])))
+
+    # goodput: useful slot-time over all slot-time
+    all_time = np.nansum(durations)
+    goodput = float(np.nansum(durations[a.ok]) / all_time) if all_time else math.nan
+
+    # per-worker: throughput over each worker's active span & idle gaps in between
+    order = np.lexsort((a.start, a.worker_id))
+    w, s, e, ok = a.worker_id[order], a.start[order], a.end[order], a.ok[order]
+    gaps = np.clip((s[1:] - e[:-1])[w[1:] == w[:-1]], 0, None)  # overlap => no gap
+    workers, first_idx = np.unique(w, return_index=True)
+    if len(w):
+        spans = np.fmax.reduceat(e, first_idx) - s[first_idx]
+        oks = np.add.reduceat(ok.astype(np.int64), first_idx)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per_worker = oks * tasks_per_unit / (spans / 3600)
+        per_worker = per_worker[np.isfinite(per_worker)]
+    else:
+        per_worker = np.empty(0)
+
+    _, counts = concurrency_timeline(a.start, a.end)
+
+    return RunMetrics(
+        system=system,
+        tasks_per_unit=tasks_per_unit,
+        n_units=n_units,
+        n_attempts=len(a),
+        n_ok=n_ok,
+        n_tasks_ok=n_ok * tasks_per_unit,
+        n_retries=len(a) - n_units,
+        n_workers=len(workers),
+        t_first=t_first,
+        t_last=t_last,
+        makespan=makespan,
+        throughput=n_ok * tasks_per_unit / makespan if makespan > 0 else math.nan,
+        goodput=goodput,
+        queue_wait_p50=_pct(a.start - a.queued, 50),
+        queue_wait_p90=_pct(a.start - a.queued, 90),
+        queue_wait_p99=_pct(a.start - a.queued, 99),
+        runtime_p50=_pct(durations, 50),
+        runtime_p90=_pct(durations, 90),
+        runtime_p99=_pct(durations, 99),
+        runtime_max=_pct(durations, 100),
+        per_worker_throughput_mean=(
+            float(per_worker.mean()) if per_worker.size else math.nan
+        ),
+        idle_gap_p50=_pct(gaps, 50),
+        idle_gap_p90=_pct(gaps, 90),
+        idle_gap_total=float(np.nansum(gaps)),
+        peak_concurrency=int(counts.max()) if counts.size else 0,
+    )
+
+
+def save_npz(
+    fpath: Path,
+    attempts: Attempts,
+    metrics: RunMetrics,
+    **extra_arrays: Any,
+) -> None:
+    """Save the attempts table, concurrency timeline, and metrics to a compressed NPZ."""
+    t, counts = concurrency_timeline(attempts.start, attempts.end)
+    np.savez_compressed(
+        fpath,
+        **asdict(attempts),
+        timeline_t=t,
+        timeline_concurrency=counts,
+        metrics_json=np.asarray(metrics.to_json()),
+        **extra_arrays,
+    )
+
+
+def load_npz(fpath: Path) -> tuple[Attempts, dict[str, Any], dict[str, np.ndarray]]:
+    """Load an NPZ saved by 'save_npz' -- returns (attempts, metrics, other arrays)."""
+    with np.load(fpath) as npz:
+        attempts = Attempts(**{c: npz[c] for c in ATTEMPT_COLUMNS})
+        metrics = json.loads(str(npz["metrics_json"]))
+        others = {
+            k: npz[k]
+            for k in npz.files
+            if k not in ATTEMPT_COLUMNS and k != "metrics_json"
+        }
+    return attempts, metrics, others
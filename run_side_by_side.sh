@@ -23,7 +23,7 @@ if [[ -z ${BENCHMARK_TAG:-} ]]; then
 fi
 
 if [[ $# -ne 1 ]]; then
-    echo "Usage: $0 [A|B|C|D]" >&2
+    echo "Usage: $0 [A|B|C|D|<pair_id from index.json>]" >&2
     exit 1
 fi
 
@@ -31,6 +31,7 @@ fi
 # run a pair
 
 choice="$1"
+n_tasks="200_000"
 case "$choice" in
     A)
         classical="classical_dag__TPJ_0100__TR_0060__FP_0.00__DTRP_n__WSF_None"
@@ -49,15 +50,26 @@ case "$choice" in
         ewms_json="ewms_workflow__TPJ_ewms__TR_0060__FP_0.00__DTRP_n__WSF_1.0_5.0.json"
         ;;
     *)
-        echo "Invalid argument: $choice" >&2
-        echo "Valid options are: A, B, C, D" >&2
-        exit 1
+        # look up the pair in the suite's index (see test_suite_builder.py)
+        if ! pair="$(python3 -c '
+import json, sys
+pair = next(p for p in json.load(open("index.json"))["pairs"] if p["pair_id"] == sys.argv[1])
+print(pair["classical"], pair["ewms_json"], pair["n_tasks"])
+' "$choice" 2>/dev/null)"; then
+            echo "Invalid argument: $choice" >&2
+            echo "Valid options are: A, B, C, D, or a pair_id from index.json" >&2
+            exit 1
+        fi
+        read -r classical ewms_json n_tasks <<<"$pair"
         ;;
 esac
 
 run_pair() {
     local classical_dir="$1"
     local ewms_json="$2"
+    local n_tasks="$3"
+    # the pair's own files -- pairs may share an EWMS request JSON
+    local pair_dir="$PWD/pair_${choice}"
 
     echo "Running classical: $classical_dir"
     cd "$classical_dir"
@@ -65,6 +77,11 @@ run_pair() {
         echo "WARNING: DAG has already been submitted, skipping this pair."
         return
     fi
+    if [[ -e "$pair_dir/activation.json" ]]; then
+        echo "Error: pair has already run: $pair_dir/activation.json" >&2
+        exit 1
+    fi
+    mkdir -p "$pair_dir"
     condor_submit_dag "${classical_dir}.dag"
     cd ..
 
@@ -75,7 +92,8 @@ run_pair() {
         --mount type=bind,source="${SCRATCH_DIR%/}",dst="${SCRATCH_DIR%/}" \
         "$img" python ewms_external.py \
         --request-json "$PWD/$ewms_json" \
-        --n-tasks 200_000
+        --n-tasks "$n_tasks" \
+        --activation-record "$pair_dir/activation.json"
 }
 
-run_pair "$classical" "$ewms_json"
+run_pair "$classical" "$ewms_json" "$n_tasks"
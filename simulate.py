@@ -0,0 +1,800 @@
+"""Simulate a test's classical DAG vs. EWMS workflow, offline, for fast what-ifs.
+
+A discrete-event simulation (one heap of timestamped events) of a pool of
+slots running either the classical DAG's jobs or the EWMS workflow's pilots,
+built from the same 'TestVars' & constants as 'test_suite_builder.py'. It
+models matchmaking (negotiation cycles & claim reuse), evictions, the max
+worker runtime, DAGMan's submit throttling & retries, per-job vs. per-pilot
+startup, and task runtimes & failures drawn like 'task.py'.
+
+The pool/overhead parameters (see 'SimConfig') are rough guesses -- calibrate
+them against real runs (see 'analyze_classical.py' & 'analyze_ewms.py') before
+trusting the predicted makespans beyond ranking a sweep's points.
+"""
+
+import abc
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from test_suite_builder import (
+    DAG_MAX_RETRIES,
+    DAGMAN_DEFAULTS,
+    EWMS_N_WORKERS,
+    MAX_WORKER_RUNTIME,
+    DAGManTuning,
+    SweepPoint,
+    TestVars,
+    expand_sweep,
+    get_default_sweep_points,
+    load_sweep_spec,
+)
+
+LOGGER = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+@dataclass
+class SimConfig:
+    """The pool & overheads model (times are in seconds)."""
+
+    pool_slots: int = field(
+        default=EWMS_N_WORKERS,
+        metadata={"help": "max number of our jobs/pilots running at once"},
+    )
+    negotiation_interval: float = field(
+        default=60.0,
+        metadata={"help": "time between the negotiator's matchmaking cycles"},
+    )
+    claim_reuse: bool = field(
+        default=True,
+        metadata={
+            "help": "a finished job's slot runs the next idle job w/o matchmaking"
+        },
+    )
+    eviction_rate: float = field(
+        default=0.02,
+        metadata={"help": "evictions per slot-hour"},
+    )
+    job_startup: float = field(
+        default=30.0,
+        metadata={"help": "from claim until a job/pilot's process runs (container)"},
+    )
+    classical_task_startup: float = field(
+        default=0.5,
+        metadata={"help": "per task, in a classical job (python subprocess)"},
+    )
+    dagman_max_submits_per_interval: int = field(
+        default=DAGMAN_DEFAULTS["DAGMAN_MAX_SUBMITS_PER_INTERVAL"],
+        metadata={"help": "DAGMAN_MAX_SUBMITS_PER_INTERVAL"},
+    )
+    dagman_submit_interval: float = field(
+        default=float(DAGMAN_DEFAULTS["DAGMAN_USER_LOG_SCAN_INTERVAL"]),
+        metadata={"help": "DAGMAN_USER_LOG_SCAN_INTERVAL"},
+    )
+    dagman_max_jobs_idle: int = field(
+        default=DAGMAN_DEFAULTS["DAGMAN_MAX_JOBS_IDLE"],
+        metadata={"help": "DAGMAN_MAX_JOBS_IDLE (0: no limit)"},
+    )
+    dagman_max_jobs_submitted: int = field(
+        default=DAGMAN_DEFAULTS["DAGMAN_MAX_JOBS_SUBMITTED"],
+        metadata={"help": "DAGMAN_MAX_JOBS_SUBMITTED (0: no limit)"},
+    )
+    ewms_activation_delay: float = field(
+        default=120.0,
+        metadata={"help": "from the EWMS request until its pilots are submitted"},
+    )
+    pilot_startup: float = field(
+        default=30.0,
+        metadata={
+            "help": "per pilot, after 'job_startup' (connecting to the MQ, etc.)"
+        },
+    )
+    ewms_task_startup: float = field(
+        default=2.0,
+        metadata={"help": "per task, in a pilot (the task's container)"},
+    )
+    ewms_queue_timeout: float = field(
+        default=60.0,
+        metadata={"help": "an idle pilot exits after this long w/o a message"},
+    )
+    ewms_quarantine: float = field(
+        default=60.0 * 60,
+        metadata={"help": "a pilot holds its slot this long after a task fails"},
+    )
+    ewms_requeue_pilots: bool = field(
+        default=True,
+        metadata={
+            "help": "a pilot ended by quarantine or the max runtime is re-queued "
+            "(else, the workflow loses that worker)"
+        },
+    )
+
+
+@dataclass
+class SimResult:
+    """The outcome of one simulated run."""
+
+    system: str  # "classical" or "ewms"
+    makespan: float  # seconds -- NaN if not every unit succeeded
+    n_units: int  # DAG nodes or EWMS tasks
+    n_done: int
+    n_failed: int  # gave up on (classical: out of retries)
+    n_job_starts: int  # condor jobs/pilots started (incl. restarts)
+    n_retries: int  # classical: DAG retries, ewms: redelivered messages
+    n_evictions: int
+    peak_running: int
+    n_events: int
+    sim_seconds: float  # the simulation's own (wall) runtime
+
+
+class _Draws:
+    """Random draws made like 'task.py's, buffered in blocks for speed."""
+
+    BLOCK = 1 << 16
+
+    def __init__(self, test_vars: TestVars, seed: int | None) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.runtime = test_vars.TASK_RUNTIME
+        self.do_poisson = str(test_vars.DO_TASK_RUNTIME_POISSON).lower() in (
+            "1",
+            "true",
+            "t",
+            "yes",
+            "y",
+        )
+        self.fail_prob = float(test_vars.FAIL_PROB)
+        self.speed_range = test_vars.WORKER_SPEED_FACTOR
+        self._bufs: dict[str, np.ndarray] = {}
+        self._idx: dict[str, int] = {}
+
+    def _fill(self, kind: str, n: int) -> np.ndarray:
+        if kind == "uniform":
+            return self.rng.random(n)
+        elif kind == "exponential":
+            return self.rng.standard_exponential(n)
+        elif kind == "normal":
+            return self.rng.standard_normal(n)
+        elif kind == "poisson":
+            return self.rng.poisson(self.runtime, n).astype(float)
+        raise ValueError(kind)
+
+    def take(self, kind: str, n: int) -> np.ndarray:
+        """Take the next 'n' draws."""
+        buf, i = self._bufs.get(kind, np.empty(0)), self._idx.get(kind, 0)
+        if i + n > buf.size:
+            buf = np.concatenate([buf[i:], self._fill(kind, max(self.BLOCK, n))])
+            self._bufs[kind], i = buf, 0
+        self._idx[kind] = i + n
+        return buf[i : i + n]
+
+    def exponential(self, mean: float) -> float:
+        """Draw from an exponential distribution."""
+        return float(self.take("exponential", 1)[0]) * mean
+
+    def speed_factor(self) -> float | None:
+        """Draw a worker's speed factor -- like 'task.get_worker_speed_factor'."""
+        if not self.speed_range:
+            return None
+        low, high = min(self.speed_range), max(self.speed_range)
+        value = (high + low) / 2 + (high - low) / 4 * float(self.take("normal", 1)[0])
+        return min(max(value, low), high)
+
+    def _first_failure(self, n: int) -> int | None:
+        """Get the index of the first of 'n' tasks to fail (None if none do)."""
+        if not self.fail_prob:
+            return None
+        fails = self.take("uniform", n) < self.fail_prob
+        return int(fails.argmax()) if fails.any() else None
+
+    def run_tasks(
+        self,
+        n: int,
+        speed_factor: float | None,
+        startup: float,
+    ) -> tuple[float, int]:
+        """Draw how long 'n' sequential tasks (each w/ 'startup') take -- like
+        'task.main' -- until they're all done or one fails (halfway through).
+
+        Returns the elapsed time and the number that succeeded (before any failure).
+        """
+        k = self._first_failure(n)
+        n_run = n if k is None else k + 1
+
+        if self.do_poisson:
+            durations = self.take("poisson", n_run)
+            if speed_factor is not None:
+                durations = np.floor(durations * speed_factor)
+            total, last = float(durations.sum()), float(durations[-1])
+        else:  # all the same -- skip numpy
+            last = float(self.runtime)
+            if speed_factor is not None:
+                last = float(math.floor(last * speed_factor))
+            total = last * n_run
+
+        elapsed = total + startup * n_run
+        if k is None:
+            return elapsed, n
+        return elapsed - last / 2, k
+
+
+class _Job:
+    """A condor job -- a classical DAG node's job or an EWMS pilot."""
+
+    __slots__ = (
+        "unit",
+        "attempt",
+        "running",
+        "interrupt_at",
+        "is_evicted",
+        "speed",
+        "task",
+        "waiting_since",
+    )
+
+    def __init__(self, unit: int) -> None:
+        self.unit = unit
+        self.attempt = 0  # bumped at each claim/release -- invalidates old events
+        self.running = False
+        self.interrupt_at = math.inf  # the next eviction or max-runtime kill
+        self.is_evicted = False  # ...and which one
+        self.speed: float | None = None
+        self.task: int | None = None  # ewms: the in-flight task
+        self.waiting_since = math.nan  # ewms: idle, waiting for a message
+
+
+class _Sim(abc.ABC):
+    """The event loop & the condor layer (matchmaking, evictions, max runtime)."""
+
+    system = ""
+
+    def __init__(
+        self,
+        test_vars: TestVars,
+        n_units: int,
+        config: SimConfig,
+        seed: int | None,
+    ) -> None:
+        self.config = config
+        self.draws = _Draws(test_vars, seed)
+        self.n_units = n_units
+
+        self.now = 0.0
+        self._heap: list[tuple[float, int, Callable[..., None], tuple]] = []
+        self._seq = itertools.count()  # tie-breaker, keeps the heap FIFO
+        self.n_events = 0
+
+        self.free_slots = config.pool_slots
+        self.idle: deque[_Job] = deque()
+        self._negotiation_scheduled = False
+        self.n_running = self.peak_running = 0
+        self.n_job_starts = self.n_evictions = self.n_retries = 0
+
+        self.n_done = self.n_failed = 0
+        self.t_last = math.nan
+
+    def push(self, t: float, handler: Callable[..., None], *args: Any) -> None:
+        """Schedule 'handler(*args)' at time 't'."""
+        heapq.heappush(self._heap, (t, next(self._seq), handler, args))
+
+    def run(self) -> SimResult:
+        """Run until there are no more events."""
+        t0 = time.monotonic()
+        heap = self._heap
+        while heap:
+            self.now, _, handler, args = heapq.heappop(heap)
+            self.n_events += 1
+            handler(*args)
+        return SimResult(
+            system=self.system,
+            makespan=float(self.t_last) if self.n_done == self.n_units else math.nan,
+            n_units=self.n_units,
+            n_done=self.n_done,
+            n_failed=self.n_failed,
+            n_job_starts=self.n_job_starts,
+            n_retries=self.n_retries,
+            n_evictions=self.n_evictions,
+            peak_running=self.peak_running,
+            n_events=self.n_events,
+            sim_seconds=time.monotonic() - t0,
+        )
+
+    # condor layer
+
+    def submit(self, job: _Job) -> None:
+        """Put the job in the (idle) queue."""
+        self.idle.append(job)
+        self._ensure_negotiation()
+
+    def _ensure_negotiation(self) -> None:
+        if self._negotiation_scheduled or not self.idle:
+            return
+        self._negotiation_scheduled = True
+        interval = self.config.negotiation_interval
+        self.push((self.now // interval + 1) * interval, self._negotiate)
+
+    def _negotiate(self) -> None:
+        self._negotiation_scheduled = False
+        while self.free_slots and self.idle:
+            self._claim(self.idle.popleft())
+        self._ensure_negotiation()
+
+    def _claim(self, job: _Job) -> None:
+        self.free_slots -= 1
+        self.n_running += 1
+        self.peak_running = max(self.peak_running, self.n_running)
+        self.n_job_starts += 1
+        job.attempt += 1
+        job.running = True
+
+        # the earliest interruption: an eviction or the max runtime
+        t_evict = (
+            self.now + self.draws.exponential(3600 / self.config.eviction_rate)
+            if self.config.eviction_rate
+            else math.inf
+        )
+        t_max = self.now + MAX_WORKER_RUNTIME
+        job.interrupt_at, job.is_evicted = min(t_evict, t_max), t_evict < t_max
+
+        self.push(self.now + self.config.job_startup, self._started, job, job.attempt)
+
+    def _started(self, job: _Job, attempt: int) -> None:
+        if job.attempt != attempt:
+            return
+        t_end = self.on_job_started(job)
+        # only schedule the interruption if the job won't have ended by then
+        # -- keeps the heap small
+        if t_end is None or t_end >= job.interrupt_at:
+            self.push(
+                max(job.interrupt_at, self.now),
+                self._interrupt,
+                job,
+                attempt,
+                job.is_evicted,
+            )
+
+    def release(self, job: _Job, reuse_claim: bool = True) -> None:
+        """End the job's run, freeing its slot."""
+        job.attempt += 1
+        job.running = False
+        self.n_running -= 1
+        self.free_slots += 1
+        if reuse_claim and self.config.claim_reuse and self.idle:
+            self._claim(self.idle.popleft())
+        else:
+            self._ensure_negotiation()
+
+    def _interrupt(self, job: _Job, attempt: int, is_eviction: bool) -> None:
+        if job.attempt != attempt:
+            return
+        self.release(job, reuse_claim=False)
+        if is_eviction:
+            self.n_evictions += 1
+            self.on_evicted(job)
+        else:
+            self.on_max_runtime(job)
+
+    # for the subclasses
+
+    @abc.abstractmethod
+    def on_job_started(self, job: _Job) -> float | None:
+        """The job's process is running -- return when it'll end, if known."""
+
+    @abc.abstractmethod
+    def on_evicted(self, job: _Job) -> None:
+        """The job was evicted (it's no longer running)."""
+
+    @abc.abstractmethod
+    def on_max_runtime(self, job: _Job) -> None:
+        """The job was killed at the max runtime (it's no longer running)."""
+
+
+class ClassicalSim(_Sim):
+    """A classical DAG: DAGMan submits one job per node, which runs its tasks sequentially."""
+
+    system = "classical"
+
+    def __init__(
+        self,
+        test_vars: TestVars,
+        n_tasks: int,
+        config: SimConfig,
+        seed: int | None,
+    ) -> None:
+        self.tasks_per_job = int(test_vars.TASKS_PER_JOB)
+        n_nodes = n_tasks // self.tasks_per_job  # like 'plan_suite'
+        super().__init__(test_vars, n_nodes, config, seed)
+
+        self.ready: deque[int] = deque(range(n_nodes))  # for dagman to submit
+        self.retries = [0] * n_nodes
+        # w/ CLASSICAL_CHECKPOINT, a retried node only runs its remaining tasks
+        # NOTE: only a failed task's job records its progress -- an evicted or
+        # max-runtime-killed job's progress isn't tracked (it reruns them all)
+        self.checkpoint = str(test_vars.CLASSICAL_CHECKPOINT).lower() in (
+            "1",
+            "true",
+            "t",
+            "yes",
+            "y",
+        )
+        self.completed = [0] * n_nodes
+        self._tick_scheduled = True
+        self.push(0.0, self._dagman_tick)
+
+    def _dagman_tick(self) -> None:
+        self._tick_scheduled = False
+        n = min(self.config.dagman_max_submits_per_interval, len(self.ready))
+        if self.config.dagman_max_jobs_idle:
+            n = min(n, self.config.dagman_max_jobs_idle - len(self.idle))
+        if self.config.dagman_max_jobs_submitted:
+            n_submitted = len(self.idle) + self.n_running
+            n = min(n, self.config.dagman_max_jobs_submitted - n_submitted)
+        for _ in range(max(n, 0)):
+            self.submit(_Job(self.ready.popleft()))
+        self._ensure_tick()
+
+    def _ensure_tick(self) -> None:
+        if self._tick_scheduled or not self.ready:
+            return
+        self._tick_scheduled = True
+        interval = self.config.dagman_submit_interval
+        self.push((self.now // interval + 1) * interval, self._dagman_tick)
+
+    def _node_failed(self, node: int) -> None:
+        if self.retries[node] < DAG_MAX_RETRIES:
+            self.retries[node] += 1
+            self.n_retries += 1
+            self.ready.append(node)
+            self._ensure_tick()
+        else:
+            self.n_failed += 1
+
+    def on_job_started(self, job: _Job) -> float | None:
+        # each job is on a new slot -- so, a new speed factor (see 'classical_job.py')
+        n_remaining = self.tasks_per_job - self.completed[job.unit]
+        elapsed, n_ok = self.draws.run_tasks(
+            n_remaining,
+            self.draws.speed_factor(),
+            self.config.classical_task_startup,
+        )
+        t_end = self.now + elapsed
+        if t_end < job.interrupt_at:
+            self.push(t_end, self._job_end, job, job.attempt, n_remaining, n_ok)
+        return t_end
+
+    def _job_end(self, job: _Job, attempt: int, n_run: int, n_ok: int) -> None:
+        if job.attempt != attempt:
+            return
+        self.release(job)
+        if n_ok == n_run:
+            self.n_done += 1
+            self.t_last = self.now
+        else:
+            if self.checkpoint:
+                self.completed[job.unit] += n_ok
+            self._node_failed(job.unit)
+
+    def on_evicted(self, job: _Job) -> None:
+        self.submit(job)  # condor re-queues it -- not a dag retry
+
+    def on_max_runtime(self, job: _Job) -> None:
+        self._node_failed(job.unit)
+
+
+class EWMSSim(_Sim):
+    """An EWMS workflow: pilots pull task messages from a queue until it's drained."""
+
+    system = "ewms"
+
+    def __init__(
+        self,
+        test_vars: TestVars,
+        n_tasks: int,
+        n_workers: int,
+        config: SimConfig,
+        seed: int | None,
+    ) -> None:
+        super().__init__(test_vars, n_tasks, config, seed)
+        self.queue: deque[int] = deque(range(n_tasks))  # the input-queue's messages
+        self.waiting: deque[tuple[_Job, int]] = deque()  # pilots waiting for a message
+        self.push(config.ewms_activation_delay, self._activate, n_workers)
+
+    def _activate(self, n_workers: int) -> None:
+        for i in range(n_workers):
+            self.submit(_Job(i))
+
+    def _redeliver(self, task: int) -> None:
+        self.n_retries += 1
+        self.queue.append(task)
+        while self.waiting:
+            job, attempt = self.waiting.popleft()
+            if job.attempt == attempt and not math.isnan(job.waiting_since):
+                self.push(self.now, self._next_task, job, attempt)
+                break
+
+    def on_job_started(self, job: _Job) -> float | None:
+        job.speed = self.draws.speed_factor()  # used by all the pilot's tasks
+        self.push(
+            self.now + self.config.pilot_startup, self._next_task, job, job.attempt
+        )
+        return None  # runs until the queue is drained
+
+    def _next_task(self, job: _Job, attempt: int) -> None:
+        if job.attempt != attempt:
+            return
+        if not self.queue:  # wait for a (redelivered) message, or give up
+            job.waiting_since = self.now
+            self.waiting.append((job, attempt))
+            timeout = self.now + self.config.ewms_queue_timeout
+            self.push(timeout, self._queue_timeout, job, attempt, self.now)
+            return
+
+        job.waiting_since = math.nan
+        job.task = self.queue.popleft()
+        elapsed, n_ok = self.draws.run_tasks(
+            1, job.speed, self.config.ewms_task_startup
+        )
+        self.push(self.now + elapsed, self._task_end, job, attempt, n_ok == 1)
+
+    def _queue_timeout(self, job: _Job, attempt: int, since: float) -> None:
+        if job.attempt == attempt and job.waiting_since == since:
+            self.release(job)
+
+    def _task_end(self, job: _Job, attempt: int, ok: bool) -> None:
+        if job.attempt != attempt:
+            return
+        task, job.task = job.task, None
+        if ok:
+            self.n_done += 1
+            self.t_last = self.now  # the output-message is sent
+            self._next_task(job, attempt)
+        else:
+            # the message is nack'd & the pilot stops listening (see 'pilot_config')
+            self._redeliver(task)  # type: ignore[arg-type]
+            self.push(
+                self.now + self.config.ewms_quarantine, self._quarantined, job, attempt
+            )
+
+    def _quarantined(self, job: _Job, attempt: int) -> None:
+        if job.attempt == attempt:
+            self.release(job)
+            if self.config.ewms_requeue_pilots:
+                self.submit(job)
+
+    def _drop_in_flight(self, job: _Job) -> None:
+        job.waiting_since = math.nan
+        if job.task is not None:
+            task, job.task = job.task, None
+            self._redeliver(task)
+
+    def on_evicted(self, job: _Job) -> None:
+        self._drop_in_flight(job)
+        self.submit(job)  # condor re-queues the pilot
+
+    def on_max_runtime(self, job: _Job) -> None:
+        self._drop_in_flight(job)
+        if self.config.ewms_requeue_pilots:
+            self.submit(job)
+
+
+# the DAGMan knobs (see 'DAGManTuning') -> their 'SimConfig' fields
+DAGMAN_CONFIG_FIELDS = {
+    "DAGMAN_MAX_SUBMITS_PER_INTERVAL": "dagman_max_submits_per_interval",
+    "DAGMAN_USER_LOG_SCAN_INTERVAL": "dagman_submit_interval",
+    "DAGMAN_MAX_JOBS_IDLE": "dagman_max_jobs_idle",
+    "DAGMAN_MAX_JOBS_SUBMITTED": "dagman_max_jobs_submitted",
+}
+
+
+def tune_config(config: SimConfig, dagman: DAGManTuning) -> SimConfig:
+    """Override the config w/ the DAG's own DAGMan knobs."""
+    return replace(
+        config,
+        **{
+            DAGMAN_CONFIG_FIELDS[k]: type(getattr(config, DAGMAN_CONFIG_FIELDS[k]))(v)
+            for k, v in dagman.settings().items()
+        },
+    )
+
+
+def simulate_point(
+    point: SweepPoint,
+    config: SimConfig,
+    seed: int | None,
+) -> tuple[SimResult, SimResult]:
+    """Simulate a sweep point's classical DAG & EWMS workflow."""
+    classical = ClassicalSim(
+        point.test_vars, point.n_tasks, tune_config(config, point.dagman), seed
+    ).run()
+    ewms = EWMSSim(
+        point.ewms_test_vars(),
+        point.n_tasks,
+        point.ewms_n_workers,
+        config,
+        seed,
+    ).run()
+    return classical, ewms
+
+
+def _simulate_point_reps(
+    args: tuple[SweepPoint, SimConfig, int | None, int],
+) -> list[tuple[SimResult, SimResult]]:
+    point, config, seed, n_reps = args
+    return [
+        simulate_point(point, config, None if seed is None else seed + rep)
+        for rep in range(n_reps)
+    ]
+
+
+def load_index_points(fpath: Path) -> list[tuple[str, SweepPoint]]:
+    """Get the (pair id, sweep point) of each pair in a suite's 'index.json'."""
+    with open(fpath) as f:
+        pairs = json.load(f)["pairs"]
+    points = []
+    for pair in pairs:
+        tv = dict(pair["test_vars"])
+        if isinstance(tv.get("WORKER_SPEED_FACTOR"), list):
+            tv["WORKER_SPEED_FACTOR"] = tuple(tv["WORKER_SPEED_FACTOR"])
+        points.append(
+            (
+                pair["pair_id"],
+                SweepPoint(
+                    TestVars(**tv),
+                    pair["n_tasks"],
+                    pair["ewms_n_workers"],
+                    DAGManTuning(**pair.get("dagman", {})),
+                ),
+            )
+        )
+    return points
+
+
+def main() -> None:
+    """Main."""
+    parser = argparse.ArgumentParser(
+        description="Simulate classical DAG vs. EWMS makespans for a test suite, offline.",
+    )
+    parser.add_argument(
+        "--n-tasks",
+        type=int,
+        default=200_000,  # 200k
+        help="Total number of tasks per test (unless set by the sweep spec)",
+    )
+    parser.add_argument(
+        "--sweep-spec",
+        type=Path,
+        default=None,
+        help="Sweep spec file (see 'test_suite_builder.py') -- default: the default suite",
+    )
+    parser.add_argument(
+        "--lhs-samples",
+        type=int,
+        default=0,
+        help="Latin-hypercube subsample the sweep to this many points (0: full product)",
+    )
+    parser.add_argument(
+        "--lhs-seed",
+        type=int,
+        default=None,
+        help="Seed for the Latin-hypercube subsampling",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=None,
+        help="Simulate the pairs of a generated suite's 'index.json' instead",
+    )
+    parser.add_argument(
+        "--n-reps",
+        type=int,
+        default=1,
+        help="Number of replications (seeds) per point -- the median makespan is reported",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the first replication (incremented for each replication)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write every replication's results to this JSON file",
+    )
+    parser.add_argument(
+        "--n-procs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of processes (points are simulated in parallel)",
+    )
+    for fld in fields(SimConfig):
+        if isinstance(fld.default, bool):
+            parser.add_argument(
+                f"--no-{fld.name.replace('_', '-')}",
+                dest=fld.name,
+                action="store_false",
+                help=f"[model] don't: {fld.metadata['help']}",
+            )
+        else:
+            parser.add_argument(
+                f"--{fld.name.replace('_', '-')}",
+                type=type(fld.default),
+                default=fld.default,
+                help=f"[model] {fld.metadata['help']} (default: {fld.default})",
+            )
+    args = parser.parse_args()
+
+    config = SimConfig(**{f.name: getattr(args, f.name) for f in fields(SimConfig)})
+    if args.index:
+        labeled = load_index_points(args.index)
+    else:
+        if args.sweep_spec:
+            points = expand_sweep(
+                load_sweep_spec(args.sweep_spec),
+                args.n_tasks,
+                args.lhs_samples,
+                args.lhs_seed,
+            )
+        else:
+            points = get_default_sweep_points(args.n_tasks)
+        labeled = [(f"#{i + 1}", p) for i, p in enumerate(points)]
+    LOGGER.info(f"simulating {len(labeled)} points x {args.n_reps} reps with {config}")
+
+    out = []
+    with ProcessPoolExecutor(max_workers=args.n_procs) as pool:
+        all_reps = pool.map(
+            _simulate_point_reps,
+            [(p, config, args.seed, args.n_reps) for _, p in labeled],
+        )
+        for (label, point), reps in zip(labeled, all_reps):
+            classical = float(np.median([c.makespan for c, _ in reps]))
+            ewms = float(np.median([e.makespan for _, e in reps]))
+            LOGGER.info(
+                f"{label} {point.test_vars.fname_vars()} n_tasks={point.n_tasks} "
+                f"{point.dagman.settings() or ''}: "
+                f"classical {classical:.0f}s, ewms {ewms:.0f}s "
+                f"(classical/ewms: {classical / ewms:.2f})"
+            )
+            for system, res in zip(("classical", "ewms"), reps[0]):
+                if res.n_done < res.n_units:  # NaN makespan
+                    LOGGER.warning(
+                        f"{label} {system} did not finish: {res.n_done}/{res.n_units} "
+                        f"done, {res.n_failed} failed (out of retries)"
+                    )
+            out.append(
+                {
+                    "label": label,
+                    "n_tasks": point.n_tasks,
+                    "ewms_n_workers": point.ewms_n_workers,
+                    "test_vars": asdict(point.test_vars),
+                    "dagman": point.dagman.settings(),
+                    "classical_makespan_median": classical,
+                    "ewms_makespan_median": ewms,
+                    "reps": [
+                        {"classical": asdict(c), "ewms": asdict(e)} for c, e in reps
+                    ],
+                }
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": asdict(config), "points": out}, f, indent=4)
+        LOGGER.info(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
+    LOGGER.info("Done.")
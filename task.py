@@ -1,22 +1,71 @@
 """A simulated task with some knobs."""
 
+import functools
 import logging
+import math
 import os
 import random
+import socket
 import sys
 import time
 from pathlib import Path
+from types import ModuleType
+from typing import Any
 
-import numpy as np
+import event_envelope
+import work_kernels
+from proc_utils import get_process_age
 
 LOGGER = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.getenv("TASK_LOG_LEVEL", "INFO").upper())
+
+
+@functools.cache
+def get_numpy() -> ModuleType | None:
+    """Import numpy, only when a random draw needs it -- None if not installed."""
+    try:
+        import numpy
+    except ImportError:
+        LOGGER.info("numpy is not installed, using the stdlib for random draws")
+        return None
+    return numpy
+
+
+class StartupTimer:
+    """Time a task's startup, up to when its work begins.
+
+    Phases: 'launch' (process start until 'main()' -- the interpreter start,
+    imports, etc.) and 'setup' (the random draws, etc., until the work
+    begins). 'launch' only applies to the first task run by a process (see
+    'classical_job.py').
+    """
+
+    _is_first_in_process = True
+
+    def __init__(self) -> None:
+        self.t0 = time.monotonic()
+        self.phases: dict[str, float] = {}
+        if StartupTimer._is_first_in_process:
+            StartupTimer._is_first_in_process = False
+            if (age := get_process_age()) is not None:
+                self.phases["launch"] = age
+
+    def done(self) -> float:
+        """End the 'setup' phase, log the phases, and return the total startup."""
+        self.phases["setup"] = time.monotonic() - self.t0
+        total = sum(self.phases.values())
+        LOGGER.info(
+            f"[STARTUP] {total:.3f}s ("
+            + ", ".join(f"{k}={v:.3f}s" for k, v in self.phases.items())
+            + ")"
+        )
+        return total
 
 
 def get_worker_speed_factor(worker_speed_factor: tuple[float, float]) -> float:
     """Get the speed factor unique to the worker (used by all tasks on worker)."""
-    high = min(worker_speed_factor)
-    low = max(worker_speed_factor)
+    low = min(worker_speed_factor)
+    high = max(worker_speed_factor)
 
     _dir = Path(os.getenv("EWMS_TASK_DATA_HUB_DIR", "/commondir"))
     if not _dir.exists():
@@ -26,15 +75,11 @@ def get_worker_speed_factor(worker_speed_factor: tuple[float, float]) -> float:
     fpath = _dir / "worker-speed-factor.txt"
     if not fpath.exists():
         # Gaussian (clipped)
-        value = float(
-            np.clip(  # ensures value stays in [low, high]
-                np.random.normal(  # draw from normal distribution
-                    loc=np.mean([high, low]),  # centered between low and high
-                    scale=(high - low) / 4,  # stddev; 95% of values will fall in range
-                ),
-                low,  # min bound
-                high,  # max bound
-            )
+        value = draw_clipped_normal(
+            mean=(high + low) / 2,  # centered between low and high
+            stddev=(high - low) / 4,  # 95% of values will fall in range
+            low=low,
+            high=high,
         )
         LOGGER.info(f"'{fpath}' did not exist, so writing the value '{value}' to it")
         fpath.write_text(str(value))
@@ -45,10 +90,114 @@ def get_worker_speed_factor(worker_speed_factor: tuple[float, float]) -> float:
     return value
 
 
-def get_task_runtime(average_runtime: int) -> float:
+def draw_clipped_normal(mean: float, stddev: float, low: float, high: float) -> float:
+    """Draw from a normal distribution, clipped to [low, high]."""
+    if np := get_numpy():
+        value = float(np.random.normal(loc=mean, scale=stddev))
+    else:
+        value = random.gauss(mean, stddev)
+    return min(max(value, low), high)
+
+
+def draw_poisson(lam: float) -> int:
+    """Draw from a Poisson distribution."""
+    if np := get_numpy():
+        return int(np.random.default_rng().poisson(lam=lam))
+    return _stdlib_poisson(lam, random.Random())
+
+
+def _stdlib_poisson(lam: float, rng: random.Random) -> int:
+    """Draw from a Poisson distribution, with only the stdlib.
+
+    Uses Knuth's multiplication method for small 'lam', else the transformed
+    rejection method (PTRS, Hörmann 1993) -- the same split as numpy's.
+    """
+    if lam <= 0:
+        return 0
+    if lam < 10:
+        limit, k, prod = math.exp(-lam), 0, rng.random()
+        while prod > limit:
+            k += 1
+            prod *= rng.random()
+        return k
+
+    slam, loglam = math.sqrt(lam), math.log(lam)
+    b = 0.931 + 2.53 * slam
+    a = -0.059 + 0.02483 * b
+    invalpha = 1.1239 + 1.1328 / (b - 3.4)
+    vr = 0.9277 - 3.6224 / (b - 2)
+    while True:
+        u = rng.random() - 0.5
+        v = rng.random()
+        us = 0.5 - abs(u)
+        k = math.floor((2 * a / us + b) * u + lam + 0.43)
+        if us >= 0.07 and v <= vr:
+            return k
+        if k < 0 or (us < 0.013 and v > us):
+            continue
+        if math.log(v) + math.log(invalpha) - math.log(
+            a / (us * us) + b
+        ) <= -lam + k * loglam - math.lgamma(k + 1):
+            return k
+
+
+def get_task_rng(run_seed: int, task_index: int, *key: object) -> random.Random:
+    """Get a random stream unique to the task (& 'key'), but the same on every
+    system -- so, a seeded run's classical & EWMS sides draw the same workload
+    (common random numbers).
+
+    Always the stdlib's generator, so the draws don't depend on numpy.
+    """
+    # NOTE: str seeds are hashed w/ sha512, so they're stable across processes
+    return random.Random(":".join(str(x) for x in (run_seed, task_index, *key)))
+
+
+def get_ewms_events() -> list[str]:
+    """Get the EWMS task's input event(s) -- a batched message has several (none,
+    if this isn't an EWMS task).
+    """
+    if "EWMS_TASK_INFILE" not in os.environ:
+        return []
+    with open(os.environ["EWMS_TASK_INFILE"]) as f:
+        return [p.strip() for p in f.read().split(event_envelope.BATCH_SEP)]
+
+
+def get_event_id(part: str) -> int | None:
+    """Get an input event's id (its envelope's seq, or the plain int), if any."""
+    try:
+        if event_envelope.is_envelope(part):
+            return event_envelope.decode(part).seq
+        return int(part)
+    except ValueError:
+        return None
+
+
+def get_attempt(task_index: int) -> int:
+    """Get the task's attempt number (0: the first).
+
+    From 'TASK_ATTEMPT' (classically, DAGMan's retry count), else from this
+    worker's own count of the task's attempts -- an EWMS task can't see its
+    event's redeliveries, so a redelivery to another worker counts as its 0th.
+    """
+    if (attempt := os.getenv("TASK_ATTEMPT")) is not None:
+        return int(attempt)
+    fpath = (
+        Path(os.getenv("EWMS_TASK_DATA_HUB_DIR", "/commondir"))
+        / "attempts"
+        / str(task_index)
+    )
+    fpath.parent.mkdir(parents=True, exist_ok=True)
+    n_before = int(fpath.read_text()) if fpath.exists() else 0
+    fpath.write_text(str(n_before + 1))
+    return n_before
+
+
+def get_task_runtime(average_runtime: int, rng: random.Random | None = None) -> float:
     """Get the runtime unique to the task (NOT used by all tasks on worker)."""
-    rng = np.random.default_rng()
-    poisson_time = float(rng.poisson(lam=average_runtime))  # seconds
+    if rng:
+        poisson_time = float(_stdlib_poisson(average_runtime, rng))  # seconds
+    else:
+        poisson_time = float(draw_poisson(average_runtime))  # seconds
     LOGGER.info(f"using poisson runtime: {poisson_time}")
     return poisson_time
 
@@ -59,13 +208,95 @@ def split_duration(total_work_duration: float) -> tuple[float, float]:
     return total_work_duration / 2, total_work_duration / 2
 
 
+def get_worker_identity() -> str:
+    """Get a short identity for the worker running this task."""
+    slot = os.getenv("_CONDOR_SLOT")
+    return f"{socket.gethostname()}/{slot}" if slot else socket.gethostname()
+
+
+def make_output(
+    part: str,
+    start_ts: float,
+    end_ts: float,
+    startup: float | None = None,
+) -> str:
+    """Echo the input event, extending any envelope with this task's timing & worker."""
+    if not event_envelope.is_envelope(part):
+        return part
+    extra = [] if startup is None else [f"startup_s={startup:.6f}"]
+    return event_envelope.append_task_fields(
+        part, start_ts, end_ts, get_worker_identity(), *extra
+    )
+
+
+def draw_work_unit(
+    total_work_duration: float,
+    fail_prob: float,
+    do_task_runtime_poisson: bool,
+    worker_speed_factor: tuple[float, float] | None,
+    run_seed: int | None,
+    task_index: int | None,
+) -> tuple[float, bool]:
+    """Draw a unit of work's duration & whether it fails (halfway through)."""
+    rng = fail_rng = None
+    if run_seed is not None:
+        if task_index is None:
+            raise ValueError("a seeded task (RUN_SEED) needs its task index")
+        LOGGER.info(f"[SEED] {run_seed=}, {task_index=}")
+        rng = get_task_rng(run_seed, task_index)
+        if not (attempt := get_attempt(task_index)):
+            fail_rng = get_task_rng(run_seed, task_index, "fail")  # common
+        else:
+            fail_rng = get_task_rng(
+                run_seed, task_index, "fail", attempt, get_worker_identity()
+            )
+
+    if do_task_runtime_poisson:
+        total_work_duration = get_task_runtime(int(total_work_duration), rng)
+
+    if worker_speed_factor:
+        total_work_duration = int(
+            total_work_duration * get_worker_speed_factor(worker_speed_factor)
+        )
+
+    fails = bool(fail_prob) and (fail_rng or random).random() < fail_prob
+    return total_work_duration, fails
+
+
 def main(
     total_work_duration: int,
     fail_prob: float,
     do_task_runtime_poisson: bool,
     worker_speed_factor: tuple[float, float] | None,
-):
-    """Do work (sleep) with a few optional conditions."""
+    work_profile: str = work_kernels.SLEEP,
+    work_footprint: int = 0,
+    run_seed: int | None = None,
+    task_index: int | None = None,
+) -> float:
+    """Do work (sleep, by default) with a few optional conditions.
+
+    See 'work_kernels' for the work profiles -- 'work_footprint' (bytes) is
+    the memory/disk used by the 'memory' & 'disk' profiles.
+
+    An EWMS input message may batch several events: each is its own unit of
+    work (w/ its own draws) & gets its own output -- so a batch does the same
+    work as its events sent one per message. If any unit fails, the whole task
+    fails (so the pilot redelivers the message, & all its events are redone).
+
+    If 'run_seed' is given, each unit's runtime & first-attempt failure draws
+    are seeded by (run seed, task index) only -- the index is given (see
+    'classical_job.py') or is the EWMS input event's id -- so they're common to
+    both systems. A later attempt's failure draw is also keyed by the attempt &
+    worker (see 'get_attempt()'), so retries don't fail the same -- NOTE: these
+    retry draws are not common: classically, the attempt is the node's retry
+    count (for all its tasks, even ones that had succeeded); on EWMS, it's the
+    worker's own count, so an event redelivered to another worker repeats its
+    first attempt's draw (& failure) until it lands on a worker that's run it.
+
+    Returns the achieved work duration (seconds).
+    """
+    start_ts = time.time()
+    startup_timer = StartupTimer()
     LOGGER.info(
         f"task config: "
         f"{total_work_duration=}s, "
@@ -74,45 +305,108 @@ def main(
         f"{worker_speed_factor=}"
     )
 
-    if do_task_runtime_poisson:
-        total_work_duration = get_task_runtime(total_work_duration)
-
-    if worker_speed_factor:
-        total_work_duration = int(
-            total_work_duration * get_worker_speed_factor(worker_speed_factor)
+    # a classical task is one unit of work; an EWMS task, one per input event
+    events = get_ewms_events()
+    if len(events) > 1:
+        LOGGER.info(f"batched input: {len(events)} events")
+    units = [
+        draw_work_unit(
+            total_work_duration,
+            fail_prob,
+            do_task_runtime_poisson,
+            worker_speed_factor,
+            run_seed,
+            task_index if part is None else get_event_id(part),
         )
+        for part in (events or [None])
+    ]
 
     # simulate work
-    LOGGER.info(f"Starting task with {total_work_duration:.1f}s duration")
-    if not fail_prob:
-        time.sleep(total_work_duration)
-    else:
-        sleep1, sleep2 = split_duration(total_work_duration)
-        time.sleep(sleep1)
-        if random.random() < fail_prob:
-            LOGGER.info(f"simulated failure at {sleep1:.1f}s")
-            sys.exit(1)
-        time.sleep(sleep2)
+    startup = startup_timer.done()
+    np = (
+        get_numpy() if work_profile in (work_kernels.CPU, work_kernels.MEMORY) else None
+    )
+    achieved = 0.0
+    outputs = []
+    for i, (duration, fails) in enumerate(units):
+        unit_start_ts = start_ts if i == 0 else time.time()  # (1st: incl. startup)
+        if events and (event_id := get_event_id(events[i])) is not None:
+            LOGGER.info(f"[EVENT] id={event_id}")  # for 'analyze_ewms'
+        LOGGER.info(f"Starting task with {duration:.1f}s duration ({work_profile})")
+        if not fail_prob:
+            unit_achieved = work_kernels.run(work_profile, duration, work_footprint, np)
+        else:
+            sleep1, sleep2 = split_duration(duration)
+            unit_achieved = work_kernels.run(work_profile, sleep1, work_footprint, np)
+            if fails:
+                LOGGER.info(f"simulated failure at {unit_achieved:.1f}s")
+                sys.exit(1)
+            unit_achieved += work_kernels.run(work_profile, sleep2, work_footprint, np)
+        LOGGER.info(
+            f"[WORK] {work_profile}: requested={duration:.3f}s "
+            f"achieved={unit_achieved:.3f}s"
+        )
+        LOGGER.info(f"[OK] task completed in {duration:.1f}s")
+        achieved += unit_achieved
+        if events:
+            outputs.append(
+                make_output(
+                    events[i], unit_start_ts, time.time(), startup if i == 0 else 0.0
+                )
+            )
 
     # done
-    LOGGER.info(f"[OK] task completed in {total_work_duration:.1f}s")
     # -> if this is an ewms task, write an output so the pilot can forward it on as an event
-    if "EWMS_TASK_INFILE" in os.environ:
-        with open(os.environ["EWMS_TASK_INFILE"]) as f:
-            contents = f.read()
+    if events:
         with open(os.environ["EWMS_TASK_OUTFILE"], "w") as f:
-            f.write(contents)
+            f.write(event_envelope.BATCH_SEP.join(outputs))
 
+    return achieved
 
-if __name__ == "__main__":
-    main(
-        int(os.environ["TASK_RUNTIME"]),
-        float(os.environ["FAIL_PROB"]),
-        os.environ["DO_TASK_RUNTIME_POISSON"].lower() in ("1", "true", "t", "yes", "y"),
-        (
-            tuple(float(x) for x in os.environ["WORKER_SPEED_FACTOR"].split(","))
+
+def get_main_kwargs_from_env() -> dict[str, Any]:
+    """Get the args for 'main()' from the environment."""
+    work_profile = os.getenv("WORK_PROFILE", work_kernels.SLEEP).lower()
+    # the footprint is a fraction of what the slot requested
+    slot_size_var = (
+        "WORKER_DISK" if work_profile == work_kernels.DISK else "WORKER_MEMORY"
+    )
+
+    return dict(
+        total_work_duration=int(os.environ["TASK_RUNTIME"]),
+        fail_prob=float(os.environ["FAIL_PROB"]),
+        do_task_runtime_poisson=(
+            os.environ["DO_TASK_RUNTIME_POISSON"].lower()
+            in ("1", "true", "t", "yes", "y")
+        ),
+        worker_speed_factor=(
+            # may be "1.0,5.0" or a stringified tuple, "(1.0, 5.0)"
+            tuple(
+                float(x)
+                for x in os.environ["WORKER_SPEED_FACTOR"].strip("()").split(",")
+            )
             if os.environ["WORKER_SPEED_FACTOR"].lower() != "none"
             else None
         ),
+        work_profile=work_profile,
+        work_footprint=int(
+            float(os.getenv("WORK_FOOTPRINT_FRAC", "0"))
+            * work_kernels.parse_size(os.getenv(slot_size_var, "0"))
+        ),
+        run_seed=(
+            int(os.environ["RUN_SEED"])
+            if os.getenv("RUN_SEED", "none").lower() != "none"
+            else None
+        ),
+        task_index=(
+            int(os.environ["TASK_INDEX"]) if "TASK_INDEX" in os.environ else None
+        ),
     )
+
+
+if __name__ == "__main__":
+    work_duration = main(**get_main_kwargs_from_env())
+    # -> let a launcher (see classical_job.py) separate its overhead from the work
+    if timing_file := os.getenv("TASK_TIMING_FILE"):
+        Path(timing_file).write_text(f"{work_duration}\n")
     LOGGER.info("Done.")
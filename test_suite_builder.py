@@ -2,20 +2,28 @@
 
 import argparse
 import getpass
+import gzip
+import itertools
 import json
 import logging
 import os
+import random
 import shutil
 import sys
-from dataclasses import asdict, dataclass, fields
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, fields, replace
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterable, Iterator
 
 
 LOGGER = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
 SUBMIT_FNAME = "ewms-sim.submit"
+CLASSICAL_LOG_MODES = ("verbose", "compact", "compact-failures")
+MANIFEST_FNAME = "manifest.json"
+INDEX_FNAME = "index.json"
 
 _BASE_SCRATCH = Path(
     os.getenv(
@@ -37,8 +45,6 @@ def get_next_scratch_dir(base: Path) -> Path:
     raise RuntimeError("Too many scratch directories, clean up old ones.")
 
 
-SCRATCH_DIR = get_next_scratch_dir(_BASE_SCRATCH)
-
 # fmt: off
 CLASSICAL_PREFIX = "classical_dag"
 EWMS_PREFIX      = "ewms_workflow"  # same length so filepaths look good
@@ -46,8 +52,24 @@ EWMS_PREFIX      = "ewms_workflow"  # same length so filepaths look good
 
 N_DIGITS_FNAME = 4
 
+DAG_MAX_RETRIES = 5
+DAG_RETRY_LINE = f"RETRY ALL_NODES {DAG_MAX_RETRIES} UNLESS-EXIT 0\n"
+DAG_WRITE_BUFFER_SIZE = 4 * 1024 * 1024  # bytes
+DAG_NODES_PER_CHUNK = 10_000  # number of JOB+VARS pairs joined into one write
+
 EWMS_N_WORKERS = 2_000
 
+# DAGMan's submit throttles (& HTCondor's defaults) -- sweepable, see 'DAGManTuning'
+DAGMAN_DEFAULTS = {
+    "DAGMAN_MAX_SUBMITS_PER_INTERVAL": 100,
+    "DAGMAN_USER_LOG_SCAN_INTERVAL": 5,  # seconds between submit cycles
+    "DAGMAN_MAX_JOBS_IDLE": 1000,
+    "DAGMAN_MAX_JOBS_SUBMITTED": 0,  # 0: no limit
+}
+
+# sweepable names that are not 'TestVars' fields
+SWEEP_SPECIAL_KEYS = ("n_tasks", "EWMS_N_WORKERS", *DAGMAN_DEFAULTS)
+
 # see https://portal.osg-htc.org/documentation/htc_workloads/workload_planning/jobdurationcategory/
 MAX_WORKER_RUNTIME = 60 * 60 * 2  # 20 hours
 #
@@ -86,6 +108,79 @@ class TestVars:
     DO_TASK_RUNTIME_POISSON: str = "n"
     WORKER_SPEED_FACTOR: tuple[float, float] | None = None
 
+    # knobs below are only put in filenames when not the default
+    # -- see 'classical_job.py'
+    TASK_LAUNCH_MODE: str = field(
+        default="subprocess",
+        metadata={"fname": "non-default", "classical_only": True},
+    )
+    # -- resume a retried node from its completed tasks, see 'classical_job.py'
+    CLASSICAL_CHECKPOINT: bool = field(
+        default=False,
+        metadata={"fname": "non-default", "classical_only": True},
+    )
+    # -- "verbose", "compact", or "compact-failures" (see 'DAGBuilder.write_submit_file')
+    CLASSICAL_LOG_MODE: str = field(
+        default="verbose",
+        metadata={"fname": "non-default", "classical_only": True},
+    )
+    # -- see 'work_kernels.py'
+    WORK_PROFILE: str = field(default="sleep", metadata={"fname": "non-default"})
+    WORK_FOOTPRINT_FRAC: float = field(  # of WORKER_MEMORY or WORKER_DISK
+        default=0.5,
+        metadata={"fname": "non-default"},
+    )
+    # -- see 'task.get_task_rng' (None: unseeded draws)
+    RUN_SEED: int | None = field(default=None, metadata={"fname": "non-default"})
+
+    def fname_vars(self) -> dict[str, Any]:
+        """Get the vars that go in a filename."""
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if not (
+                f.metadata.get("fname") == "non-default"
+                and getattr(self, f.name) == f.default
+            )
+        }
+
+
+@dataclass(frozen=True)
+class DAGManTuning:
+    """DAGMan's submit throttles for a DAG -- None: the pool's (default) setting.
+
+    These aren't 'TestVars', since they're not passed to the tasks -- they go
+    in a per-DAG '.config' file (see 'DAGBuilder.write_dag_file').
+    """
+
+    DAGMAN_MAX_SUBMITS_PER_INTERVAL: int | None = None
+    DAGMAN_USER_LOG_SCAN_INTERVAL: int | None = None
+    DAGMAN_MAX_JOBS_IDLE: int | None = None
+    DAGMAN_MAX_JOBS_SUBMITTED: int | None = None
+
+    def settings(self) -> dict[str, int]:
+        """Get the knobs that are set."""
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+    def effective(self) -> dict[str, int]:
+        """Get every knob, w/ HTCondor's defaults for those not set."""
+        return {**DAGMAN_DEFAULTS, **self.settings()}
+
+    def nominal_submit_rate(self) -> float:
+        """Get DAGMan's max submit rate (jobs/sec) -- idle/submitted caps aside."""
+        eff = self.effective()
+        return (
+            eff["DAGMAN_MAX_SUBMITS_PER_INTERVAL"]
+            / eff["DAGMAN_USER_LOG_SCAN_INTERVAL"]
+        )
+
+
+def get_submit_fname(log_mode: str) -> str:
+    """Get the shared submit file's filename for the CLASSICAL_LOG_MODE."""
+    if log_mode == "verbose":
+        return SUBMIT_FNAME
+    return f"{Path(SUBMIT_FNAME).stem}.{log_mode}.submit"
+
 
 def get_fname(prefix: str, vars: dict[str, Any], suffix: str) -> str:
     """Assemble a filename from vars, with components padded for reasonable good looks."""
@@ -125,48 +220,182 @@ class DAGBuilder:
     """For building the DAG things."""
 
     @staticmethod
-    def write_dag_file(output_dir: Path, test_vars: TestVars, n_jobs: int) -> Path:
-        """Write the DAG file into its own subdirectory."""
+    def _open_for_write(fpath: Path, compress: bool) -> IO[str]:
+        """Open a text file with a large write buffer, optionally gzip-compressed."""
+        if compress:
+            return gzip.open(fpath, "wt", compresslevel=6)
+        return open(fpath, "w", buffering=DAG_WRITE_BUFFER_SIZE)
+
+    @staticmethod
+    def _write_chunked(f: IO[str], lines: Iterable[str]) -> None:
+        """Write lines in big joined chunks, so memory stays flat & writes stay few."""
+        it = iter(lines)
+        while chunk := "".join(itertools.islice(it, 2 * DAG_NODES_PER_CHUNK)):
+            f.write(chunk)
+
+    @staticmethod
+    def _iter_node_lines(
+        job_numbers: range,
+        n_digits: int,
+        vars_payload: str,
+    ) -> Iterator[str]:
+        """Yield the JOB & VARS lines for each dagjob."""
+        for i in job_numbers:
+            jobid = f"J{i:0{n_digits}d}"
+            yield f"JOB {jobid} {SUBMIT_FNAME}\n"  # relative path!
+            yield f"VARS {jobid} {vars_payload}\n"
+
+    @staticmethod
+    def write_dag_file(
+        output_dir: Path,
+        test_vars: TestVars,
+        n_jobs: int,
+        compress: bool = False,
+        n_splices: int = 0,
+        fname_extras: dict[str, Any] | None = None,
+        dagman: DAGManTuning | None = None,
+    ) -> Path:
+        """Write the DAG file into its own subdirectory.
+
+        'fname_extras' are appended to the test vars only for the filename
+        (e.g. swept values that are not task env vars, like N_TASKS).
+
+        If any 'dagman' knob is set, they're written to a '.config' file, which
+        the (top-level) DAG file includes with a CONFIG line.
+
+        If 'n_splices' > 0, the dagjobs are split across that many sub-DAG
+        files, which are included from the top-level DAG with SPLICE lines.
+
+        If 'compress', every DAG file is gzip-compressed (".dag.gz") --
+        DAGMan does not read gzip, so decompress before 'condor_submit_dag'.
+        """
 
         # Figure base filename and subdir path
-        fname = get_fname(CLASSICAL_PREFIX, asdict(test_vars), ".dag")
+        fname = get_fname(
+            CLASSICAL_PREFIX, {**test_vars.fname_vars(), **(fname_extras or {})}, ".dag"
+        )
         subdir = output_dir / Path(fname).stem
         subdir.mkdir()
 
-        fpath = subdir / fname
+        gz = ".gz" if compress else ""
+        fpath = subdir / f"{fname}{gz}"
         if fpath.exists():
             raise FileExistsError(f"{fpath} already exists")
 
-        # Copy the shared submit file into the subdir
-        shutil.copy(output_dir / SUBMIT_FNAME, subdir / SUBMIT_FNAME)
+        # Copy the shared submit file (for the DAG's log mode) into the subdir
+        shutil.copy(
+            output_dir / get_submit_fname(test_vars.CLASSICAL_LOG_MODE),
+            subdir / SUBMIT_FNAME,
+        )
+
+        # vars -- these are the same for all dagjobs, so build once
+        vars_payload = " ".join(f'{k}="{v}"' for k, v in asdict(test_vars).items())
+        vars_payload += f' LOG_FNAME_NOEXT="{Path(fname).stem}"'
+
+        # dagjob ids are numbered across the whole DAG (even when spliced)
+        n_digits = len(str(n_jobs))  # Auto-calculate padding width
+        all_jobs = range(1, n_jobs + 1)
+
+        # DAGMan config
+        config_line = ""
+        if dagman and (settings := dagman.settings()):
+            config_fname = f"{Path(fname).stem}.config"
+            with open(subdir / config_fname, "w") as f:
+                f.writelines(f"{k} = {v}\n" for k, v in settings.items())
+            config_line = f"CONFIG {config_fname}\n"  # relative path!
 
         # Write DAG file
-        with open(fpath, "w") as f:
-            # Write JOB lines with auto-zero-padding
-            n_digits = len(str(n_jobs))  # Auto-calculate padding width
-            for i in range(1, n_jobs + 1):
-                # dagjob
-                jobid = f"J{i:0{n_digits}d}"
-                f.write(f"JOB {jobid} {SUBMIT_FNAME}\n")  # relative path!
-                # vars -- these are the same for all dagjobs
-                var_str = " ".join(f'{k}="{v}"' for k, v in asdict(test_vars).items())
-                var_str += f' LOG_FNAME_NOEXT="{fpath.stem}"'
-                f.write(f"VARS {jobid} {var_str}\n")
-
-            f.write("\n")
-
-            # Retry rule
-            f.write("RETRY ALL_NODES 5 UNLESS-EXIT 0\n")
+        if not n_splices:
+            with DAGBuilder._open_for_write(fpath, compress) as f:
+                f.write(config_line)
+                DAGBuilder._write_chunked(
+                    f, DAGBuilder._iter_node_lines(all_jobs, n_digits, vars_payload)
+                )
+                f.write("\n")
+                # Retry rule
+                f.write(DAG_RETRY_LINE)
+            return fpath
+
+        # Write sub-DAG files + top-level DAG of SPLICE lines
+        n_splices = min(n_splices, n_jobs)
+        size, extra = divmod(n_jobs, n_splices)
+        s_digits = len(str(n_splices))
+        with DAGBuilder._open_for_write(fpath, compress) as top:
+            top.write(config_line)  # (splices can't have their own)
+            start = 1
+            for s in range(1, n_splices + 1):
+                stop = start + size + (1 if s <= extra else 0)
+                splice_name = f"S{s:0{s_digits}d}"
+                splice_fname = f"{Path(fname).stem}.{splice_name}.dag"
+                with DAGBuilder._open_for_write(
+                    subdir / f"{splice_fname}{gz}", compress
+                ) as f:
+                    DAGBuilder._write_chunked(
+                        f,
+                        DAGBuilder._iter_node_lines(
+                            range(start, stop), n_digits, vars_payload
+                        ),
+                    )
+                    f.write("\n")
+                    f.write(DAG_RETRY_LINE)
+                top.write(f"SPLICE {splice_name} {splice_fname}\n")  # relative path!
+                start = stop
 
         return fpath
 
     @staticmethod
-    def write_submit_file(output_dir: Path, task_image: Path) -> None:
-        """Write a condor submit file."""
+    def write_submit_file(
+        output_dir: Path,
+        task_image: Path,
+        log_mode: str = "verbose",
+    ) -> None:
+        """Write a condor submit file for the CLASSICAL_LOG_MODE.
+
+        - "verbose": a job event log per node, & each job's stdout/err
+        - "compact": one job event log shared by the whole DAG (still has
+            every job's submit/execute/terminate events -- all that's needed
+            for the runtime calculation), & one '[TASK]' line per task
+        - "compact-failures": like "compact", but only failed jobs' stdout/err
+            are transferred back -- every job's '[TASK]' lines are in their own
+            '.tasks' file (see 'classical_job.py')
+        """
+        if log_mode not in CLASSICAL_LOG_MODES:
+            raise ValueError(f"unknown CLASSICAL_LOG_MODE: {log_mode}")
         test_vars_names = [x.name for x in fields(TestVars)]
 
         env_vars = [f"{v}=$({v})" for v in test_vars_names]
+        # for seeded runs: each task's index & attempt (see 'classical_job.py')
+        env_vars.append("DAG_NODE_NAME=$(DAG_NODE_NAME)")
+        env_vars.append("TASK_ATTEMPT=$(RETRY)")
+        env_vars.append("CKPT_FNAME=$(CKPT_FNAME)")
         env_vars.append(f"TASK_IMAGE={task_image}")
+        # for the work profiles' footprints (same as ewms's 'task_env')
+        env_vars.append(f"WORKER_MEMORY={WORKER_MEMORY}")
+        env_vars.append(f"WORKER_DISK={WORKER_DISK}")
+
+        out_noext = "$(LOG_FNAME_NOEXT).$(DAG_NODE_NAME).$(clusterid).$(Process)"
+        if log_mode == "verbose":
+            log_lines = (
+                "log                        = "
+                "$(LOG_FNAME_NOEXT).$(DAG_NODE_NAME).$(clusterid).log\n"
+                f"output                     = {out_noext}.out\n"
+                f"error                      = {out_noext}.err"
+            )
+        elif log_mode == "compact":
+            log_lines = (
+                "log                        = $(LOG_FNAME_NOEXT).jobs.log\n"
+                f"output                     = {out_noext}.out\n"
+                f"error                      = {out_noext}.err"
+            )
+        else:
+            # the job writes its own stdout/err files, & deletes them on success
+            # -- but its '[TASK]' lines' file is always kept
+            log_lines = (
+                "log                        = $(LOG_FNAME_NOEXT).jobs.log\n"
+                "transfer_output_remaps     = "
+                f'"job.out = {out_noext}.out; job.err = {out_noext}.err; '
+                f'tasks.log = {out_noext}.tasks"'
+            )
 
         contents = f"""
 universe                   = container
@@ -183,14 +412,21 @@ Requirements               = {REQUIREMENTS_EWMS_SETS}
 +FileSystemDomain          = "blah" 
 
 # relative paths!
-log                        = $(LOG_FNAME_NOEXT).$(DAG_NODE_NAME).$(clusterid).log
-output                     = $(LOG_FNAME_NOEXT).$(DAG_NODE_NAME).$(clusterid).$(Process).out
-error                      = $(LOG_FNAME_NOEXT).$(DAG_NODE_NAME).$(clusterid).$(Process).err
+{log_lines}
 
 should_transfer_files      = YES
 when_to_transfer_output    = ON_EXIT_OR_EVICT
 transfer_executable        = false
 
+# for CLASSICAL_CHECKPOINT: the node's completed tasks -- transferred back on
+# exit/evict, then in again on a dag retry (see 'classical_job.py')
+CKPT_FNAME                 = $(LOG_FNAME_NOEXT).$(DAG_NODE_NAME).ckpt
+if $(CLASSICAL_CHECKPOINT)
+  if $(RETRY)
+    transfer_input_files   = $(CKPT_FNAME)
+  endif
+endif
+
 request_cpus               = {N_CORES}
 request_memory             = {WORKER_MEMORY}
 request_disk               = {WORKER_DISK}
@@ -208,7 +444,7 @@ environment = "{" ".join(env_vars)}"
 
 queue 1
         """
-        with open(output_dir / SUBMIT_FNAME, "w") as f:
+        with open(output_dir / get_submit_fname(log_mode), "w") as f:
             f.write(contents)
 
 
@@ -220,11 +456,15 @@ class EWMSRequestBuilder:
         output_dir: Path,
         test_vars: TestVars,
         task_image: Path,
+        n_workers: int = EWMS_N_WORKERS,
+        fname_extras: dict[str, Any] | None = None,
     ) -> Path:
         """Write a JSON file used for requesting an ewms workflow."""
 
         # figure filepath
-        fpath = output_dir / get_fname(EWMS_PREFIX, asdict(test_vars), ".json")
+        fpath = output_dir / get_fname(
+            EWMS_PREFIX, {**test_vars.fname_vars(), **(fname_extras or {})}, ".json"
+        )
         if fpath.exists():
             raise FileExistsError(f"{fpath} already exists")
 
@@ -238,11 +478,16 @@ class EWMSRequestBuilder:
                     "task_image": str(task_image),
                     "task_args": "",
                     "task_env": {
-                        k: str(v).lower()
-                        for k, v in asdict(test_vars).items()
-                        if k not in ["N_JOBS"]
+                        **{
+                            k: str(v).lower()
+                            for k, v in asdict(test_vars).items()
+                            if k not in ["N_JOBS"]
+                        },
+                        # for the work profiles' footprints
+                        "WORKER_MEMORY": WORKER_MEMORY,
+                        "WORKER_DISK": WORKER_DISK,
                     },
-                    "n_workers": EWMS_N_WORKERS,
+                    "n_workers": n_workers,
                     "pilot_config": {
                         "tag": "latest",
                         "image_source": "auto",
@@ -281,6 +526,293 @@ class EWMSRequestBuilder:
         return fpath
 
 
+@dataclass
+class GenJob:
+    """One independent artifact-generation job of the test matrix."""
+
+    kind: str  # "classical" or "ewms"
+    test_vars: TestVars
+    n_jobs: int = 0  # classical only
+    options: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SweepPoint:
+    """One point of the parameter sweep -- becomes a classical/EWMS pair."""
+
+    test_vars: TestVars  # the classical side's (TASKS_PER_JOB is an int)
+    n_tasks: int
+    ewms_n_workers: int = EWMS_N_WORKERS
+    dagman: DAGManTuning = DAGManTuning()
+
+    def ewms_test_vars(self) -> TestVars:
+        """Get the EWMS counterpart's test vars."""
+        classical_only = {
+            f.name: f.default
+            for f in fields(TestVars)
+            if f.metadata.get("classical_only")
+        }
+        return replace(self.test_vars, TASKS_PER_JOB="ewms", **classical_only)
+
+
+def get_default_sweep_points(n_tasks: int) -> list[SweepPoint]:
+    """Get the original (hard-coded) test suite as sweep points."""
+    return [
+        SweepPoint(tv, n_tasks)
+        for tasks_per_job in [1, 100]
+        for tv in [
+            TestVars(TASKS_PER_JOB=tasks_per_job),
+            TestVars(TASKS_PER_JOB=tasks_per_job, FAIL_PROB=0.01),
+            TestVars(TASKS_PER_JOB=tasks_per_job, DO_TASK_RUNTIME_POISSON="y"),
+            TestVars(TASKS_PER_JOB=tasks_per_job, WORKER_SPEED_FACTOR=(1.0, 5.0)),
+        ]
+    ]
+
+
+def load_sweep_spec(fpath: Path) -> dict[str, Any]:
+    """Load a sweep spec file (JSON, TOML, or YAML).
+
+    The spec has a "parameters" table mapping each swept name -- any
+    'TestVars' field, "n_tasks", or "EWMS_N_WORKERS" -- to a list of values,
+    and an optional "latin_hypercube" table with "n_samples" and "seed".
+    """
+    match fpath.suffix.lower():
+        case ".json":
+            with open(fpath) as f:
+                spec = json.load(f)
+        case ".toml":
+            import tomllib
+
+            with open(fpath, "rb") as f:
+                spec = tomllib.load(f)
+        case ".yaml" | ".yml":
+            import yaml  # type: ignore[import-untyped]  # optional dependency
+
+            with open(fpath) as f:
+                spec = yaml.safe_load(f)
+        case _:
+            raise ValueError(f"unknown sweep spec file type: {fpath}")
+
+    allowed = {x.name for x in fields(TestVars)} | set(SWEEP_SPECIAL_KEYS)
+    if unknown := set(spec.get("parameters", {})) - allowed:
+        raise ValueError(f"unknown sweep parameter(s): {sorted(unknown)}")
+    for key, values in spec.get("parameters", {}).items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"sweep parameter '{key}' must be a non-empty list")
+    return spec
+
+
+def latin_hypercube_indices(
+    n_levels: list[int],
+    n_samples: int,
+    seed: int | None,
+) -> list[tuple[int, ...]]:
+    """Subsample a discrete grid with a Latin hypercube.
+
+    Each dimension is cut into 'n_samples' strata mapped evenly onto its
+    levels, and each stratum is used exactly once (in random order).
+    """
+    rng = random.Random(seed)
+    columns = []
+    for n in n_levels:
+        strata = list(range(n_samples))
+        rng.shuffle(strata)
+        columns.append([k * n // n_samples for k in strata])
+    # dedupe while keeping order (few levels => repeated combos)
+    return list(dict.fromkeys(zip(*columns)))
+
+
+def expand_sweep(
+    spec: dict[str, Any],
+    default_n_tasks: int,
+    lhs_samples: int = 0,
+    lhs_seed: int | None = None,
+) -> list[SweepPoint]:
+    """Expand a sweep spec into sweep points (cartesian product or LHS subsample)."""
+    params = dict(spec.get("parameters", {}))
+    params.setdefault("TASKS_PER_JOB", [1, 100])
+    params.setdefault("n_tasks", [default_n_tasks])
+    params.setdefault("EWMS_N_WORKERS", [EWMS_N_WORKERS])
+
+    names = list(params)
+    levels = [params[n] for n in names]
+
+    lhs = spec.get("latin_hypercube", {})
+    lhs_samples = lhs_samples or lhs.get("n_samples", 0)
+    lhs_seed = lhs_seed if lhs_seed is not None else lhs.get("seed")
+    if lhs_samples:
+        combos: Iterable[tuple[Any, ...]] = (
+            tuple(levels[d][i] for d, i in enumerate(idx))
+            for idx in latin_hypercube_indices(
+                [len(v) for v in levels], lhs_samples, lhs_seed
+            )
+        )
+    else:
+        combos = itertools.product(*levels)
+
+    points = []
+    for combo in combos:
+        values = dict(zip(names, combo))
+        n_tasks = int(values.pop("n_tasks"))
+        ewms_n_workers = int(values.pop("EWMS_N_WORKERS"))
+        dagman = DAGManTuning(
+            **{k: int(values.pop(k)) for k in DAGMAN_DEFAULTS if k in values}
+        )
+        if isinstance(values.get("WORKER_SPEED_FACTOR"), list):
+            values["WORKER_SPEED_FACTOR"] = tuple(values["WORKER_SPEED_FACTOR"])
+        elif str(values.get("WORKER_SPEED_FACTOR")).lower() == "none":
+            values["WORKER_SPEED_FACTOR"] = None
+        points.append(SweepPoint(TestVars(**values), n_tasks, ewms_n_workers, dagman))
+    return points
+
+
+def plan_suite(
+    points: list[SweepPoint],
+    task_image: Path,
+    compress_dags: bool,
+    n_splices: int,
+) -> tuple[list[GenJob], list[dict[str, Any]]]:
+    """Turn sweep points into (deduplicated) generation jobs and an index of pairs."""
+    # only put the special sweep dims in filenames when they actually vary
+    n_tasks_varies = len({p.n_tasks for p in points}) > 1
+    n_workers_varies = len({p.ewms_n_workers for p in points}) > 1
+    dagman_varies = len({p.dagman for p in points}) > 1
+
+    gen_jobs: dict[str, GenJob] = {}
+    pairs = []
+
+    for i, point in enumerate(points):
+        tpj = point.test_vars.TASKS_PER_JOB
+        if not isinstance(tpj, int):
+            raise ValueError(f"classical TASKS_PER_JOB must be an int: {tpj}")
+        if point.n_tasks % tpj:
+            raise ValueError(
+                f"Total number of tasks {point.n_tasks} must be divisible by {tpj}"
+            )
+
+        extras = {"N_TASKS": point.n_tasks} if n_tasks_varies else {}
+        ewms_extras = {
+            **extras,
+            **({"EWMS_N_WORKERS": point.ewms_n_workers} if n_workers_varies else {}),
+        }
+
+        # classical condor/dagman
+        classical_extras = {
+            **extras,
+            **(point.dagman.settings() if dagman_varies else {}),
+        }
+        classical_stem = Path(
+            get_fname(
+                CLASSICAL_PREFIX,
+                {**point.test_vars.fname_vars(), **classical_extras},
+                ".dag",
+            )
+        ).stem
+        gen_jobs.setdefault(
+            classical_stem,
+            GenJob(
+                "classical",
+                point.test_vars,
+                n_jobs=point.n_tasks // tpj,
+                options={
+                    "compress": compress_dags,
+                    "n_splices": n_splices,
+                    "fname_extras": classical_extras,
+                    "dagman": point.dagman,
+                },
+            ),
+        )
+
+        # ewms
+        ewms_json = get_fname(
+            EWMS_PREFIX, {**point.ewms_test_vars().fname_vars(), **ewms_extras}, ".json"
+        )
+        gen_jobs.setdefault(
+            ewms_json,
+            GenJob(
+                "ewms",
+                point.ewms_test_vars(),
+                options={
+                    "task_image": task_image,
+                    "n_workers": point.ewms_n_workers,
+                    "fname_extras": ewms_extras,
+                },
+            ),
+        )
+
+        pairs.append(
+            {
+                "pair_id": f"P{i + 1:0{N_DIGITS_FNAME}d}",
+                "classical": classical_stem,
+                "ewms_json": ewms_json,
+                "n_tasks": point.n_tasks,
+                "ewms_n_workers": point.ewms_n_workers,
+                "test_vars": asdict(point.test_vars),
+                "dagman": point.dagman.settings(),
+            }
+        )
+
+    return list(gen_jobs.values()), pairs
+
+
+def run_gen_job(output_dir: Path, gen_job: GenJob) -> dict[str, Any]:
+    """Generate one artifact and return its manifest entry."""
+    t0 = time.monotonic()
+
+    extra: dict[str, Any] = {}
+    if gen_job.kind == "ewms":
+        fpath = EWMSRequestBuilder.write_request_json(
+            output_dir, gen_job.test_vars, **gen_job.options
+        )
+        files = [fpath]
+        n_nodes = 0
+    else:
+        fpath = DAGBuilder.write_dag_file(
+            output_dir, gen_job.test_vars, gen_job.n_jobs, **gen_job.options
+        )
+        files = [p for p in fpath.parent.iterdir() if ".dag" in p.name]
+        n_nodes = gen_job.n_jobs
+        # DAGMan's submit throttling -- assuming the pool's defaults are HTCondor's
+        dagman = gen_job.options.get("dagman") or DAGManTuning()
+        extra = {
+            "dagman": dagman.effective(),
+            "nominal_submit_rate": dagman.nominal_submit_rate(),  # jobs/sec
+            "min_submit_seconds": round(n_nodes / dagman.nominal_submit_rate(), 3),
+        }
+
+    return {
+        "kind": gen_job.kind,
+        "path": str(fpath.relative_to(output_dir)),
+        "size_bytes": sum(p.stat().st_size for p in files),
+        "n_files": len(files),
+        "n_nodes": n_nodes,
+        "generation_seconds": round(time.monotonic() - t0, 3),
+        "test_vars": asdict(gen_job.test_vars),
+        **extra,
+    }
+
+
+def generate_suite(
+    output_dir: Path,
+    gen_jobs: list[GenJob],
+    n_procs: int,
+) -> list[dict[str, Any]]:
+    """Run all the generation jobs through a process pool, then write the manifest."""
+    with ProcessPoolExecutor(max_workers=n_procs) as pool:
+        futures = [pool.submit(run_gen_job, output_dir, gj) for gj in gen_jobs]
+        entries = [f.result() for f in futures]  # keeps matrix order
+    for entry in entries:
+        LOGGER.info(
+            f"generated {entry['path']} "
+            f"({entry['size_bytes']} bytes, {entry['generation_seconds']}s)"
+        )
+
+    with open(output_dir / MANIFEST_FNAME, "w") as f:
+        json.dump({"artifacts": entries}, f, indent=4)
+
+    return entries
+
+
 def main() -> None:
     """Main."""
     parser = argparse.ArgumentParser(
@@ -298,52 +830,98 @@ def main() -> None:
         required=True,
         help="File path to the apptainer image used for each task",
     )
+    parser.add_argument(
+        "--compress-dags",
+        action="store_true",
+        help="gzip-compress the DAG files (decompress before submitting)",
+    )
+    parser.add_argument(
+        "--n-splices",
+        type=int,
+        default=0,
+        help="Split each DAG into this many sub-DAGs included via SPLICE (0: no splicing)",
+    )
+    parser.add_argument(
+        "--sweep-spec",
+        type=Path,
+        default=None,
+        help="Sweep spec file (JSON/TOML/YAML) -- if not given, use the default suite",
+    )
+    parser.add_argument(
+        "--lhs-samples",
+        type=int,
+        default=0,
+        help="Latin-hypercube subsample the sweep to this many points (0: full product)",
+    )
+    parser.add_argument(
+        "--lhs-seed",
+        type=int,
+        default=None,
+        help="Seed for the Latin-hypercube subsampling",
+    )
+    parser.add_argument(
+        "--run-seed",
+        type=int,
+        default=None,
+        help="Seed every pair's task draws (unless swept as RUN_SEED), so both "
+        "systems run the same workload -- see 'task.get_task_rng'",
+    )
+    parser.add_argument(
+        "--n-procs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of processes used to generate the artifacts",
+    )
     args = parser.parse_args()
 
     if not args.task_image.exists():
         raise FileNotFoundError(args.task_image)
 
-    # prep SCRATCH_DIR
-    if not SCRATCH_DIR.is_dir():
-        raise NotADirectoryError(SCRATCH_DIR)
-    if list(SCRATCH_DIR.iterdir()):
-        raise RuntimeError(f"{SCRATCH_DIR=} must be an empty directory")
-
-    # all dags share same submit file
-    DAGBuilder.write_submit_file(SCRATCH_DIR, args.task_image)
+    # prep scratch_dir
+    scratch_dir = get_next_scratch_dir(_BASE_SCRATCH)
+    if not scratch_dir.is_dir():
+        raise NotADirectoryError(scratch_dir)
+    if list(scratch_dir.iterdir()):
+        raise RuntimeError(f"{scratch_dir=} must be an empty directory")
 
     # prep tests
-    for tasks_per_job in [1, 100, "ewms"]:
-        LOGGER.info(f"making tests for {tasks_per_job=}")
-        test_vars = [
-            TestVars(TASKS_PER_JOB=tasks_per_job),
-            TestVars(TASKS_PER_JOB=tasks_per_job, FAIL_PROB=0.01),
-            TestVars(TASKS_PER_JOB=tasks_per_job, DO_TASK_RUNTIME_POISSON="y"),
-            TestVars(TASKS_PER_JOB=tasks_per_job, WORKER_SPEED_FACTOR=(1.0, 5.0)),
-        ]
+    if args.sweep_spec:
+        points = expand_sweep(
+            load_sweep_spec(args.sweep_spec),
+            args.n_tasks,
+            args.lhs_samples,
+            args.lhs_seed,
+        )
+    else:
+        points = get_default_sweep_points(args.n_tasks)
+    if args.run_seed is not None:
+        for point in points:
+            if point.test_vars.RUN_SEED is None:
+                point.test_vars = replace(point.test_vars, RUN_SEED=args.run_seed)
+
+    # all dags (w/ the same log mode) share same submit file
+    for log_mode in {"verbose"} | {p.test_vars.CLASSICAL_LOG_MODE for p in points}:
+        DAGBuilder.write_submit_file(scratch_dir, args.task_image, log_mode)
+
+    gen_jobs, pairs = plan_suite(
+        points,
+        args.task_image,
+        args.compress_dags,
+        args.n_splices,
+    )
+    LOGGER.info(
+        f"generating {len(gen_jobs)} artifacts for {len(pairs)} pairs "
+        f"with {args.n_procs} processes"
+    )
+    generate_suite(scratch_dir, gen_jobs, args.n_procs)
 
-        # ewms
-        if tasks_per_job == "ewms":
-            for tv in test_vars:
-                fpath = EWMSRequestBuilder.write_request_json(
-                    SCRATCH_DIR, tv, args.task_image
-                )
-                LOGGER.info(f"generated {str(fpath)}")
-        # classical condor/dagman
-        else:
-            if args.n_tasks % tasks_per_job:
-                raise ValueError(
-                    f"Total number of tasks {args.n_tasks} must be divisible by {tasks_per_job}"
-                )
-            n_jobs = int(args.n_tasks / tasks_per_job)
-            # write dags
-            for tv in test_vars:
-                fpath = DAGBuilder.write_dag_file(SCRATCH_DIR, tv, n_jobs)
-                LOGGER.info(f"generated {str(fpath)}")
-
-    # "ls" SCRATCH_DIR
-    LOGGER.info(f"ls {SCRATCH_DIR}")
-    for f in SCRATCH_DIR.iterdir():
+    # index of classical/EWMS pairs -- used by the runner(s)
+    with open(scratch_dir / INDEX_FNAME, "w") as f:
+        json.dump({"pairs": pairs}, f, indent=4)
+
+    # "ls" scratch_dir
+    LOGGER.info(f"ls {scratch_dir}")
+    for f in scratch_dir.iterdir():
         LOGGER.info(f)
 
 
@@ -0,0 +1,6 @@
+"""Make the repo's top-level scripts importable as modules."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
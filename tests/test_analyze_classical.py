@@ -0,0 +1,98 @@
+"""Tests for analyze_classical.py -- on per-node & shared job event log fixtures."""
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+import analyze_classical
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def parse(run_dir: Path):
+    jobs = analyze_classical.parse_run_dir(
+        run_dir, analyze_classical.DEFAULT_GLOB, 2024, n_procs=1, use_cache=False
+    )
+    return analyze_classical.analyze(jobs)
+
+
+def test_iter_events():
+    events = list(
+        analyze_classical.iter_events(FIXTURES / "classical_per_node/dag.J1.101.log")
+    )
+    assert [(code, job) for code, job, *_ in events] == [
+        ("000", "101.000"),
+        ("001", "101.000"),
+        ("005", "101.000"),
+    ]
+    assert events[0][3].startswith("Job submitted")
+    assert "DAG Node: J1" in events[0][4][0]
+
+
+def test_parse_timestamp_legacy():
+    assert analyze_classical.parse_timestamp(
+        "05/01 12:00:00", 2024
+    ) == analyze_classical.parse_timestamp("2024-05-01T12:00:00", 2024)
+
+
+def test_parse_log_file():
+    (job,) = analyze_classical.parse_log_file(
+        FIXTURES / "classical_per_node/dag.J2.103.log", 2024
+    )
+    assert job["node"] == "J2"
+    assert job["n_evictions"] == 1
+    # evicted, then re-run (queued again from the eviction)
+    (w1, q1, s1, e1, ok1), (w2, q2, s2, e2, ok2) = job["attempts"]
+    assert (w1, ok1, w2, ok2) == ("slot2@worker-b", False, "slot2@worker-b", True)
+    assert (s1 - q1, e1 - s1, s2 - q2, e2 - s2) == (4, 10, 10, 30)
+
+
+@pytest.mark.parametrize("run_dir", ["classical_per_node", "classical_shared"])
+def test_analyze(run_dir: str):
+    attempts, metrics, extras = parse(FIXTURES / run_dir)
+    assert metrics.n_units == 2
+    assert metrics.n_attempts == 4
+    assert metrics.n_ok == 2
+    assert metrics.n_retries == 2  # J1's DAG retry & J2's eviction
+    assert metrics.makespan == 80  # first submit until last successful end
+    assert extras["n_jobs"] == 3
+    assert extras["n_dag_retries"] == 1
+    assert extras["n_evictions"] == 1
+
+
+def test_dagman_own_logs_skipped():
+    jobs = analyze_classical.parse_run_dir(
+        FIXTURES / "classical_per_node",
+        analyze_classical.DEFAULT_GLOB,
+        2024,
+        n_procs=1,
+        use_cache=False,
+    )
+    assert sorted(j["job"] for j in jobs) == ["101.000", "102.000", "103.000"]
+
+
+def test_get_tasks_per_job(tmp_path: Path):
+    assert analyze_classical.get_tasks_per_job(FIXTURES / "classical_per_node") == 10
+    assert analyze_classical.get_tasks_per_job(FIXTURES / "classical_shared") is None
+    # a spliced, gzipped DAG: only the splices have VARS lines
+    (tmp_path / "top.dag").write_text("SPLICE S1 top.S1.dag\n")
+    with gzip.open(tmp_path / "top.S1.dag.gz", "wt") as f:
+        f.write('JOB J1 x.submit\nVARS J1 TASKS_PER_JOB="25"\n')
+    assert analyze_classical.get_tasks_per_job(tmp_path) == 25
+
+
+def test_throughput_in_tasks():
+    jobs = analyze_classical.parse_run_dir(
+        FIXTURES / "classical_shared", "*.log", 2024, n_procs=1, use_cache=False
+    )
+    _, per_node, _ = analyze_classical.analyze(jobs)
+    _, per_task, _ = analyze_classical.analyze(jobs, tasks_per_job=10)
+    # 2 nodes of 10 tasks each, in 80s
+    assert per_task.n_ok == per_node.n_ok == 2
+    assert per_task.n_tasks_ok == 20
+    assert per_task.throughput == pytest.approx(20 / 80)
+    assert per_task.throughput == pytest.approx(10 * per_node.throughput)
+    assert per_task.per_worker_throughput_mean == pytest.approx(
+        10 * per_node.per_worker_throughput_mean
+    )
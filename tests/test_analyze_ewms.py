@@ -0,0 +1,80 @@
+"""Tests for analyze_ewms.py -- on pilot stderr & job event log fixtures."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import analyze_ewms
+
+FIXTURES = Path(__file__).parent / "fixtures"
+WORKERS_DIR = FIXTURES / "ewms_workers"
+
+
+@pytest.fixture
+def workers():
+    return analyze_ewms.parse_workers_dir(
+        WORKERS_DIR,
+        analyze_ewms.DEFAULT_GLOB,
+        utc_offset_hours=0,
+        event_id_re=None,
+        n_procs=1,
+        use_cache=False,
+    )
+
+
+def test_parse_event_ids():
+    assert analyze_ewms.parse_event_ids("e1|3|1714564800.0|run") == ["3"]
+    assert analyze_ewms.parse_event_ids("4,5") == ["4", "5"]
+    assert analyze_ewms.parse_event_ids("hello") == []
+
+
+def test_parse_worker_file():
+    rec = analyze_ewms.parse_worker_file(
+        WORKERS_DIR / "pilot-0001.err", "w1", utc_offset_hours=0, event_id_re=None
+    )
+    # one row per event -- a batched message ("9,10") is two
+    assert [(a[0], a[5]) for a in rec["attempts"]] == [
+        ("7", False),
+        ("8", True),
+        ("9", True),
+        ("10", True),
+    ]
+    assert len(rec["output_times"]) == 2
+
+
+def test_units_keyed_by_event_id(workers):
+    attempts, metrics, extras = analyze_ewms.analyze(workers, request_time=None)
+    # event 7 failed on one pilot, then succeeded on the other
+    assert metrics.n_retries == 1
+    # a batched message's events each count as a task
+    assert metrics.n_units == metrics.n_tasks_ok == 4
+    assert extras["end_time_source"] == "pilot_log"
+
+
+def test_event_id_regex_override():
+    rec = analyze_ewms.parse_worker_file(
+        WORKERS_DIR / "pilot-0001.err",
+        "w1",
+        utc_offset_hours=0,
+        event_id_re=r"\(#(\d+)\)",
+    )
+    assert [a[0] for a in rec["attempts"]] == ["1", "2", "3"]
+
+
+def test_parse_pilot_job_log():
+    chirp = analyze_ewms.parse_pilot_job_log(FIXTURES / "ewms_pilots_job.log", 2024)
+    assert chirp["n_pilots"] == 2
+    assert chirp["n_success"] == 4
+    assert chirp["n_failed"] == 1
+    # each success-counter increase is that many successes, at that event's time
+    times = np.array(chirp["success_times"]) - min(chirp["success_times"])
+    assert sorted(times.tolist()) == [0, 2, 3, 3]
+
+
+def test_chirp_end_time(workers):
+    chirp = analyze_ewms.parse_pilot_job_logs(FIXTURES, "*_job.log", 2024)
+    _, metrics, extras = analyze_ewms.analyze(workers, None, chirp=chirp)
+    assert extras["end_time_source"] == "chirp"
+    assert metrics.t_last == extras["chirp_last_success_time"]
+    assert extras["chirp_n_success"] == 4
@@ -0,0 +1,204 @@
+"""Tests for test_suite_builder.py -- DAG writing, suite generation & sweeps."""
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+import test_suite_builder as tsb
+
+
+@pytest.fixture
+def output_dir(tmp_path: Path) -> Path:
+    tsb.DAGBuilder.write_submit_file(tmp_path, Path("/the/image.sif"))
+    return tmp_path
+
+
+def read_lines(fpath: Path) -> list[str]:
+    if fpath.suffix == ".gz":
+        with gzip.open(fpath, "rt") as f:
+            return f.read().splitlines()
+    return fpath.read_text().splitlines()
+
+
+def test_write_dag_file(output_dir: Path):
+    fpath = tsb.DAGBuilder.write_dag_file(
+        output_dir, tsb.TestVars(TASKS_PER_JOB=10), n_jobs=12
+    )
+    lines = read_lines(fpath)
+    jobs = [ln.split()[1] for ln in lines if ln.startswith("JOB ")]
+    assert jobs == [f"J{i:02d}" for i in range(1, 13)]
+    vars_lines = [ln for ln in lines if ln.startswith("VARS ")]
+    assert len(vars_lines) == 12
+    assert 'TASKS_PER_JOB="10"' in vars_lines[0]
+    assert f'LOG_FNAME_NOEXT="{fpath.stem}"' in vars_lines[0]
+    assert lines[-1] == tsb.DAG_RETRY_LINE.strip()
+    assert not any(ln.startswith("SPLICE") for ln in lines)
+    assert (fpath.parent / tsb.SUBMIT_FNAME).exists()
+
+
+def test_write_dag_file_chunked(output_dir: Path, monkeypatch):
+    # more nodes than fit in one chunk
+    monkeypatch.setattr(tsb, "DAG_NODES_PER_CHUNK", 3)
+    fpath = tsb.DAGBuilder.write_dag_file(
+        output_dir, tsb.TestVars(TASKS_PER_JOB=1), n_jobs=10
+    )
+    jobs = [ln.split()[1] for ln in read_lines(fpath) if ln.startswith("JOB ")]
+    assert jobs == [f"J{i:02d}" for i in range(1, 11)]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_write_dag_file_splices(output_dir: Path, compress: bool):
+    fpath = tsb.DAGBuilder.write_dag_file(
+        output_dir,
+        tsb.TestVars(TASKS_PER_JOB=10),
+        n_jobs=10,
+        compress=compress,
+        n_splices=3,
+    )
+    assert fpath.name.endswith(".dag.gz" if compress else ".dag")
+    splices = [ln.split() for ln in read_lines(fpath)]
+    assert [s[:2] for s in splices] == [["SPLICE", f"S{i}"] for i in (1, 2, 3)]
+    # the splices' nodes are numbered across the whole DAG, near-equally split
+    jobs = []
+    for _, _, splice_fname in splices:
+        gz = ".gz" if compress else ""
+        splice = read_lines(fpath.parent / f"{splice_fname}{gz}")
+        assert splice[-1] == tsb.DAG_RETRY_LINE.strip()
+        jobs.append([ln.split()[1] for ln in splice if ln.startswith("JOB ")])
+    assert [len(j) for j in jobs] == [4, 3, 3]
+    assert sum(jobs, []) == [f"J{i:02d}" for i in range(1, 11)]
+
+
+@pytest.mark.parametrize("n_splices", [0, 3])
+def test_write_dag_file_config(output_dir: Path, n_splices: int):
+    dagman = tsb.DAGManTuning(
+        DAGMAN_MAX_JOBS_IDLE=50, DAGMAN_MAX_SUBMITS_PER_INTERVAL=200
+    )
+    fpath = tsb.DAGBuilder.write_dag_file(
+        output_dir,
+        tsb.TestVars(TASKS_PER_JOB=10),
+        n_jobs=10,
+        n_splices=n_splices,
+        dagman=dagman,
+    )
+    top = read_lines(fpath)
+    config_fname = f"{fpath.stem}.config"
+    assert top[0] == f"CONFIG {config_fname}"
+    # only the non-default knobs
+    assert sorted(read_lines(fpath.parent / config_fname)) == [
+        "DAGMAN_MAX_JOBS_IDLE = 50",
+        "DAGMAN_MAX_SUBMITS_PER_INTERVAL = 200",
+    ]
+    # only in the top-level DAG (splices can't have their own)
+    assert sum(ln.startswith("CONFIG") for ln in top) == 1
+    splices = list(fpath.parent.glob(f"{fpath.stem}.S*.dag"))
+    assert len(splices) == n_splices
+    for splice in splices:
+        assert not any(ln.startswith("CONFIG") for ln in read_lines(splice))
+
+
+def test_write_dag_file_default_config(output_dir: Path):
+    # no knobs set -- no config file
+    fpath = tsb.DAGBuilder.write_dag_file(
+        output_dir, tsb.TestVars(TASKS_PER_JOB=1), 2, dagman=tsb.DAGManTuning()
+    )
+    assert not read_lines(fpath)[0].startswith("CONFIG")
+    assert not list(fpath.parent.glob("*.config"))
+
+
+def test_write_dag_file_exists(output_dir: Path):
+    tsb.DAGBuilder.write_dag_file(output_dir, tsb.TestVars(TASKS_PER_JOB=1), 2)
+    with pytest.raises(FileExistsError):
+        tsb.DAGBuilder.write_dag_file(output_dir, tsb.TestVars(TASKS_PER_JOB=1), 2)
+
+
+def test_plan_suite_dedups_artifacts():
+    points = tsb.get_default_sweep_points(1000)
+    gen_jobs, pairs = tsb.plan_suite(points, Path("/the/image.sif"), False, 0)
+    assert len(pairs) == len(points)
+    assert [p["pair_id"] for p in pairs] == [
+        f"P{i:0{tsb.N_DIGITS_FNAME}d}" for i in range(1, len(points) + 1)
+    ]
+    # one artifact per distinct DAG / EWMS request
+    n_dags = len({p["classical"] for p in pairs})
+    n_jsons = len({p["ewms_json"] for p in pairs})
+    assert len(gen_jobs) == n_dags + n_jsons
+    assert sum(gj.kind == "ewms" for gj in gen_jobs) == n_jsons
+
+
+def test_plan_suite_indivisible():
+    point = tsb.SweepPoint(tsb.TestVars(TASKS_PER_JOB=3), n_tasks=10)
+    with pytest.raises(ValueError):
+        tsb.plan_suite([point], Path("/the/image.sif"), False, 0)
+
+
+def test_generate_suite(output_dir: Path):
+    points = tsb.get_default_sweep_points(100)
+    gen_jobs, _ = tsb.plan_suite(points, Path("/the/image.sif"), False, 0)
+    entries = tsb.generate_suite(output_dir, gen_jobs, n_procs=2)
+    # in the matrix's order, each w/ its artifact on disk
+    assert [e["kind"] for e in entries] == [gj.kind for gj in gen_jobs]
+    for entry, gen_job in zip(entries, gen_jobs):
+        assert (output_dir / entry["path"]).exists()
+        assert entry["n_nodes"] == gen_job.n_jobs
+    manifest = json.loads((output_dir / tsb.MANIFEST_FNAME).read_text())
+    assert [a["path"] for a in manifest["artifacts"]] == [e["path"] for e in entries]
+
+
+def test_latin_hypercube_indices():
+    idx = tsb.latin_hypercube_indices([4, 4], n_samples=4, seed=1)
+    assert len(idx) == 4
+    # each level of each dimension is used exactly once
+    for d in range(2):
+        assert sorted(i[d] for i in idx) == [0, 1, 2, 3]
+    # seeded
+    assert idx == tsb.latin_hypercube_indices([4, 4], n_samples=4, seed=1)
+
+
+def test_latin_hypercube_indices_few_levels():
+    idx = tsb.latin_hypercube_indices([2, 3], n_samples=6, seed=0)
+    assert len(idx) == len(set(idx))  # deduped
+    assert all(0 <= a < 2 and 0 <= b < 3 for a, b in idx)
+
+
+def test_expand_sweep_cartesian():
+    spec = {
+        "parameters": {
+            "TASK_RUNTIME": [10, 60],
+            "TASKS_PER_JOB": [1, 100],
+            "WORKER_SPEED_FACTOR": [[1.0, 5.0], "None"],
+        }
+    }
+    points = tsb.expand_sweep(spec, default_n_tasks=1000)
+    assert len(points) == 8
+    assert {p.n_tasks for p in points} == {1000}
+    assert {p.ewms_n_workers for p in points} == {tsb.EWMS_N_WORKERS}
+    assert {p.test_vars.WORKER_SPEED_FACTOR for p in points} == {(1.0, 5.0), None}
+
+
+def test_expand_sweep_lhs():
+    spec = {
+        "parameters": {"TASK_RUNTIME": [10, 20, 30, 40], "n_tasks": [1, 2, 3, 4]},
+        "latin_hypercube": {"n_samples": 4, "seed": 3},
+    }
+    points = tsb.expand_sweep(spec, default_n_tasks=1000)
+    assert sorted(p.test_vars.TASK_RUNTIME for p in points) == [10, 20, 30, 40]
+    assert sorted(p.n_tasks for p in points) == [1, 2, 3, 4]
+    # '--lhs-samples' overrides the spec's
+    assert len(tsb.expand_sweep(spec, 1000, lhs_samples=1)) == 1
+
+
+def test_load_sweep_spec(tmp_path: Path):
+    fpath = tmp_path / "sweep.toml"
+    fpath.write_text("[parameters]\nTASK_RUNTIME = [10, 60]\nn_tasks = [100]\n")
+    assert tsb.load_sweep_spec(fpath)["parameters"]["TASK_RUNTIME"] == [10, 60]
+
+    fpath = tmp_path / "sweep.json"
+    fpath.write_text(json.dumps({"parameters": {"NOT_A_VAR": [1]}}))
+    with pytest.raises(ValueError):
+        tsb.load_sweep_spec(fpath)
+    fpath.write_text(json.dumps({"parameters": {"TASK_RUNTIME": []}}))
+    with pytest.raises(ValueError):
+        tsb.load_sweep_spec(fpath)
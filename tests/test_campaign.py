@@ -0,0 +1,198 @@
+"""Tests for campaign.py -- waiting on a pair & running pairs concurrently."""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+import campaign
+
+
+class FakeRestClient:
+    """Serves the workflow object & records the requests."""
+
+    def __init__(self, workflow: dict):
+        self.workflow = workflow
+        self.requests: list[tuple[str, str]] = []
+
+    async def request(self, method: str, path: str, body=None):
+        self.requests.append((method, path))
+        return self.workflow if method == "GET" else {}
+
+
+class QuietQueue:
+    """An output queue that never yields a message."""
+
+    def open_sub(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.Event().wait()
+
+
+def make_run(pair: str = "P1") -> campaign.PairRun:
+    return campaign.PairRun(
+        "runs_1", pair, "wf", time.time(), campaign.SetupTimes(0.1, 0.0), None
+    )
+
+
+def pilots_until(monkeypatch, n_polls: int) -> None:
+    """The workflow's pilots leave the queue after 'n_polls' checks."""
+    answers = iter([True] * n_polls)
+    monkeypatch.setattr(
+        campaign, "has_pilots", lambda *args: asyncio.sleep(0, next(answers, False))
+    )
+
+
+def test_dagman_out_tail(tmp_path: Path):
+    fpath = tmp_path / "x.dag.dagman.out"
+    tail = campaign.DagmanOutTail(fpath)
+    assert tail.poll() is None  # not started
+    fpath.write_text("starting\n... EXITING WITH STA")
+    assert tail.poll() is None  # a partial line
+    with open(fpath, "a") as f:
+        f.write("TUS 2\n")
+    assert tail.poll() == 2
+
+
+def test_wait_for_pair_done(tmp_path: Path, monkeypatch):
+    dagman_out = tmp_path / "x.dag.dagman.out"
+    dagman_out.write_text("EXITING WITH STATUS 0\n")
+    drain = campaign.OutputDrain(2, tmp_path / "recvd.bin")
+    drain.seen, drain.t_last = {0, 1}, 123.0
+    pilots_until(monkeypatch, 2)
+    rc = FakeRestClient({"deactivated": None})
+
+    run = make_run()
+    asyncio.run(campaign.wait_for_pair_done(rc, run, dagman_out, drain, "attr", 0))
+    assert run.t_classical_done and run.t_drained
+    assert run.t_ewms_done == 123.0  # the last output, not when it was noticed
+    assert run.t_drained >= run.t_classical_done
+    # marked finished once, w/o checking the workflow (all outputs were in)
+    assert rc.requests == [("POST", "/v1/workflows/wf/actions/finished")]
+
+
+def test_wait_for_pair_done_deactivated(tmp_path: Path, monkeypatch):
+    dagman_out = tmp_path / "x.dag.dagman.out"
+    dagman_out.write_text("EXITING WITH STATUS 1\n")
+    drain = campaign.OutputDrain(2, tmp_path / "recvd.bin")  # nothing received
+    pilots_until(monkeypatch, 0)
+    rc = FakeRestClient({"deactivated": "ABORTED", "deactivated_timestamp": 50.0})
+
+    run = make_run()
+    asyncio.run(campaign.wait_for_pair_done(rc, run, dagman_out, drain, "attr", 0))
+    assert run.t_ewms_done == 50.0
+    assert run.t_drained
+
+
+@pytest.fixture
+def fake_pairs(monkeypatch):
+    """Each pair 'runs' for its 'n_tasks' centiseconds -- returns the max number
+    of pairs seen running at once.
+    """
+    running: list[str] = []
+    max_running = [0]
+
+    async def run_pair(rc, runs_dir, pair, serve_kwargs):
+        run = make_run(pair.name)
+        run.runs_dir = runs_dir.name
+        return run
+
+    async def wait_for_pair_done(rc, run, dagman_out, drain, *args):
+        running.append(run.pair)
+        max_running[0] = max(max_running[0], len(running))
+        await asyncio.sleep(drain.n_events / 100)
+        running.remove(run.pair)
+        run.t_drained = time.time()
+
+    async def get_output_queue(rc, workflow_id):
+        return QuietQueue()
+
+    async def no_jobs(owner, interval):
+        pass
+
+    monkeypatch.setattr(campaign, "run_pair", run_pair)
+    monkeypatch.setattr(campaign, "wait_for_pair_done", wait_for_pair_done)
+    monkeypatch.setattr(campaign, "get_output_queue", get_output_queue)
+    monkeypatch.setattr(campaign, "wait_for_no_jobs", no_jobs)
+    return max_running
+
+
+def run_campaign(
+    tmp_path: Path, concurrency: int, durations: dict[str, int], settle: float = 0
+) -> campaign.Campaign:
+    args = argparse.Namespace(
+        concurrency=concurrency,
+        settle=settle,
+        owner="ewms",
+        pilot_attr="attr",
+        poll_interval=0,
+        base_dir=tmp_path,
+    )
+    camp = campaign.Campaign(FakeRestClient({}), args)
+    runs_dir = tmp_path / "runs_1"
+
+    async def run_all():
+        await asyncio.gather(
+            *[
+                camp.run(runs_dir, campaign.Pair(name, "dag", f"{name}.json", n))
+                for name, n in durations.items()
+            ]
+        )
+
+    asyncio.run(run_all())
+    return camp
+
+
+def test_campaign_concurrency(tmp_path: Path, fake_pairs):
+    # P3 waits for a slot -- P1's, since P2 runs longer
+    camp = run_campaign(tmp_path, 2, {"P1": 10, "P2": 30, "P3": 10})
+    assert fake_pairs[0] == 2
+    runs = {r.pair: r for r in camp.runs}
+    assert [r.pair for r in camp.runs] == ["P1", "P3", "P2"]  # in order done
+    assert sorted(runs["P1"].concurrent_with) == ["runs_1/P2"]
+    assert sorted(runs["P2"].concurrent_with) == ["runs_1/P1", "runs_1/P3"]
+    assert sorted(runs["P3"].concurrent_with) == ["runs_1/P2"]
+    # the pool was never idle between pairs
+    assert all(r.idle_before is None for r in camp.runs)
+    assert not camp.running
+
+    lines = (tmp_path / campaign.CAMPAIGN_LOG_FNAME).read_text().splitlines()
+    assert [json.loads(ln)["pair"] for ln in lines] == ["P1", "P3", "P2"]
+    campaign.log_summary(camp.runs, 0.0)
+
+
+def test_campaign_idle(tmp_path: Path, fake_pairs):
+    # one at a time -- the pool's idle for the settle period between pairs
+    camp = run_campaign(tmp_path, 1, {"P1": 1, "P2": 1}, settle=0.1)
+    assert fake_pairs[0] == 1
+    first, second = camp.runs
+    assert first.idle_before is None  # nothing ran before it
+    assert second.idle_before == second.t_started - first.t_drained
+    assert second.idle_before >= 0.1
+    assert not first.concurrent_with and not second.concurrent_with
+
+
+def test_pair_files_not_shared(tmp_path: Path):
+    # 2 pairs w/ the same EWMS request JSON get their own files
+    pairs = [campaign.Pair(name, "dag", "shared.json", 10) for name in ["P1", "P2"]]
+    assert len({campaign.get_pair_dir(tmp_path, p) for p in pairs}) == 2
+
+    (tmp_path / "dag").mkdir()
+    pair_dir = campaign.get_pair_dir(tmp_path, pairs[0])
+    pair_dir.mkdir()
+    (pair_dir / campaign.RECVD_FNAME).touch()
+    with pytest.raises(FileExistsError):  # before submitting anything
+        asyncio.run(campaign.run_pair(FakeRestClient({}), tmp_path, pairs[0], {}))
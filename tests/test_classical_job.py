@@ -0,0 +1,149 @@
+"""Tests for classical_job.py -- in-process runs of a node's tasks."""
+
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+
+import classical_job
+
+N_TASKS = 4
+FIRST_INDEX = 4  # node J0002's
+ENV = {
+    "TASKS_PER_JOB": str(N_TASKS),
+    "TASK_LAUNCH_MODE": classical_job.INPROCESS,
+    "TASK_RUNTIME": "0",
+    "FAIL_PROB": "0",
+    "DO_TASK_RUNTIME_POISSON": "n",
+    "WORKER_SPEED_FACTOR": "None",
+    "DAG_NODE_NAME": "J0002",
+}
+TASK_LINE_RE = re.compile(
+    r"\[TASK\] n=(\d+) index=(\d+) start=\d+\.\d{3} wall=\d+\.\d{3} work=\d+\.\d{3}"
+)
+
+
+@pytest.fixture
+def job_env(tmp_path: Path, monkeypatch) -> Path:
+    """Run the job in a scratch dir, like node J0002 w/ instant tasks."""
+    monkeypatch.chdir(tmp_path)
+    for name, value in ENV.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("CLASSICAL_LOG_MODE", raising=False)
+    return tmp_path
+
+
+@dataclass
+class Tasks:
+    """The task indexes run -- & which ones fail."""
+
+    ran: list[int] = field(default_factory=list)
+    fail: set[int] = field(default_factory=set)
+
+
+@pytest.fixture
+def tasks(monkeypatch) -> Tasks:
+    tasks = Tasks()
+    run_task_inprocess = classical_job.run_task_inprocess
+
+    def run(task_module, task_kwargs: dict) -> float:
+        tasks.ran.append(task_kwargs["task_index"])
+        if task_kwargs["task_index"] in tasks.fail:
+            raise classical_job.TaskFailed("exited with 1")
+        return run_task_inprocess(task_module, task_kwargs)
+
+    monkeypatch.setattr(classical_job, "run_task_inprocess", run)
+    return tasks
+
+
+def test_checkpoint_resume(job_env: Path, tasks: Tasks, monkeypatch, capsys):
+    ckpt = job_env / "J0002.ckpt"
+    ckpt.write_text("0\n")  # a previous attempt completed the 1st task
+    monkeypatch.setenv("CLASSICAL_CHECKPOINT", "true")
+    monkeypatch.setenv("CKPT_FNAME", str(ckpt))
+
+    # this attempt fails on the 3rd task...
+    tasks.fail = {FIRST_INDEX + 2}
+    with pytest.raises(SystemExit):
+        classical_job.main()
+    assert tasks.ran == [FIRST_INDEX + 1, FIRST_INDEX + 2]
+    assert classical_job.load_checkpoint(ckpt) == {0, 1}
+    assert "[CHECKPOINT] 1/4 tasks already completed" in capsys.readouterr().out
+
+    # ...& the retry resumes from it
+    tasks.ran.clear()
+    tasks.fail.clear()
+    classical_job.main()
+    assert tasks.ran == [FIRST_INDEX + 2, FIRST_INDEX + 3]
+    assert ckpt.read_text().split() == ["0", "1", "2", "3"]
+    out = capsys.readouterr().out
+    assert "[CHECKPOINT] 2/4 tasks already completed" in out
+    assert "All 4 tasks succeeded (2 in previous attempts)" in out
+
+
+def test_checkpoint_all_done(job_env: Path, tasks: Tasks, monkeypatch, capsys):
+    ckpt = job_env / "J0002.ckpt"
+    ckpt.write_text("".join(f"{i}\n" for i in range(N_TASKS)))
+    monkeypatch.setenv("CLASSICAL_CHECKPOINT", "true")
+    monkeypatch.setenv("CKPT_FNAME", str(ckpt))
+
+    classical_job.main()
+    assert not tasks.ran
+    assert "All 4 tasks succeeded (4 in previous attempts)" in capsys.readouterr().out
+
+
+def test_no_checkpoint(job_env: Path, tasks: Tasks, monkeypatch):
+    monkeypatch.delenv("CLASSICAL_CHECKPOINT", raising=False)
+    classical_job.main()
+    assert tasks.ran == [FIRST_INDEX + i for i in range(N_TASKS)]
+
+
+def run_job(cwd: Path, log_mode: str, **env: str) -> subprocess.CompletedProcess:
+    """Run the job as its own process -- like condor does (its output's redirected)."""
+    return subprocess.run(
+        [sys.executable, classical_job.__file__],
+        cwd=cwd,
+        env={**os.environ, **ENV, "CLASSICAL_LOG_MODE": log_mode, **env},
+        capture_output=True,
+        text=True,
+    )
+
+
+def assert_task_lines(lines: list[str]) -> None:
+    """One '[TASK]' line per task, in order, w/ its (global) index."""
+    matches = [m for ln in lines if (m := TASK_LINE_RE.fullmatch(ln))]
+    assert [(int(m[1]), int(m[2])) for m in matches] == [
+        (i + 1, FIRST_INDEX + i) for i in range(N_TASKS)
+    ]
+
+
+def test_compact(tmp_path: Path):
+    proc = run_job(tmp_path, classical_job.COMPACT)
+    assert proc.returncode == 0, proc.stderr
+    assert_task_lines(proc.stdout.splitlines())
+    assert "Launching task" not in proc.stdout
+    assert not (tmp_path / classical_job.TASKS_FNAME).exists()
+
+
+def test_compact_failures_ok(tmp_path: Path):
+    proc = run_job(tmp_path, classical_job.COMPACT_FAILURES)
+    assert proc.returncode == 0
+    # the job's own output's discarded, but its '[TASK]' lines are kept
+    for fname in classical_job.OWN_OUTPUT_FNAMES:
+        assert not (tmp_path / fname).exists()
+    assert_task_lines((tmp_path / classical_job.TASKS_FNAME).read_text().splitlines())
+    assert not proc.stdout
+
+
+def test_compact_failures_failed(tmp_path: Path):
+    proc = run_job(tmp_path, classical_job.COMPACT_FAILURES, FAIL_PROB="1")
+    assert proc.returncode == 1
+    # a failed job keeps its own output (& its tasks.log)
+    out, err = (tmp_path / fname for fname in classical_job.OWN_OUTPUT_FNAMES)
+    assert "[FAIL] Task 1" in err.read_text()
+    assert out.exists()
+    assert (tmp_path / classical_job.TASKS_FNAME).exists()
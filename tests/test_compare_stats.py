@@ -0,0 +1,52 @@
+"""Tests for compare_stats.py."""
+
+import math
+
+import numpy as np
+import pytest
+
+import compare_stats
+
+RATIO = compare_stats.STATISTICS["makespan_ratio"][1]
+
+
+def test_bootstrap_ci_brackets_estimate():
+    rng = np.random.default_rng(0)
+    classical = rng.normal(100, 5, size=20)
+    ewms = classical * 0.8 + rng.normal(0, 2, size=20)
+    estimate, low, high = compare_stats.bootstrap(
+        classical, ewms, RATIO, n_boot=2000, confidence=0.95, rng=rng
+    )
+    assert estimate == pytest.approx(ewms.mean() / classical.mean())
+    assert low < estimate < high
+    assert 0.7 < low and high < 0.9
+
+
+def test_bootstrap_keeps_pairs_together():
+    # every pair's ratio is exactly 2, so every resample's is too
+    classical = np.array([1.0, 10.0, 100.0])
+    estimate, low, high = compare_stats.bootstrap(
+        classical, 2 * classical, RATIO, 500, 0.9, np.random.default_rng(1)
+    )
+    assert estimate == low == pytest.approx(high) == pytest.approx(2)
+
+
+def test_bootstrap_single_pair():
+    estimate, low, high = compare_stats.bootstrap(
+        np.array([10.0]), np.array([5.0]), RATIO, 100, 0.95, np.random.default_rng()
+    )
+    assert estimate == 0.5
+    assert math.isnan(low) and math.isnan(high)
+
+
+@pytest.mark.parametrize(
+    "n,rel_half_width,precision,expected",
+    [
+        (1, 0.5, 0.05, None),  # can't tell from one
+        (4, math.nan, 0.05, None),
+        (4, 0.04, 0.05, 0),  # already there
+        (4, 0.10, 0.05, 12),  # half-width halves w/ 4x the reps
+    ],
+)
+def test_more_reps_needed(n, rel_half_width, precision, expected):
+    assert compare_stats.more_reps_needed(n, rel_half_width, precision) == expected
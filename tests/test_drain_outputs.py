@@ -0,0 +1,81 @@
+"""Tests for ewms_external_drain_outputs.py."""
+
+import asyncio
+import contextlib
+
+import numpy as np
+import pytest
+
+import event_envelope
+import ewms_external_drain_outputs as drain
+from event_records import TRACE_DTYPE, read_records
+
+
+class FakeQueue:
+    """Yields the messages, then raises 'error' (if any) -- like a dropped connection."""
+
+    def __init__(self, messages: list[str], error: Exception | None = None):
+        self.messages = messages
+        self.error = error
+
+    @contextlib.asynccontextmanager
+    async def open_sub(self):
+        async def sub():
+            for msg in self.messages:
+                yield msg
+            if self.error:
+                raise self.error
+
+        yield sub()
+
+
+def make_output(seq: int, send_ts: float = 100.0) -> str:
+    part = event_envelope.encode(seq, "run", send_ts=send_ts)
+    return event_envelope.append_task_fields(
+        part, send_ts + 1, send_ts + 3, "w1", "startup_s=0.5"
+    )
+
+
+def test_parse_message():
+    assert drain.parse_message("1,2") == [(1, None), (2, None)]
+    assert drain.parse_message("nope") == [(-1, None)]
+    ((seq, env),) = drain.parse_message(make_output(7))
+    assert seq == 7 and env.worker == "w1"
+
+
+def test_summary_breakdown():
+    summary = drain.DrainSummary(None, window=10)
+    ((seq, env),) = drain.parse_message(make_output(7))
+    summary.add(seq, 104.0, env)
+    assert summary.n == 1
+    assert list(summary.recent) == [4.0]
+    # send->start, start->end, end->receive, & startup
+    assert list(summary.recent_breakdown) == [(1.0, 2.0, 1.0, 0.5)]
+    summary.log()
+
+
+def test_sub_events_to_records(tmp_path):
+    queue = FakeQueue([make_output(0), f"{make_output(1)},{make_output(2)}"])
+    n = asyncio.run(
+        drain.sub_events_to_records(
+            queue, tmp_path / "recvd.bin", 60, [], traces=tmp_path / "traces.bin"
+        )
+    )
+    assert n == 3
+    assert read_records(tmp_path / "recvd.bin")["event_id"].tolist() == [0, 1, 2]
+    traces = read_records(tmp_path / "traces.bin", dtype=TRACE_DTYPE)
+    assert traces["event_id"].tolist() == [0, 1, 2]
+    assert np.allclose(traces["task_startup_s"], 0.5)
+
+
+def test_sub_events_to_records_flushes_on_error(tmp_path):
+    queue = FakeQueue([make_output(0), make_output(1)], error=ConnectionError())
+    with pytest.raises(ConnectionError):
+        asyncio.run(
+            drain.sub_events_to_records(
+                queue, tmp_path / "recvd.bin", 60, [], traces=tmp_path / "traces.bin"
+            )
+        )
+    # both files still get the buffered records
+    assert len(read_records(tmp_path / "recvd.bin")) == 2
+    assert len(read_records(tmp_path / "traces.bin", dtype=TRACE_DTYPE)) == 2
@@ -0,0 +1,40 @@
+"""Tests for event_envelope.py."""
+
+import math
+
+import pytest
+
+import event_envelope
+
+
+def test_encode_decode():
+    part = event_envelope.encode(42, "run-1", send_ts=1714564800.5)
+    assert part == "e1|42|1714564800.500000|run-1"
+    env = event_envelope.decode(part)
+    assert (env.seq, env.send_ts, env.run_id) == (42, 1714564800.5, "run-1")
+    assert math.isnan(env.task_start_ts) and env.worker == ""
+
+
+def test_forbidden_chars_are_replaced():
+    part = event_envelope.encode(1, "a|b,c", send_ts=0)
+    assert event_envelope.decode(part).run_id == "a_b_c"
+    assert event_envelope.BATCH_SEP not in part
+
+
+def test_append_task_fields():
+    part = event_envelope.encode(7, "run", send_ts=10)
+    part = event_envelope.append_task_fields(
+        part, 11, 12.25, "slot1@w,1", "startup=0.5"
+    )
+    env = event_envelope.decode(part)
+    assert (env.task_start_ts, env.task_end_ts, env.worker) == (11, 12.25, "slot1@w_1")
+    assert env.extra == ["startup=0.5"]
+    assert env.extra_float("startup") == 0.5
+    assert math.isnan(env.extra_float("missing"))
+
+
+@pytest.mark.parametrize("part", ["7", "e2|1|0|run", ""])
+def test_decode_not_an_envelope(part: str):
+    assert not event_envelope.is_envelope(part)
+    with pytest.raises(ValueError):
+        event_envelope.decode(part)
@@ -0,0 +1,60 @@
+"""Tests for ewms_external.py."""
+
+import asyncio
+import json
+
+import pytest
+
+import event_envelope
+import ewms_external
+
+
+@pytest.mark.parametrize("n_tasks,n_shards", [(10, 3), (9, 3), (2, 4), (1000, 7)])
+def test_split_shards(n_tasks: int, n_shards: int):
+    shards = ewms_external.split_shards(n_tasks, n_shards)
+    assert len(shards) == n_shards
+    # disjoint, contiguous & covering
+    assert [i for s in shards for i in s] == list(range(n_tasks))
+    # near-equal
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+
+
+class FakeRestClient:
+    """Records the request & returns a workflow w/ one task directive."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def request(self, method, path, body=None):
+        self.calls.append((method, path, body))
+        return {
+            "workflow": {"workflow_id": "WF1"},
+            "task_directives": [{"input_queues": ["IN"], "output_queues": ["OUT"]}],
+        }
+
+
+def test_request_ewms_priority(tmp_path):
+    fpath = tmp_path / "ewms.json"
+    fpath.write_text(json.dumps({"tasks": [{"worker_config": {"priority": 1}}]}))
+    rc = FakeRestClient()
+    ids = asyncio.run(ewms_external.request_ewms(rc, fpath, priority=99))
+    assert ids == ("WF1", "IN", "OUT")
+    ((method, path, body),) = rc.calls
+    assert (method, path) == ("POST", "/v1/workflows")
+    assert body["tasks"][0]["worker_config"]["priority"] == 99
+
+
+def test_iter_event_id_batches():
+    assert list(ewms_external.iter_event_id_batches(3, 10, 3)) == [
+        range(3, 6),
+        range(6, 9),
+        range(9, 10),
+    ]
+
+
+def test_make_message_body():
+    assert ewms_external.make_message_body(range(3, 6)) == "3,4,5"
+    body = ewms_external.make_message_body(range(3, 5), envelope_run_id="run")
+    parts = body.split(event_envelope.BATCH_SEP)
+    assert [event_envelope.decode(p).seq for p in parts] == [3, 4]
+    assert {event_envelope.decode(p).run_id for p in parts} == {"run"}
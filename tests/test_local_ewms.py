@@ -0,0 +1,99 @@
+"""Tests for local_ewms.py -- a workflow's round trip through the stand-in server."""
+
+import asyncio
+import contextlib
+import socket
+
+from rest_tools.client import RestClient
+
+import ewms_client
+import local_ewms
+import local_mq
+
+LEASE_TIMEOUT = 0.5  # seconds
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def running_server(state: local_ewms.LocalState):
+    port = get_free_port()
+    server = asyncio.create_task(local_ewms.serve("localhost", port, state))
+    await asyncio.sleep(0.1)  # let it start listening
+    try:
+        yield RestClient(f"http://localhost:{port}")
+    finally:
+        server.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await server
+
+
+async def round_trip() -> tuple[local_ewms.LocalState, list[str]]:
+    state = local_ewms.LocalState(activation_delay=0.2, lease_timeout=LEASE_TIMEOUT)
+    async with running_server(state) as rc:
+        # request
+        resp = await rc.request(
+            "POST",
+            "/v1/workflows",
+            {
+                "public_queue_aliases": ["input-queue", "output-queue"],
+                "tasks": [
+                    {
+                        "task_image": "/the/image.sif",
+                        "input_queue_aliases": ["input-queue"],
+                        "output_queue_aliases": ["output-queue"],
+                    }
+                ],
+            },
+        )
+        workflow_id = resp["workflow"]["workflow_id"]
+        assert resp["task_directives"][0]["input_queues"] == [
+            f"input-queue-{workflow_id}"
+        ]
+
+        # activation
+        mqprofiles, activation = await ewms_client.wait_for_activation(
+            rc, workflow_id, first_delay=0.1
+        )
+        assert activation.n_probes > 1  # not activated on the first probe
+        queues = {p["alias"]: ewms_client.queue_from_mqprofile(p) for p in mqprofiles}
+        assert all(isinstance(q, local_mq.LocalQueue) for q in queues.values())
+        in_queue = queues["input-queue"]
+        in_queue.timeout = 1
+
+        # publish
+        async with in_queue.open_pub() as pub:
+            for data in ["a", "b"]:
+                await pub.send(data)
+
+        # lease w/o settling -- it's redelivered once the lease expires
+        sub = local_mq.LocalManualSub(in_queue, in_queue.make_rest_client())
+        first = await sub._get()
+        assert first and first.data == "a"
+        await asyncio.sleep(LEASE_TIMEOUT + 0.1)
+
+        # drain (acking) -- the expired lease comes back after the rest
+        async with in_queue.open_sub() as drain:
+            drained = [data async for data in drain]
+
+        await ewms_client.finish_workflow(rc, workflow_id)
+        assert (await ewms_client.get_workflow(rc, workflow_id))["deactivated"]
+    return state, drained
+
+
+def test_round_trip():
+    state, drained = asyncio.run(round_trip())
+    assert drained == ["b", "a"]
+    (in_mq,) = [mq for mqid, mq in state.mqs.items() if mqid.startswith("input")]
+    assert in_mq.counts() == {
+        "n_ready": 0,
+        "n_leased": 0,
+        "n_published": 2,
+        "n_acked": 2,
+        "n_nacked": 0,
+        "n_redelivered": 1,
+    }
@@ -0,0 +1,107 @@
+"""Tests for monitor.py -- following the classical logs & the rolling rate."""
+
+import math
+import shutil
+from pathlib import Path
+
+import pytest
+
+import analyze_classical
+import monitor
+
+FIXTURES = Path(__file__).parent / "fixtures"
+TPJ = 10
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """Freeze the monitor's clock -- set 'now[0]' to move it."""
+    clock = [NOW]
+    monkeypatch.setattr(monitor.time, "time", lambda: clock[0])
+    return clock
+
+
+def make_tail(dag_dir: Path) -> tuple[monitor.ClassicalTail, monitor.SideStats]:
+    tail = monitor.ClassicalTail(dag_dir, analyze_classical.DEFAULT_GLOB, TPJ)
+    return tail, monitor.SideStats("classical", 2 * TPJ, window=60)
+
+
+@pytest.mark.parametrize("fixture", ["classical_per_node", "classical_shared"])
+def test_classical_tail(fixture: str):
+    tail, stats = make_tail(FIXTURES / fixture)
+    tail.poll(stats)
+    # J1 failed once (then was retried OK) & J2 was evicted once
+    assert (stats.n_done, stats.n_failed) == (2 * TPJ, 2)
+    assert stats.in_flight == 0
+    if fixture == "classical_per_node":
+        # the done nodes' logs aren't read again; the failed attempt's may grow
+        assert tail.finished == {"dag.J1.102.log", "dag.J2.103.log"}
+        assert set(tail.offsets) == {"dag.J1.101.log"}
+    else:
+        assert not tail.finished
+        assert set(tail.offsets) == {"dag.jobs.log"}
+
+    tail.poll(stats)  # nothing new
+    assert (stats.n_done, stats.n_failed) == (2 * TPJ, 2)
+
+
+def test_classical_tail_dagman_logs_skipped(tmp_path: Path):
+    shutil.copy(FIXTURES / "classical_per_node/dag.dagman.log", tmp_path)
+    tail, stats = make_tail(tmp_path)
+    tail.poll(stats)
+    assert (stats.n_done, stats.n_failed) == (0, 0)
+    assert not tail.offsets
+
+
+def test_classical_tail_partial_event(tmp_path: Path):
+    log = (FIXTURES / "classical_shared/dag.jobs.log").read_text()
+    split = log.index("Job terminated.")  # mid-way through J1's 1st attempt's end
+    fpath = tmp_path / "dag.jobs.log"
+    fpath.write_text(log[:split])
+
+    tail, stats = make_tail(tmp_path)
+    tail.poll(stats)
+    # only the whole events: both jobs executing (J2 again, after its eviction)
+    assert (stats.n_done, stats.n_failed) == (0, 1)
+    assert stats.in_flight == 2 * TPJ
+    assert tail.offsets["dag.jobs.log"] == log.rindex("\n...\n", 0, split) + 5
+
+    fpath.write_text(log)  # the rest of the log
+    tail.poll(stats)
+    assert (stats.n_done, stats.n_failed) == (2 * TPJ, 2)
+    assert stats.in_flight == 0
+
+
+def test_rolling_rate(now):
+    rate = monitor.RollingRate(window=10)
+    rate.add(NOW - 5, 3)
+    rate.add(NOW - 5.5, 2)  # late -- in the latest bucket
+    rate.add(NOW - 1)
+    assert list(rate.buckets) == [[NOW - 5, 5], [NOW - 1, 1]]
+    assert rate.rate() == pytest.approx(6 / 10)
+
+    now[0] = NOW + 6  # the 1st bucket's out of the window
+    assert rate.rate() == pytest.approx(1 / 10)
+    now[0] = NOW + 100
+    assert rate.rate() == 0
+    assert not rate.buckets
+
+
+def test_rolling_rate_bounded(now):
+    rate = monitor.RollingRate(window=10)
+    for i in range(1000):
+        rate.add(NOW - 9 + i / 100)  # 100/s for 10s
+    assert len(rate.buckets) == 10
+    assert rate.rate() == pytest.approx(100)
+
+
+def test_side_stats_eta(now):
+    stats = monitor.SideStats("ewms", 100, window=10)
+    assert stats.eta() == math.inf  # no rate yet
+    stats.n_done = 40
+    stats.rolling.add(NOW - 1, 20)  # 2/s
+    assert stats.eta() == pytest.approx(30)
+    stats.n_done = 100
+    assert stats.eta() == 0
+    assert 'benchmark_eta_seconds{system="ewms"} 0.0' in stats.prometheus_lines()
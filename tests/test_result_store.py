@@ -0,0 +1,121 @@
+"""Tests for result_store.py."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from result_store import (
+    CLASSICAL,
+    EWMS,
+    NPZ_FNAMES,
+    ResultStore,
+    get_pair_dir,
+    parse_pair_dir,
+)
+
+
+def insert_pair(
+    store: ResultStore,
+    pair_id: str,
+    test_vars: dict,
+    classical_makespan: float,
+    ewms_makespan: float,
+    runs_dir: str = "runs_01",
+) -> None:
+    """Insert a pair's rows directly (w/o analyzer NPZs)."""
+    for system, makespan in [(CLASSICAL, classical_makespan), (EWMS, ewms_makespan)]:
+        store.conn.execute(
+            "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                runs_dir,
+                pair_id,
+                system,
+                f"{system}-{pair_id}",
+                json.dumps(test_vars),
+                json.dumps({"makespan": makespan}),
+                "{}",
+                "x.npz",
+                0,
+                0.0,
+            ),
+        )
+
+
+@pytest.fixture
+def store(tmp_path: Path):
+    with ResultStore(tmp_path / "results.sqlite") as store:
+        yield store
+
+
+def test_ratio_table_by_number(store: ResultStore) -> None:
+    insert_pair(store, "P1", {"TASK_RUNTIME": 600}, 100.0, 50.0)
+    insert_pair(store, "P2", {"TASK_RUNTIME": 60}, 100.0, 80.0)
+    insert_pair(store, "P3", {"TASK_RUNTIME": 60}, 100.0, 60.0)
+
+    table = store.ratio_table("TASK_RUNTIME")
+
+    assert [row["TASK_RUNTIME"] for row in table] == [60, 600]  # numeric order
+    assert table[0]["n"] == 2
+    assert table[0]["mean"] == pytest.approx(0.7)
+    assert (table[0]["min"], table[0]["max"]) == pytest.approx((0.6, 0.8))
+    assert table[1]["median"] == pytest.approx(0.5)
+
+
+def test_ratio_table_by_list(store: ResultStore) -> None:
+    """List values (stored as JSON lists) are grouped, not hashed."""
+    insert_pair(store, "P1", {"WORKER_SPEED_FACTOR": [1.0, 5.0]}, 100.0, 50.0)
+    insert_pair(store, "P2", {"WORKER_SPEED_FACTOR": [1.0, 5.0]}, 100.0, 70.0)
+    insert_pair(store, "P3", {"WORKER_SPEED_FACTOR": None}, 100.0, 90.0)
+
+    table = store.ratio_table("WORKER_SPEED_FACTOR")
+
+    by_value = {json.dumps(row["WORKER_SPEED_FACTOR"]): row for row in table}
+    assert by_value["[1.0, 5.0]"]["n"] == 2
+    assert by_value["[1.0, 5.0]"]["mean"] == pytest.approx(0.6)
+    assert by_value["null"]["n"] == 1
+
+
+def test_ratio_skips_missing_metrics(store: ResultStore) -> None:
+    insert_pair(store, "P1", {"TASK_RUNTIME": 60}, 100.0, 50.0)
+    insert_pair(store, "P2", {"TASK_RUNTIME": 60}, 0.0, 50.0)  # no classical makespan
+
+    assert store.ratio_table("TASK_RUNTIME")[0]["n"] == 1
+
+
+def write_npz(fpath: Path, makespan: float) -> None:
+    fpath.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(fpath, metrics_json=np.asarray(json.dumps({"makespan": makespan})))
+
+
+def test_ingest_shared_ewms_json(tmp_path: Path, store: ResultStore) -> None:
+    """Pairs w/ the same EWMS request JSON keep their own EWMS results."""
+    runs_dir = tmp_path / "runs_01"
+    pairs = [
+        {
+            "pair_id": pair_id,
+            "classical": f"classical_dag__{pair_id}",
+            "ewms_json": "ewms_workflow__shared.json",
+            "test_vars": {"TASK_RUNTIME": runtime},
+        }
+        for pair_id, runtime in [("P1", 60), ("P2", 600)]
+    ]
+    runs_dir.mkdir()
+    (runs_dir / "index.json").write_text(json.dumps({"pairs": pairs}))
+    for pair, ewms_makespan in zip(pairs, [50.0, 80.0]):
+        write_npz(runs_dir / pair["classical"] / NPZ_FNAMES[CLASSICAL], 100.0)
+        write_npz(
+            get_pair_dir(runs_dir, pair["pair_id"]) / NPZ_FNAMES[EWMS], ewms_makespan
+        )
+
+    assert store.ingest(tmp_path) == 4
+    assert store.ingest(tmp_path) == 0  # unchanged
+    ewms = {pair_id: e["makespan"] for _, pair_id, _, _, e in store.iter_pairs()}
+    assert ewms == {"P1": 50.0, "P2": 80.0}
+
+
+def test_parse_pair_dir(tmp_path: Path) -> None:
+    assert parse_pair_dir(get_pair_dir(tmp_path, "P007")) == (tmp_path, "P007")
+    with pytest.raises(ValueError):
+        parse_pair_dir(tmp_path / "ewms_workflow__x")
@@ -0,0 +1,101 @@
+"""Tests for simulate.py -- small, deterministic runs w/ known makespans."""
+
+import math
+from dataclasses import replace
+
+import pytest
+
+import simulate
+import test_suite_builder as tsb
+
+# no evictions & round numbers, so every event's time is known
+CONFIG = simulate.SimConfig(
+    pool_slots=10,
+    negotiation_interval=10.0,
+    eviction_rate=0.0,
+    job_startup=5.0,
+    classical_task_startup=0.5,
+    dagman_submit_interval=5.0,
+    ewms_activation_delay=120.0,
+    pilot_startup=30.0,
+    ewms_task_startup=2.0,
+    ewms_queue_timeout=60.0,
+    ewms_quarantine=600.0,
+)
+
+
+def test_abstract():
+    with pytest.raises(TypeError):
+        simulate._Sim(tsb.TestVars(TASKS_PER_JOB=1), 1, CONFIG, 0)  # type: ignore
+
+
+def test_classical():
+    # 2 nodes of 2 tasks: submitted at 0, claimed at the 1st negotiation (10),
+    # started at 15, then 2 x (60s + 0.5s startup)
+    res = simulate.ClassicalSim(
+        tsb.TestVars(TASKS_PER_JOB=2, TASK_RUNTIME=60), 4, CONFIG, seed=0
+    ).run()
+    assert (res.n_units, res.n_done, res.n_failed) == (2, 2, 0)
+    assert res.makespan == 15 + 2 * 60.5
+    assert (res.n_job_starts, res.n_retries, res.n_evictions) == (2, 0, 0)
+
+
+def test_classical_retries():
+    # every task fails, so every node's retried until it's out of retries
+    res = simulate.ClassicalSim(
+        tsb.TestVars(TASKS_PER_JOB=2, FAIL_PROB=1.0), 4, CONFIG, seed=0
+    ).run()
+    assert (res.n_done, res.n_failed) == (0, 2)
+    assert res.n_retries == 2 * tsb.DAG_MAX_RETRIES
+    assert res.n_job_starts == 2 * (tsb.DAG_MAX_RETRIES + 1)
+    assert math.isnan(res.makespan)
+
+
+def test_ewms():
+    # 2 pilots: submitted at activation (120), claimed at 130, ready at
+    # 130 + 5 + 30, then 2 tasks each of (60s + 2s startup)
+    res = simulate.EWMSSim(
+        tsb.TestVars(TASKS_PER_JOB="ewms", TASK_RUNTIME=60), 4, 2, CONFIG, seed=0
+    ).run()
+    assert (res.n_units, res.n_done) == (4, 4)
+    assert res.makespan == 165 + 2 * 62
+    assert (res.n_job_starts, res.n_retries) == (2, 0)
+
+
+def test_ewms_redelivery_on_eviction():
+    # the 1st pilot's evicted 100s after its claim, mid-task -- its message is
+    # redelivered to the re-queued pilot's next run (never evicted)
+    sim = simulate.EWMSSim(
+        tsb.TestVars(TASKS_PER_JOB="ewms", TASK_RUNTIME=100),
+        1,
+        1,
+        replace(CONFIG, eviction_rate=1.0),
+        seed=0,
+    )
+    delays = iter([100.0, math.inf])
+    sim.draws.exponential = lambda mean: next(delays)  # type: ignore[method-assign]
+    res = sim.run()
+    assert (res.n_done, res.n_evictions, res.n_retries) == (1, 1, 1)
+    assert res.n_job_starts == 2
+    # evicted at 230, re-claimed at 240, ready at 275, + 102s
+    assert res.makespan == 275 + 102
+
+
+def test_ewms_redelivery_on_failure():
+    # the task fails, so its message is redelivered -- but the quarantined
+    # pilot isn't re-queued, so no one's left to run it
+    res = simulate.EWMSSim(
+        tsb.TestVars(TASKS_PER_JOB="ewms", FAIL_PROB=1.0),
+        1,
+        1,
+        replace(CONFIG, ewms_requeue_pilots=False),
+        seed=0,
+    ).run()
+    assert (res.n_done, res.n_retries, res.n_job_starts) == (0, 1, 1)
+    assert math.isnan(res.makespan)
+
+
+def test_tune_config():
+    config = simulate.tune_config(CONFIG, tsb.DAGManTuning(DAGMAN_MAX_JOBS_IDLE=7))
+    assert config.dagman_max_jobs_idle == 7
+    assert config.dagman_submit_interval == CONFIG.dagman_submit_interval
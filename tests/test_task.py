@@ -0,0 +1,36 @@
+"""Tests for task.py's stdlib-only random draws."""
+
+import random
+import statistics
+
+import pytest
+
+import task
+
+
+@pytest.mark.parametrize("lam", [0.5, 4, 30, 200])
+def test_stdlib_poisson_moments(lam: float):
+    rng = random.Random(123)
+    draws = [task._stdlib_poisson(lam, rng) for _ in range(20_000)]
+    assert all(isinstance(k, int) and k >= 0 for k in draws)
+    # mean & variance are both 'lam' (w/ a generous tolerance)
+    assert statistics.fmean(draws) == pytest.approx(lam, rel=0.05)
+    assert statistics.pvariance(draws) == pytest.approx(lam, rel=0.1)
+
+
+def test_stdlib_poisson_nonpositive():
+    assert task._stdlib_poisson(0, random.Random(1)) == 0
+    assert task._stdlib_poisson(-1, random.Random(1)) == 0
+
+
+def test_stdlib_poisson_seeded():
+    draws = [task._stdlib_poisson(50, random.Random(7)) for _ in range(2)]
+    assert draws[0] == draws[1]
+
+
+def test_draw_poisson_stdlib(monkeypatch):
+    monkeypatch.setattr(task, "get_numpy", lambda: None)
+    draws = [task.draw_poisson(5) for _ in range(2000)]
+    assert all(isinstance(k, int) and k >= 0 for k in draws)
+    assert statistics.fmean(draws) == pytest.approx(5, rel=0.1)
+
@@ -0,0 +1,52 @@
+"""Tests for work_kernels.py -- short runs of each kernel."""
+
+import numpy as np
+import pytest
+
+import work_kernels
+
+DURATION = 0.2  # seconds
+
+
+@pytest.mark.parametrize(
+    "size,expected",
+    [
+        ("4096", 4096),
+        ("512M", 512 * 1024**2),
+        ("1GB", 1024**3),
+        ("1.5k", 1536),
+        (" 2g ", 2 * 1024**3),
+    ],
+)
+def test_parse_size(size: str, expected: int):
+    assert work_kernels.parse_size(size) == expected
+
+
+def test_sleep():
+    assert work_kernels.run(work_kernels.SLEEP, DURATION, 0, None) >= DURATION
+
+
+@pytest.mark.parametrize("np_", [np, None], ids=["numpy", "stdlib"])
+def test_cpu(np_):
+    achieved = work_kernels.run(work_kernels.CPU, DURATION, 0, np_)
+    assert DURATION <= achieved < DURATION + 1
+
+
+@pytest.mark.parametrize("np_", [np, None], ids=["numpy", "stdlib"])
+def test_memory(np_):
+    achieved = work_kernels.run(work_kernels.MEMORY, DURATION, 1024**2, np_)
+    assert DURATION <= achieved < DURATION + 1
+
+
+def test_disk(tmp_path, monkeypatch):
+    monkeypatch.setenv("_CONDOR_SCRATCH_DIR", str(tmp_path))
+    achieved = work_kernels.run(
+        work_kernels.DISK, DURATION, work_kernels.DISK_BLOCK_SIZE, None
+    )
+    assert DURATION <= achieved < DURATION + 1
+    assert not list(tmp_path.iterdir())  # the scratch file is removed
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        work_kernels.run("nope", DURATION, 0, None)
@@ -0,0 +1,173 @@
+"""Simulated-work kernels for the task -- see 'task.py'.
+
+Each kernel keeps its resource busy until a target duration, and returns the
+achieved duration (seconds):
+
+- 'sleep':  idle
+- 'cpu':    a vectorized (numpy) CPU burn, in calibrated chunks
+- 'memory': allocate & repeatedly sweep a footprint (up to WORKER_MEMORY)
+- 'disk':   write, fsync, & read back a scratch file (up to WORKER_DISK)
+"""
+
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+LOGGER = logging.getLogger(__name__)
+
+SLEEP = "sleep"
+CPU = "cpu"
+MEMORY = "memory"
+DISK = "disk"
+
+CHUNK_TARGET = 0.05  # seconds -- how often a busy kernel checks the clock
+PAGE_SIZE = 4096
+DISK_BLOCK_SIZE = 4 * 1024 * 1024
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(size: str) -> int:
+    """Parse a condor-style size (e.g. '512M', '1GB') into bytes."""
+    value = size.strip().upper().removesuffix("B")
+    unit = value[-1] if value and value[-1] in _SIZE_UNITS else ""
+    return int(float(value.removesuffix(unit)) * _SIZE_UNITS[unit])
+
+
+def do_sleep(duration: float) -> float:
+    """Idle for the duration."""
+    t0 = time.monotonic()
+    time.sleep(max(duration, 0.0))
+    return time.monotonic() - t0
+
+
+def _run_calibrated(duration: float, chunk: Callable[[int], None]) -> float:
+    """Run 'chunk(n)' repeatedly until the duration, growing/shrinking 'n' so
+    each call takes about 'CHUNK_TARGET' seconds.
+    """
+    t0 = time.monotonic()
+    deadline = t0 + duration
+    n = 1
+    while (now := time.monotonic()) < deadline:
+        chunk(n)
+        took = time.monotonic() - now
+        # aim for CHUNK_TARGET, but don't overshoot the deadline by much
+        target = min(CHUNK_TARGET, max(deadline - time.monotonic(), 0.0))
+        if took > 0:
+            n = max(1, min(int(n * target / took), n * 8))
+        else:
+            n *= 8
+    return time.monotonic() - t0
+
+
+def do_cpu(duration: float, np: ModuleType | None) -> float:
+    """Burn CPU for the duration."""
+    if np is None:
+        LOGGER.warning("numpy is not installed, using a pure-python CPU burn")
+
+        def chunk(n: int) -> None:
+            x = 0.0
+            for i in range(n * 1_000):
+                x += (i * 1.0001) ** 0.5
+
+    else:
+        a = np.random.default_rng().random((128, 128))
+
+        def chunk(n: int) -> None:
+            for _ in range(n):
+                np.sqrt(a @ a, out=a)
+                np.divide(a, a.max(), out=a)  # keep it bounded -- no overflow
+
+    return _run_calibrated(duration, chunk)
+
+
+def _make_memory_chunk(n_pages: int, np: ModuleType | None) -> Callable[[int], None]:
+    """Allocate the footprint & get a chunk that sweeps it (the footprint lives as
+    long as the chunk does).
+    """
+    if np is None:
+        buf = bytearray(n_pages * PAGE_SIZE)
+        marks = bytes(range(256))
+
+        def chunk(n: int) -> None:
+            # touch every page -- writes one byte per page
+            for i in range(n):
+                buf[::PAGE_SIZE] = bytes([marks[i % 256]]) * n_pages
+
+    else:
+        arr = np.ones(n_pages * PAGE_SIZE, dtype=np.uint8)  # touches every page
+
+        def chunk(n: int) -> None:
+            for _ in range(n):
+                np.add(arr, 1, out=arr)  # a full read+write sweep
+
+    return chunk
+
+
+def do_memory(duration: float, footprint: int, np: ModuleType | None) -> float:
+    """Hold (and keep sweeping) a memory footprint for the duration."""
+    t0 = time.monotonic()
+    n_pages = max(footprint // PAGE_SIZE, 1)
+    LOGGER.info(f"allocating {n_pages * PAGE_SIZE / 1024**2:.1f} MiB")
+    chunk = _make_memory_chunk(n_pages, np)
+    _run_calibrated(duration - (time.monotonic() - t0), chunk)
+    del chunk  # frees the footprint (within the achieved duration)
+    return time.monotonic() - t0
+
+
+def do_disk(duration: float, footprint: int, scratch_dir: Path) -> float:
+    """Repeatedly write (& fsync) then read back a scratch file for the duration."""
+    t0 = time.monotonic()
+    deadline = t0 + duration
+    n_blocks = max(footprint // DISK_BLOCK_SIZE, 1)
+    block = os.urandom(DISK_BLOCK_SIZE)
+    LOGGER.info(f"using {n_blocks * DISK_BLOCK_SIZE / 1024**2:.1f} MiB of disk")
+
+    fd, fname = tempfile.mkstemp(prefix="work-kernel-", dir=scratch_dir)
+    try:
+        with os.fdopen(fd, "r+b", buffering=0) as f:
+            while time.monotonic() < deadline:
+                # write pass
+                f.seek(0)
+                for _ in range(n_blocks):
+                    f.write(block)
+                    if time.monotonic() >= deadline:
+                        break
+                os.fsync(f.fileno())
+                # -> drop the file from the page cache, so reads hit the disk
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+                # read pass
+                f.seek(0)
+                while time.monotonic() < deadline and f.read(DISK_BLOCK_SIZE):
+                    pass
+    finally:
+        os.unlink(fname)
+    return time.monotonic() - t0
+
+
+def run(
+    profile: str,
+    duration: float,
+    footprint: int,
+    np: ModuleType | None,
+) -> float:
+    """Run the profile's kernel for the duration -- returns the achieved duration.
+
+    'footprint' (bytes) is only used by the 'memory' & 'disk' profiles.
+    """
+    if profile == SLEEP:
+        return do_sleep(duration)
+    elif profile == CPU:
+        return do_cpu(duration, np)
+    elif profile == MEMORY:
+        return do_memory(duration, footprint, np)
+    elif profile == DISK:
+        scratch_dir = Path(os.getenv("_CONDOR_SCRATCH_DIR", tempfile.gettempdir()))
+        return do_disk(duration, footprint, scratch_dir)
+    else:
+        raise ValueError(f"unknown work profile: {profile}")